@@ -1,9 +1,15 @@
+import importlib
 import streamlit as st
 from components.sidebar import show_sidebar
-from modules_csv_viewer import show_csv_viewer
-from modules_csv_upload import show_csv_upload
-from modules_messaging import show_messaging_page
-from modules_scraper_page import show_scraper_page
+
+# Navigation label -> (module, page function). Page modules (and pandas,
+# selenium etc. behind them) are imported only when their page is shown.
+PAGES = {
+    "📊 CSV Görüntüleyici": ("modules_csv_viewer", "show_csv_viewer"),
+    "📤 CSV Yükle": ("modules_csv_upload", "show_csv_upload"),
+    "💬 Mesajlaşma": ("modules_messaging", "show_messaging_page"),
+    "🔍 Google Maps Kazıyıcı": ("modules_scraper_page", "show_scraper_page"),
+}
 
 # Page config
 st.set_page_config(
@@ -31,23 +37,23 @@ st.markdown("""
         border-left: 4px solid #2d5aa0;
         margin: 0.5rem 0;
     }
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 2rem;
+    .st-key-main_nav div[role="radiogroup"] {
+        gap: 1rem;
+        margin-bottom: 1rem;
     }
-    .stTabs [data-baseweb="tab"] {
-        height: 3rem;
-        padding: 0 1.5rem;
+    .st-key-main_nav div[role="radiogroup"] > label {
+        padding: 0.6rem 1.5rem;
         background-color: #f0f2f6;
-        border-radius: 8px 8px 0 0;
+        border-radius: 8px;
         color: #333 !important;
         font-weight: 500;
     }
-    .stTabs [aria-selected="true"] {
-        background-color: #2d5aa0 !important;
+    .st-key-main_nav div[role="radiogroup"] > label:has(input:checked) {
+        background-color: #2d5aa0;
         color: white !important;
         font-weight: 600;
     }
-    .stTabs [data-baseweb="tab"] p {
+    .st-key-main_nav div[role="radiogroup"] > label p {
         color: inherit !important;
         margin: 0;
     }
@@ -65,17 +71,8 @@ st.markdown("""
 # Sidebar
 show_sidebar()
 
-# Main navigation
-tab1, tab2, tab3, tab4 = st.tabs(["📊 CSV Görüntüleyici", "📤 CSV Yükle", "💬 Mesajlaşma", "🔍 Google Maps Kazıyıcı"])
-
-with tab1:
-    show_csv_viewer()
-
-with tab2:
-    show_csv_upload()
-
-with tab3:
-    show_messaging_page()
+# Main navigation: only the selected page is imported and rendered on each rerun
+page = st.radio("Sayfa", list(PAGES), horizontal=True, label_visibility="collapsed", key="main_nav")
 
-with tab4:
-    show_scraper_page()
\ No newline at end of file
+module_name, function_name = PAGES[page]
+getattr(importlib.import_module(module_name), function_name)()
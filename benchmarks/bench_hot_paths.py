@@ -0,0 +1,294 @@
+"""
+Micro-benchmarks for the data and messaging hot paths.
+
+Covers phone normalization/validation, every valid-phones extraction
+variant, CSV loading (comma and semicolon files, cold and cached), the sent
+messages dedup log, save_to_csv and the streaming Excel export. Each case is run --repeat times and the
+best time is reported.
+
+Results can be stored as a named baseline under benchmarks/baselines/ and
+later runs compared against it; cases slower than the baseline by more than
+--tolerance are reported as regressions and make the script exit with 1.
+Baselines are machine specific, so compare only against ones recorded on
+the same machine.
+
+Usage:
+    python benchmarks/bench_hot_paths.py --save-baseline local
+    python benchmarks/bench_hot_paths.py --compare local --tolerance 0.25
+    python benchmarks/bench_hot_paths.py --only phones csv --phones 200000
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from csv_loader import clear_cache, load_csv, read_csv  # noqa: E402
+from wp_message_sender import (  # noqa: E402
+    _normalize_phone_text, create_sent_log, format_turkish_mobile, is_message_already_sent,
+    is_valid_turkish_mobile, log_sent_message, message_hash, normalize_turkish_mobile,
+    normalize_turkish_mobiles
+)
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+GROUPS = ("phones", "valid_phones", "csv", "sent_log", "save_csv", "xlsx")
+MESSAGE = "Merhaba {name}! Size özel kampanyamız hakkında bilgi vermek isteriz."
+
+# Notations seen in scraped and uploaded files; landlines are invalid on purpose
+PHONE_FORMATS = (
+    "0{a}{b} {c} {d} {e}", "+90 {a}{b} {c} {d} {e}", "(0{a}{b}) {c}-{d}-{e}",
+    "90{a}{b}{c}{d}{e}", "{a}{b}{c}{d}{e}", "0242 {c} {d} {e}",
+)
+
+
+def make_phones(count, seed=42, duplicate_share=0.1):
+    """Phone numbers in mixed notations, about duplicate_share of them repeated."""
+    rng = random.Random(seed)
+    phones = []
+    for i in range(count):
+        if phones and rng.random() < duplicate_share:
+            phones.append(rng.choice(phones))
+            continue
+        phones.append(rng.choice(PHONE_FORMATS).format(
+            a="5", b=f"{rng.randrange(100):02d}", c=f"{rng.randrange(1000):03d}",
+            d=f"{rng.randrange(100):02d}", e=f"{i % 100:02d}"
+        ))
+    return phones
+
+
+def make_records(count, seed=42):
+    """Scraper-shaped business records."""
+    phones = make_phones(count, seed)
+    return [
+        {
+            "name": f"İşletme {i}",
+            "address": f"Cumhuriyet Cd. No:{i}, Muratpaşa/Antalya",
+            "phone": phones[i],
+            "website": f"https://isletme{i}.com.tr" if i % 3 else "",
+            "rating": "4,5",
+            "reviews": str(i % 900),
+            "category": "Kafe" if i % 2 else "Restoran",
+            "maps_url": f"https://www.google.com/maps/place/isletme{i}",
+        }
+        for i in range(count)
+    ]
+
+
+def best_of(repeat, func, setup=None):
+    """Best wall time of repeat runs of func (setup runs untimed before each)."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_phones(args, results):
+    phones = make_phones(args.phones)
+    series = pd.Series(phones)
+    count = len(phones)
+    cases = {
+        "normalize_turkish_mobile": lambda: [normalize_turkish_mobile(p) for p in phones],
+        "is_valid_turkish_mobile": lambda: [is_valid_turkish_mobile(p) for p in phones],
+        "format_turkish_mobile": lambda: [format_turkish_mobile(p) for p in phones if is_valid_turkish_mobile(p)],
+        "normalize_turkish_mobiles (Series)": lambda: normalize_turkish_mobiles(series),
+    }
+    # Merged and re-uploaded files repeat most numbers
+    repeated = make_phones(args.phones, duplicate_share=0.6)
+    repeated_series = pd.Series(repeated)
+    cases["normalize_turkish_mobile (60% repeated)"] = lambda: [normalize_turkish_mobile(p) for p in repeated]
+    cases["normalize_turkish_mobiles (Series, 60% repeated)"] = lambda: normalize_turkish_mobiles(repeated_series)
+    for name, func in cases.items():
+        # Cold normalization cache, as for a newly loaded file
+        seconds = best_of(args.repeat, func, setup=_normalize_phone_text.cache_clear)
+        results[f"phones/{name}/{count}"] = seconds
+
+
+def bench_valid_phones(args, results):
+    import modules_csv_upload
+    import modules_messaging
+
+    for rows in args.rows:
+        records = make_records(rows)
+        df = pd.DataFrame(records)
+        cases = {
+            "upload._get_valid_phones": lambda: modules_csv_upload._get_valid_phones(df),
+            "messaging._get_valid_phones": lambda: modules_messaging._get_valid_phones(df),
+            "messaging._get_valid_phones_from_records": (
+                lambda: modules_messaging._get_valid_phones_from_records(iter(records), "bench.csv")
+            ),
+        }
+        for name, func in cases.items():
+            seconds = best_of(args.repeat, func, setup=_normalize_phone_text.cache_clear)
+            results[f"valid_phones/{name}/{rows}"] = seconds
+
+
+def bench_csv(args, results, tmp_dir):
+    for rows in args.rows:
+        df = pd.DataFrame(make_records(rows))
+        for label, sep in (("comma", ","), ("semicolon", ";")):
+            path = os.path.join(tmp_dir, f"{label}_{rows}.csv")
+            df.to_csv(path, sep=sep, index=False)
+            results[f"csv/read_csv {label}/{rows}"] = best_of(args.repeat, lambda: read_csv(path))
+        path = os.path.join(tmp_dir, f"comma_{rows}.csv")
+        results[f"csv/load_csv cold/{rows}"] = best_of(args.repeat, lambda: load_csv(path), setup=clear_cache)
+        load_csv(path)
+        results[f"csv/load_csv cached/{rows}"] = best_of(args.repeat, lambda: load_csv(path))
+
+
+def bench_sent_log(args, results, tmp_dir):
+    # Unique valid numbers; a sixth of the generated ones are landlines
+    needed = max(args.log_sizes) + args.log_calls
+    phones = list(dict.fromkeys(filter(None, map(normalize_turkish_mobile, make_phones(needed * 2)))))[:needed]
+    hash_value = message_hash(MESSAGE)
+
+    for size in args.log_sizes:
+        log_file = os.path.join(tmp_dir, f"sent_{size}.json")
+        sent_log = {f"{phone}_{hash_value}": "2024-01-01T00:00:00" for phone in phones[:size]}
+
+        def reset_log():
+            with open(log_file, "w", encoding="utf-8") as f:
+                json.dump(sent_log, f, ensure_ascii=False, indent=2)
+
+        new_phones = phones[size:size + args.log_calls]
+        checked = phones[:args.log_calls]
+        log_seconds = best_of(
+            args.repeat, lambda: [log_sent_message(p, hash_value, log_file) for p in new_phones], setup=reset_log
+        )
+        check_seconds = best_of(
+            args.repeat, lambda: [is_message_already_sent(p, MESSAGE, hash_value, log_file) for p in checked]
+        )
+        load_seconds = best_of(args.repeat, lambda: create_sent_log(log_file))
+        # Per call, since every call reads (and logging also rewrites) the whole log
+        results[f"sent_log/log_sent_message per call/{size}"] = log_seconds / max(1, len(new_phones))
+        results[f"sent_log/is_message_already_sent per call/{size}"] = check_seconds / max(1, len(checked))
+        results[f"sent_log/create_sent_log/{size}"] = load_seconds
+
+
+def bench_save_csv(args, results, tmp_dir):
+    from scraper import save_to_csv
+
+    for count in args.records:
+        records = make_records(count)
+        path = os.path.join(tmp_dir, f"save_{count}.csv")
+        results[f"save_csv/save_to_csv/{count}"] = best_of(args.repeat, lambda: save_to_csv(records, path))
+
+
+def bench_xlsx(args, results, tmp_dir):
+    from xlsx_export import csv_source, export_xlsx
+
+    for rows in args.xlsx_rows:
+        path = os.path.join(tmp_dir, f"export_{rows}.csv")
+        pd.DataFrame(make_records(rows)).to_csv(path, index=False)
+        out_path = os.path.join(tmp_dir, f"export_{rows}.xlsx")
+        results[f"xlsx/export_xlsx csv/{rows}"] = best_of(
+            args.repeat, lambda: export_xlsx(csv_source(path), out_path)
+        )
+
+
+def _baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save_baseline(name, results, args):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    baseline = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+        },
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(_baseline_path(name), "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+    print(f"\nBaseline saved to {_baseline_path(name)}")
+
+
+def compare_baseline(name, results, tolerance, min_ms):
+    """Print the change against a baseline and return the names of regressed cases."""
+    with open(_baseline_path(name), encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    print(f"\nCompared with baseline '{name}' (tolerance {tolerance:.0%})")
+    print(f"{'case':<72} {'base ms':>10} {'now ms':>10} {'change':>8}")
+    regressions = []
+    for case, seconds in results.items():
+        base = baseline.get(case)
+        if base is None:
+            print(f"{case:<72} {'-':>10} {seconds * 1000:>10.3f} {'new':>8}")
+            continue
+        change = seconds / base - 1 if base else 0.0
+        flag = ""
+        if change > tolerance and (seconds - base) * 1000 >= min_ms:
+            regressions.append(case)
+            flag = "  REGRESSION"
+        print(f"{case:<72} {base * 1000:>10.3f} {seconds * 1000:>10.3f} {change:>+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Data and messaging hot path benchmarks")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS), help="Benchmark groups to run")
+    parser.add_argument("--phones", type=int, default=1_000_000, help="Numbers for the phone function cases")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000],
+                        help="Frame sizes for the valid-phones and CSV loading cases")
+    parser.add_argument("--log-sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="Entries in the sent messages log")
+    parser.add_argument("--log-calls", type=int, default=20, help="Log/check calls timed per log size")
+    parser.add_argument("--records", type=int, nargs="+", default=[100_000], help="Record counts for save_to_csv")
+    parser.add_argument("--xlsx-rows", type=int, nargs="+", default=[50_000], help="Rows for the Excel export")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the best time is kept")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Store the results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Compare with benchmarks/baselines/NAME.json")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown against the baseline before a case counts as a regression")
+    parser.add_argument("--min-ms", type=float, default=1.0,
+                        help="Slowdowns smaller than this many milliseconds are not counted as regressions")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        runners = {
+            "phones": lambda: bench_phones(args, results),
+            "valid_phones": lambda: bench_valid_phones(args, results),
+            "csv": lambda: bench_csv(args, results, tmp_dir),
+            "sent_log": lambda: bench_sent_log(args, results, tmp_dir),
+            "save_csv": lambda: bench_save_csv(args, results, tmp_dir),
+            "xlsx": lambda: bench_xlsx(args, results, tmp_dir),
+        }
+        print(f"{'case':<72} {'ms':>10}")
+        for group in GROUPS:
+            if group not in args.only:
+                continue
+            done = set(results)
+            runners[group]()
+            for case in results:
+                if case not in done:
+                    print(f"{case:<72} {results[case] * 1000:>10.3f}")
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, args)
+    if args.compare:
+        regressions = compare_baseline(args.compare, results, args.tolerance, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
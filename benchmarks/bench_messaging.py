@@ -0,0 +1,95 @@
+"""
+Offline throughput benchmark for the bulk WhatsApp sending pipeline.
+
+Drives simulated sends end-to-end through message rendering, the sent
+messages dedup log and the inter-message scheduler, without contacting
+WhatsApp. Reports sends/sec, dedup log I/O time and peak memory per size.
+
+Usage:
+    python benchmarks/bench_messaging.py --sizes 1000 5000 --latency 0 --failure-rate 0.02
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk_sender import send_bulk_messages  # noqa: E402
+from wp_message_sender import SimulatedSender  # noqa: E402
+
+MESSAGE = "Merhaba {name}! {category} işletmeniz için dijital çözümler sunuyoruz."
+
+
+def _make_recipients(count):
+    """Build synthetic valid_phones records with unique mobile numbers."""
+    return [
+        {
+            "name": f"İşletme {i}",
+            "phone": f"+90555{i:07d}",
+            "address": "Antalya Merkez",
+            "category": "Kafe" if i % 2 else "Restoran",
+        }
+        for i in range(count)
+    ]
+
+
+def run_benchmark(count, latency, failure_rate, delay, seed):
+    """Run one simulated campaign and return its measurements."""
+    recipients = _make_recipients(count)
+    backend = SimulatedSender(latency=latency, failure_rate=failure_rate, seed=seed)
+    slept = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_file = os.path.join(tmp_dir, "sent_messages.json")
+        tracemalloc.start()
+        start = time.perf_counter()
+        statuses = {"success": 0, "skipped": 0, "error": 0}
+        log_seconds = 0.0
+        for result in send_bulk_messages(
+            recipients, MESSAGE, "+905551234567", delay,
+            backend=backend, log_file=log_file, sleep=slept.append
+        ):
+            statuses[result["status"]] += 1
+            log_seconds += result["log_seconds"]
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "count": count,
+        "elapsed": elapsed,
+        "sends_per_sec": count / elapsed if elapsed else float("inf"),
+        "log_seconds": log_seconds,
+        "scheduled_wait": sum(slept),
+        "peak_mb": peak / (1024 * 1024),
+        **statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated bulk messaging benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000],
+                        help="Campaign sizes to run (e.g. 1000 10000 50000)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per send")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Simulated failure probability")
+    parser.add_argument("--delay", type=float, default=5.0,
+                        help="Scheduled wait between messages (recorded, not slept)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for simulated failures")
+    args = parser.parse_args()
+
+    print(f"{'sends':>8} {'sec':>9} {'sends/s':>10} {'log I/O s':>10} {'log %':>6} "
+          f"{'ok':>7} {'err':>6} {'skip':>6} {'peak MB':>8} {'sched. wait':>12}")
+    for size in args.sizes:
+        r = run_benchmark(size, args.latency, args.failure_rate, args.delay, args.seed)
+        log_share = 100 * r["log_seconds"] / r["elapsed"] if r["elapsed"] else 0
+        print(f"{r['count']:>8} {r['elapsed']:>9.2f} {r['sends_per_sec']:>10.1f} {r['log_seconds']:>10.2f} "
+              f"{log_share:>5.1f}% {r['success']:>7} {r['error']:>6} {r['skipped']:>6} "
+              f"{r['peak_mb']:>8.1f} {r['scheduled_wait']:>11.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Startup profile of the Streamlit app.
+
+Measures, each in a fresh interpreter so nothing is already imported:
+  - import time of app.py's eager dependencies and of every page module
+    (from `python -X importtime`), with the slowest packages behind them;
+  - first render and a warm rerun of each page through Streamlit's AppTest,
+    and whether the render pulled in heavy packages (pandas, selenium, ...).
+
+Pages run against an empty csv_files/ in a temporary directory unless
+--workdir points at a directory with data.
+
+Usage:
+    python benchmarks/bench_startup.py --top 5
+    python benchmarks/bench_startup.py --workdir . --pages "💬 Mesajlaşma"
+"""
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# Packages whose presence in sys.modules after a render is reported
+HEAVY_MODULES = ("pandas", "selenium", "openpyxl", "aiohttp", "pywhatkit")
+
+RENDER_SCRIPT = """
+import json, os, sys, time
+sys.path.insert(0, {repo!r})
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(os.path.join({repo!r}, "app.py"), default_timeout=120)
+at.session_state["main_nav"] = {page!r}
+before = set(sys.modules)
+start = time.perf_counter()
+at.run()
+first = time.perf_counter() - start
+start = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - start
+print(json.dumps({{
+    "first": first,
+    "rerun": rerun,
+    "exceptions": [str(e.value) for e in at.exception],
+    "new_modules": len(set(sys.modules) - before),
+    "heavy": [m for m in {heavy!r} if m in sys.modules and m not in before],
+}}))
+"""
+
+
+def load_pages():
+    """Read the navigation table (PAGES) from app.py without running the app."""
+    with open(os.path.join(REPO_DIR, "app.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "PAGES" for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise RuntimeError("PAGES not found in app.py")
+
+
+def profile_import(module, top):
+    """Import module in a fresh interpreter and return (total_us, slowest packages)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    # Lines look like "import time:   self [us] | cumulative | imported package",
+    # nested imports are indented by two spaces per level
+    total, children, packages = 0, [], []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((name.strip(), int(cumulative_us)))
+        elif depth == 0:
+            if name.strip() == module:
+                total, packages = int(cumulative_us), children
+            children = []
+
+    # Packages imported directly by the module, ranked by cumulative time
+    packages.sort(key=lambda entry: entry[1], reverse=True)
+    return total, packages[:top]
+
+
+def profile_render(page, workdir):
+    """Render one page in a fresh interpreter and return its timings."""
+    script = RENDER_SCRIPT.format(repo=REPO_DIR, page=page, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", script], cwd=workdir, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"rendering {page} failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    pages = load_pages()
+    parser = argparse.ArgumentParser(description="Import time and first render profile of the app")
+    parser.add_argument("--pages", nargs="+", default=list(pages),
+                        help="Navigation labels of the pages to render (default: all)")
+    parser.add_argument("--top", type=int, default=5, help="Slowest imported packages listed per module")
+    parser.add_argument("--workdir", help="Directory with csv_files/ to run the app in (default: empty temp dir)")
+    parser.add_argument("--json", dest="json_file", help="Also write the measurements to this JSON file")
+    args = parser.parse_args()
+
+    report = {"imports": {}, "renders": {}}
+
+    print("Import time (fresh interpreter)")
+    print(f"{'module':<24} {'ms':>8}  slowest packages")
+    modules = ["streamlit", "components.sidebar"] + [module for module, _ in pages.values()]
+    for module in modules:
+        total, packages = profile_import(module, args.top)
+        report["imports"][module] = {"ms": total / 1000, "packages": {name: us / 1000 for name, us in packages}}
+        slowest = ", ".join(f"{name} {us / 1000:.0f}" for name, us in packages)
+        print(f"{module:<24} {total / 1000:>8.1f}  {slowest}")
+
+    print()
+    print("Page render (AppTest, fresh interpreter)")
+    print(f"{'page':<26} {'first s':>8} {'rerun s':>8} {'modules':>8}  heavy imports")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        workdir = os.path.abspath(args.workdir) if args.workdir else tmp_dir
+        for page in args.pages:
+            r = profile_render(page, workdir)
+            report["renders"][page] = r
+            heavy = ", ".join(r["heavy"]) or "-"
+            print(f"{page:<26} {r['first']:>8.2f} {r['rerun']:>8.2f} {r['new_modules']:>8}  {heavy}")
+            for exception in r["exceptions"]:
+                print(f"    exception: {exception}")
+
+    if args.json_file:
+        with open(args.json_file, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
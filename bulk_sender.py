@@ -0,0 +1,106 @@
+"""
+Bulk WhatsApp sending pipeline.
+
+Renders the campaign message per recipient, skips numbers that already got
+the same message, sends through a pluggable backend, logs every successful
+send and waits between messages. The Streamlit messaging page and the
+offline benchmark both drive this generator.
+"""
+
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from message_template import render_campaign
+from wp_message_sender import is_message_already_sent, log_sent_message, send_whatsapp_message
+
+
+def send_bulk_messages(
+    recipients: List[Dict],
+    message: str,
+    user_phone: str,
+    delay_seconds: float = 0,
+    backend=None,
+    log_file: Optional[str] = None,
+    sleep: Callable[[float], None] = time.sleep,
+    store=None,
+    campaign_id: Optional[str] = None,
+    source_csv: str = "",
+) -> Iterator[Dict]:
+    """
+    Send a campaign message to every recipient, yielding one result per recipient.
+
+    Args:
+        recipients: valid_phones records to message, in sending order
+        message: Campaign message template
+        user_phone: Sender's phone number
+        delay_seconds: Wait between successful sends (not after the last one)
+        backend: Sender backend (defaults to the real WhatsApp sender)
+        log_file: Sent messages log path (defaults to sent_messages.json)
+        sleep: Function used for the inter-message wait
+        store: Optional CampaignStore that persists every outcome
+        campaign_id: Campaign ID in the store (started automatically if omitted)
+        source_csv: Source file recorded for recipients without their own
+            'source_csv' field
+
+    Yields:
+        Result dictionaries with name, phone, status ('success', 'skipped' or
+        'error'), message, latency (send seconds), log_seconds (dedup log I/O
+        seconds) and error_class
+    """
+    rendered = render_campaign(message, recipients)
+    total = len(recipients)
+    if store is not None and campaign_id is None:
+        campaign_id = store.start_campaign(source_csv, getattr(backend, "name", "pywhatkit"), total)
+
+    def _record(item, result):
+        if store is not None:
+            store.record(campaign_id, result, item.get('source_csv', source_csv), item.get('category', ''))
+
+    for i, item in enumerate(recipients):
+        item_message, message_hash = rendered[i]
+        result = {
+            "name": item['name'],
+            "phone": item['phone'],
+            "status": "success",
+            "message": "Başarıyla gönderildi",
+            "latency": 0.0,
+            "log_seconds": 0.0,
+            "error_class": None,
+        }
+
+        # Check if message already sent to this number
+        log_start = time.perf_counter()
+        already_sent = is_message_already_sent(item['phone'], item_message, message_hash, log_file=log_file)
+        result["log_seconds"] += time.perf_counter() - log_start
+
+        if already_sent:
+            result["status"] = "skipped"
+            result["message"] = "Bu numaraya aynı mesaj daha önce gönderildi"
+            _record(item, result)
+            yield result
+            continue
+
+        send_start = time.perf_counter()
+        try:
+            send_whatsapp_message(user_phone, item['phone'], item_message, backend=backend)
+        except Exception as e:
+            result["latency"] = time.perf_counter() - send_start
+            result["status"] = "error"
+            result["message"] = str(e)[:100]
+            cause = e.__cause__ or e
+            result["error_class"] = type(cause).__name__
+            _record(item, result)
+            yield result
+            continue
+        result["latency"] = time.perf_counter() - send_start
+
+        log_start = time.perf_counter()
+        log_sent_message(item['phone'], message_hash, log_file=log_file)
+        result["log_seconds"] += time.perf_counter() - log_start
+
+        _record(item, result)
+        yield result
+
+        # Wait between messages (except for last one)
+        if delay_seconds and i < total - 1:
+            sleep(delay_seconds)
@@ -0,0 +1,246 @@
+"""
+Compact record type for a single business.
+
+Scraped businesses used to be plain 8-key dicts, rebuilt as new dicts by
+every layer (valid-phone extraction, messaging, merging). BusinessRecord
+keeps the canonical fields in __slots__ instead of a per-instance dict, so a
+record takes about half the memory of the equivalent dict, and
+rating and review count are stored typed (float / int) rather than as the
+text shown on the card.
+
+It behaves as a mutable mapping, so code written against dicts
+(record["phone"], record.get("name"), record.update(details), csv.DictWriter,
+pd.DataFrame(records)) keeps working. Fields outside the canonical set
+(e.g. 'query', 'emails') go to a small extras dict that is only created when
+first needed; the OPTIONAL_FIELDS are slotted too but only appear in the
+mapping once they are set.
+"""
+
+import math
+import numbers
+import re
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+
+# Canonical business fields, in output column order
+FIELDS = ("name", "country", "address", "phone", "website", "category", "rating", "num_reviews")
+
+# Fields kept in slots but only present in the mapping once they are set
+OPTIONAL_FIELDS = ("place_id", "latitude", "longitude", "source_csv")
+
+_FIELD_SET = frozenset(FIELDS)
+_OPTIONAL_SET = frozenset(OPTIONAL_FIELDS)
+_TEXT_FIELDS = _FIELD_SET - {"rating", "num_reviews"}
+_COORDINATE_FIELDS = frozenset(("latitude", "longitude"))
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _text(value) -> str:
+    """Text of a field value; missing values (None, NaN) become ""."""
+    if value is None or value != value:
+        return ""
+    return value if type(value) is str else str(value)
+
+
+def _optional(value):
+    """Value of an optional field; missing values (None, NaN, "") become None."""
+    if value is None or value != value or value == "":
+        return None
+    return value
+
+
+def parse_coordinate(value) -> Optional[float]:
+    """Parse a latitude or longitude; None if missing or invalid."""
+    if value is None or type(value) is float:
+        return None if value != value else value
+    try:
+        return float(str(value).strip().replace(",", "."))
+    except ValueError:
+        return None
+
+
+def parse_rating(value) -> Optional[float]:
+    """Parse a Maps rating such as "4,7" or "4.7"; None if missing or invalid."""
+    if value is None:
+        return None
+    if type(value) is float:
+        return value if 0 <= value <= 5 else None
+    text = _text(value).strip().replace(",", ".")
+    if not text:
+        return None
+    try:
+        rating = float(text)
+    except ValueError:
+        return None
+    return rating if 0 <= rating <= 5 else None
+
+
+def parse_review_count(value) -> Optional[int]:
+    """Parse a review count such as "13.055", "(1,234)" or "57"; None if missing."""
+    if value is None or type(value) is int:
+        return value
+    if isinstance(value, numbers.Real) and not isinstance(value, bool):
+        # Numbers (e.g. 57.0 from a float column) must not be read as text: "57.0" -> 570
+        return int(value) if math.isfinite(value) else None
+    digits = "".join(_DIGITS_RE.findall(_text(value)))
+    return int(digits) if digits else None
+
+
+class BusinessRecord(MutableMapping):
+    """A business with slotted canonical fields and typed rating and review count."""
+
+    __slots__ = FIELDS + OPTIONAL_FIELDS + ("_extras",)
+
+    def __init__(
+        self,
+        name: str = "",
+        country: str = "",
+        address: str = "",
+        phone: str = "",
+        website: str = "",
+        category: str = "",
+        rating=None,
+        num_reviews=None,
+        place_id: Optional[str] = None,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        source_csv: Optional[str] = None,
+        **extras
+    ):
+        # Plain strings (the common case) are stored without conversion
+        self.name = name if type(name) is str else _text(name)
+        self.country = country if type(country) is str else _text(country)
+        self.address = address if type(address) is str else _text(address)
+        self.phone = phone if type(phone) is str else _text(phone)
+        self.website = website if type(website) is str else _text(website)
+        self.category = category if type(category) is str else _text(category)
+        self.rating = None if rating is None else parse_rating(rating)
+        self.num_reviews = None if num_reviews is None else parse_review_count(num_reviews)
+        self.place_id = place_id
+        self.latitude = parse_coordinate(latitude)
+        self.longitude = parse_coordinate(longitude)
+        self.source_csv = source_csv
+        self._extras = extras or None
+
+    @classmethod
+    def from_mapping(cls, data) -> "BusinessRecord":
+        """Build a record from a dict, DataFrame row or another record."""
+        if isinstance(data, cls):
+            return data.copy()
+        record = cls()
+        for key, value in data.items():
+            record[key] = value
+        return record
+
+    def __getitem__(self, key: str):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        if key in _OPTIONAL_SET:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self._extras is not None and key in self._extras:
+            return self._extras[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value) -> None:
+        if key in _TEXT_FIELDS:
+            setattr(self, key, _text(value))
+        elif key == "rating":
+            self.rating = parse_rating(value)
+        elif key == "num_reviews":
+            self.num_reviews = parse_review_count(value)
+        elif key in _COORDINATE_FIELDS:
+            setattr(self, key, parse_coordinate(value))
+        elif key in _OPTIONAL_SET:
+            setattr(self, key, _optional(value))
+        else:
+            if self._extras is None:
+                self._extras = {}
+            self._extras[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in _TEXT_FIELDS:
+            setattr(self, key, "")
+        elif key in ("rating", "num_reviews"):
+            setattr(self, key, None)
+        elif key in _OPTIONAL_SET and getattr(self, key) is not None:
+            setattr(self, key, None)
+        elif self._extras is not None and key in self._extras:
+            del self._extras[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from FIELDS
+        for key in OPTIONAL_FIELDS:
+            if getattr(self, key) is not None:
+                yield key
+        if self._extras:
+            yield from self._extras
+
+    def __len__(self) -> int:
+        optional = sum(getattr(self, key) is not None for key in OPTIONAL_FIELDS)
+        return len(FIELDS) + optional + len(self._extras or ())
+
+    def __contains__(self, key) -> bool:
+        if key in _FIELD_SET:
+            return True
+        if key in _OPTIONAL_SET:
+            return getattr(self, key) is not None
+        return self._extras is not None and key in self._extras
+
+    def get(self, key: str, default=None):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        if key in _OPTIONAL_SET:
+            value = getattr(self, key)
+            return default if value is None else value
+        if self._extras is not None:
+            return self._extras.get(key, default)
+        return default
+
+    def __repr__(self) -> str:
+        return f"BusinessRecord({self.to_dict()!r})"
+
+    def copy(self) -> "BusinessRecord":
+        """Return a shallow copy."""
+        record = BusinessRecord.__new__(BusinessRecord)
+        for slot in self.__slots__:
+            setattr(record, slot, getattr(self, slot))
+        if self._extras:
+            record._extras = dict(self._extras)
+        return record
+
+    def to_dict(self) -> Dict:
+        """Return the record as a plain dict (e.g. for JSON)."""
+        return dict(self.items())
+
+
+def records_to_dataframe(records: Iterable) -> pd.DataFrame:
+    """
+    Build a DataFrame column by column from business records.
+
+    Unlike pd.DataFrame(records) this skips the intermediate dict per record
+    and keeps review counts integer (nullable Int64) instead of float. Plain
+    dicts are accepted and converted.
+    """
+    records = [record if isinstance(record, BusinessRecord) else BusinessRecord.from_mapping(record)
+               for record in records]
+    columns = {field: [getattr(record, field) for record in records] for field in FIELDS}
+    extra_fields = {}
+    for record in records:
+        for key in OPTIONAL_FIELDS:
+            if getattr(record, key) is not None:
+                extra_fields.setdefault(key, None)
+        for key in record._extras or ():
+            extra_fields.setdefault(key, None)
+    for key in extra_fields:
+        columns[key] = [record.get(key) for record in records]
+
+    df = pd.DataFrame(columns)
+    df["rating"] = df["rating"].astype("float64")
+    df["num_reviews"] = df["num_reviews"].astype("Int64")
+    return df
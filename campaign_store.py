@@ -0,0 +1,193 @@
+"""
+Persistent store for WhatsApp campaign send outcomes.
+
+Every result produced by bulk_sender.send_bulk_messages is written to a local
+SQLite table with campaign, recipient, status, latency and error class. A
+rollup table keyed on (source CSV, category) is updated in the same
+transaction, so the analytics view reads a handful of pre-aggregated rows
+instead of rescanning the raw results.
+"""
+
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    campaign_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    source_csv TEXT,
+    backend TEXT,
+    total INTEGER
+);
+CREATE TABLE IF NOT EXISTS send_results (
+    id INTEGER PRIMARY KEY,
+    campaign_id TEXT NOT NULL,
+    sent_at TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    name TEXT,
+    source_csv TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL,
+    latency_ms REAL,
+    error_class TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_send_results_campaign ON send_results (campaign_id, status);
+CREATE INDEX IF NOT EXISTS idx_send_results_recipient ON send_results (recipient, sent_at);
+CREATE INDEX IF NOT EXISTS idx_send_results_source ON send_results (source_csv, category, status, latency_ms);
+CREATE TABLE IF NOT EXISTS send_stats (
+    source_csv TEXT NOT NULL,
+    category TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    successes INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    latency_ms_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (source_csv, category)
+);
+"""
+
+
+def default_store_path(dry_run: bool = False) -> str:
+    """Return the campaign results database path in the working directory."""
+    filename = "campaign_results_dry_run.db" if dry_run else "campaign_results.db"
+    return os.path.join(os.getcwd(), filename)
+
+
+class CampaignStore:
+    """SQLite-backed table of campaign send outcomes with aggregated analytics."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Open (and create if needed) the results database.
+
+        Args:
+            path: Database file path, defaults to campaign_results.db
+        """
+        self.path = path or default_store_path()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def start_campaign(self, source_csv: str = "", backend: str = "", total: int = 0) -> str:
+        """
+        Register a new campaign.
+
+        Returns:
+            The generated campaign ID
+        """
+        campaign_id = uuid.uuid4().hex[:12]
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO campaigns (campaign_id, started_at, source_csv, backend, total) VALUES (?, ?, ?, ?, ?)",
+                (campaign_id, datetime.now().isoformat(), source_csv or "", backend, total),
+            )
+        return campaign_id
+
+    def record(self, campaign_id: str, result: Dict, source_csv: str = "", category: str = "") -> None:
+        """
+        Persist one send outcome and update the rollup in the same transaction.
+
+        Args:
+            campaign_id: Campaign the result belongs to
+            result: Result dictionary yielded by send_bulk_messages
+            source_csv: CSV file the recipient came from
+            category: Business category of the recipient
+        """
+        self.record_many(campaign_id, [(result, source_csv, category)])
+
+    def record_many(self, campaign_id: str, entries: List[tuple]) -> None:
+        """
+        Persist several send outcomes in a single transaction.
+
+        Args:
+            campaign_id: Campaign the results belong to
+            entries: (result, source_csv, category) tuples
+        """
+        now = datetime.now().isoformat()
+        rows = []
+        for result, source_csv, category in entries:
+            status = result["status"]
+            latency_ms = result.get("latency", 0.0) * 1000 if status != "skipped" else None
+            rows.append((
+                campaign_id, now, result["phone"], result.get("name"),
+                _text(source_csv), _text(category), status, latency_ms, result.get("error_class"),
+            ))
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO send_results (campaign_id, sent_at, recipient, name, source_csv, category, "
+                "status, latency_ms, error_class) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.executemany(
+                "INSERT INTO send_stats (source_csv, category, attempts, successes, errors, skipped, latency_ms_sum) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (source_csv, category) DO UPDATE SET "
+                "attempts = attempts + excluded.attempts, successes = successes + excluded.successes, "
+                "errors = errors + excluded.errors, skipped = skipped + excluded.skipped, "
+                "latency_ms_sum = latency_ms_sum + excluded.latency_ms_sum",
+                [
+                    (row[4], row[5], int(row[6] != "skipped"), int(row[6] == "success"),
+                     int(row[6] == "error"), int(row[6] == "skipped"), row[7] or 0.0)
+                    for row in rows
+                ],
+            )
+
+    def category_stats(self, source_csv: Optional[str] = None) -> List[Dict]:
+        """
+        Success rate and mean send latency per source CSV and category.
+
+        Args:
+            source_csv: Optionally restrict to one source file
+
+        Returns:
+            List of dictionaries ordered by source CSV and category
+        """
+        query = (
+            "SELECT source_csv, category, attempts, successes, errors, skipped, "
+            "CASE WHEN attempts > 0 THEN 100.0 * successes / attempts END AS success_rate, "
+            "CASE WHEN attempts > 0 THEN latency_ms_sum / attempts END AS mean_latency_ms "
+            "FROM send_stats"
+        )
+        params = ()
+        if source_csv is not None:
+            query += " WHERE source_csv = ?"
+            params = (source_csv,)
+        query += " ORDER BY source_csv, category"
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def campaign_summary(self, campaign_id: str) -> Dict:
+        """Status counts and mean latency of a single campaign."""
+        row = self.conn.execute(
+            "SELECT COUNT(*) AS total, "
+            "SUM(status = 'success') AS successes, SUM(status = 'error') AS errors, "
+            "SUM(status = 'skipped') AS skipped, AVG(latency_ms) AS mean_latency_ms "
+            "FROM send_results WHERE campaign_id = ?",
+            (campaign_id,),
+        ).fetchone()
+        return dict(row)
+
+    def recent_campaigns(self, limit: int = 10) -> List[Dict]:
+        """Most recent campaigns with their outcome counts."""
+        campaigns = self.conn.execute(
+            "SELECT campaign_id, started_at, source_csv, backend, total FROM campaigns "
+            "ORDER BY started_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [{**dict(c), **self.campaign_summary(c["campaign_id"])} for c in campaigns]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
+
+
+def _text(value) -> str:
+    """Normalize a grouping key (None/NaN become an empty string)."""
+    if value is None or value != value:
+        return ""
+    return str(value)
@@ -0,0 +1,53 @@
+import os
+import time
+import datetime
+from collections import deque
+
+class LogPanel:
+    """
+    Bounded, throttled log view for long running jobs
+
+    Only the last max_lines lines are kept in memory and sent to the browser,
+    at most once every min_interval seconds. Every line is also appended to a
+    full log file under logs/.
+    """
+
+    def __init__(self, placeholder, name="scrape", max_lines=200, min_interval=0.5):
+        self.placeholder = placeholder
+        self.lines = deque(maxlen=max_lines)
+        self.min_interval = min_interval
+        self._last_render = 0.0
+        self._dirty = False
+
+        log_dir = os.path.join(os.getcwd(), "logs")
+        os.makedirs(log_dir, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.path = os.path.join(log_dir, f"{name}_{stamp}.log")
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def add(self, message, level="INFO"):
+        """Add a timestamped line"""
+        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.add_raw(f"{current_time} - {level} - {message}")
+
+    def add_raw(self, line):
+        """Add a line as is (e.g. an already formatted log record)"""
+        self.lines.append(line)
+        self._file.write(line + "\n")
+        self._dirty = True
+        self.render()
+
+    def render(self, force=False):
+        """Send the tail to the browser if it changed and the throttle interval passed"""
+        now = time.monotonic()
+        if not self._dirty or (not force and now - self._last_render < self.min_interval):
+            return
+        self._file.flush()
+        self.placeholder.code("\n".join(self.lines), language=None)
+        self._last_render = now
+        self._dirty = False
+
+    def close(self):
+        """Render pending lines and close the log file"""
+        self.render(force=True)
+        self._file.close()
@@ -0,0 +1,38 @@
+import streamlit as st
+
+def show_paginator(total_rows, key, page_sizes=(25, 50, 100, 250), default_size=50):
+    """Show page size and page number controls and return the (start, end) row range"""
+    col_size, col_page, col_info = st.columns([1, 1, 2])
+
+    with col_size:
+        page_size = st.selectbox(
+            "Sayfa başına kayıt:",
+            page_sizes,
+            index=page_sizes.index(default_size) if default_size in page_sizes else 0,
+            key=f"{key}_page_size"
+        )
+
+    page_count = max(1, -(-total_rows // page_size))
+    # Keep the stored page valid when filtering shrinks the result
+    if st.session_state.get(f"{key}_page", 1) > page_count:
+        st.session_state[f"{key}_page"] = page_count
+    with col_page:
+        page = st.number_input(
+            f"Sayfa (1-{page_count}):",
+            min_value=1,
+            max_value=page_count,
+            value=1,
+            step=1,
+            key=f"{key}_page"
+        )
+
+    start = (page - 1) * page_size
+    end = min(start + page_size, total_rows)
+    with col_info:
+        st.markdown("<br>", unsafe_allow_html=True)
+        if total_rows:
+            st.caption(f"{start + 1}-{end} / {total_rows} kayıt gösteriliyor")
+        else:
+            st.caption("Gösterilecek kayıt yok")
+
+    return start, end
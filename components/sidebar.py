@@ -1,6 +1,9 @@
 import streamlit as st
 import os
 
+# csv_files listing, reused until the directory's mtime changes
+_listing_cache = {}
+
 def show_sidebar():
     """Display the sidebar with navigation and info"""
     # Beautiful header
@@ -30,7 +33,7 @@ def _show_csv_info():
     if not os.path.exists(csv_dir):
         os.makedirs(csv_dir)
     
-    csv_files = [f for f in os.listdir(csv_dir) if f.endswith('.csv')]
+    csv_files = _list_csv_files(csv_dir)
 
     st.sidebar.markdown("### 📁 CSV Dosyaları")
     
@@ -41,4 +44,13 @@ def _show_csv_info():
         if len(csv_files) > 3:
             st.sidebar.write(f"... ve {len(csv_files) - 3} dosya daha")
     else:
-        st.sidebar.info("📄 Henüz CSV dosyası yok")
\ No newline at end of file
+        st.sidebar.info("📄 Henüz CSV dosyası yok")
+
+def _list_csv_files(csv_dir):
+    """List CSV files, re-reading the directory only after it changed"""
+    mtime = os.stat(csv_dir).st_mtime_ns
+    cached = _listing_cache.get(csv_dir)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, sorted(f for f in os.listdir(csv_dir) if f.endswith('.csv')))
+        _listing_cache[csv_dir] = cached
+    return cached[1]
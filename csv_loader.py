@@ -0,0 +1,284 @@
+"""
+Shared CSV loading for all pages.
+
+The encoding, delimiter and quote character of a file are detected once
+from a small sample (sniff_csv) and the file is then streamed in chunks with
+that dialect, instead of re-reading it with every separator/encoding guess.
+
+Streamlit reruns the whole script on every widget interaction, so the pages
+load CSV files through a process-wide cache keyed on (path, mtime, size).
+A file is parsed again only after it changes on disk, and the cache is kept
+within a memory budget by evicting the least recently used frames.
+"""
+
+import codecs
+import csv
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+# Upper bound for the in-memory size of all cached DataFrames
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+# Bytes inspected to detect the dialect, and rows parsed per chunk
+SAMPLE_BYTES = 64 * 1024
+CHUNK_ROWS = 50_000
+
+# Tried in order; cp1254 is the Windows Turkish code page Excel uses
+_ENCODINGS = ("utf-8", "cp1254", "latin-1")
+_DELIMITERS = (",", ";", "\t", "|")
+
+# Columns kept as text: phone numbers lose leading zeros and Maps review
+# counts like "13.055" (Turkish thousands separator) turn into floats
+_TEXT_COLUMNS = {'phone': str, 'rating': str, 'num_reviews': str}
+
+_cache: "OrderedDict[Tuple[str, int, int], Tuple[pd.DataFrame, int]]" = OrderedDict()
+_cache_bytes = 0
+_lock = threading.Lock()
+
+
+class CsvDialect(NamedTuple):
+    """Detected properties of a CSV file."""
+
+    encoding: str
+    delimiter: str
+    quotechar: str
+
+
+def _detect_encoding(sample: bytes) -> str:
+    """Return the first encoding that decodes the sample."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for encoding in _ENCODINGS:
+        try:
+            # Incremental decode tolerates a multi-byte character cut off at the end
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "latin-1"
+
+
+def _detect_delimiter(text: str) -> str:
+    """Pick the delimiter that splits the sample into the most consistent columns."""
+    best, best_score = ",", (0.0, 0)
+    for delimiter in _DELIMITERS:
+        rows = [row for row in csv.reader(io.StringIO(text), delimiter=delimiter) if row]
+        if not rows or len(rows[0]) < 2:
+            continue
+        width = len(rows[0])
+        consistency = sum(len(row) == width for row in rows) / len(rows)
+        score = (consistency, width)
+        if score > best_score:
+            best, best_score = delimiter, score
+    return best
+
+
+def sniff_csv(sample: bytes, complete: bool = False) -> CsvDialect:
+    """
+    Detect encoding, delimiter and quote character from the start of a file.
+
+    Args:
+        sample: First bytes of the file
+        complete: Whether the sample is the whole file (otherwise the last,
+            possibly truncated, line is ignored)
+
+    Returns:
+        The detected CsvDialect
+    """
+    encoding = _detect_encoding(sample)
+    text = codecs.getincrementaldecoder(encoding)(errors="replace").decode(sample, final=complete)
+    if not complete and "\n" in text:
+        text = text[:text.rindex("\n")]
+
+    delimiter = _detect_delimiter(text)
+    quotechar = '"'
+    try:
+        sniffed = csv.Sniffer().sniff(text, delimiters=delimiter)
+        if sniffed.quotechar in ('"', "'"):
+            quotechar = sniffed.quotechar
+    except csv.Error:
+        pass
+    return CsvDialect(encoding, delimiter, quotechar)
+
+
+def _sniff_source(source) -> CsvDialect:
+    """Sniff a path or a seekable binary file object, leaving it rewound."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            sample = f.read(SAMPLE_BYTES + 1)
+    else:
+        source.seek(0)
+        sample = source.read(SAMPLE_BYTES + 1)
+        source.seek(0)
+    complete = len(sample) <= SAMPLE_BYTES
+    return sniff_csv(sample[:SAMPLE_BYTES], complete=complete)
+
+
+def _next_encoding(encoding: str) -> Optional[str]:
+    """Return the encoding to retry with after a decode error, or None."""
+    position = _ENCODINGS.index("utf-8" if encoding == "utf-8-sig" else encoding)
+    return _ENCODINGS[position + 1] if position + 1 < len(_ENCODINGS) else None
+
+
+def _read_chunks(source, dialect: CsvDialect, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Stream a CSV file with a fixed dialect."""
+    if not isinstance(source, (str, os.PathLike)):
+        source.seek(0)
+    reader = pd.read_csv(
+        source,
+        dtype=_TEXT_COLUMNS,
+        encoding=dialect.encoding,
+        sep=dialect.delimiter,
+        quotechar=dialect.quotechar,
+        chunksize=chunksize,
+    )
+    with reader:
+        yield from reader
+
+
+def iter_csv_chunks(source, dialect: Optional[CsvDialect] = None,
+                    chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV file as DataFrame chunks using its detected dialect.
+
+    The encoding is detected from the first bytes only; if a later part of
+    the file does not decode, the file is read again with the next encoding
+    and the rows already yielded are skipped.
+
+    Args:
+        source: File path or seekable binary file object (e.g. an upload)
+        dialect: Previously detected dialect (sniffed if omitted)
+        chunksize: Rows per chunk
+
+    Yields:
+        DataFrames of at most chunksize rows
+    """
+    if dialect is None:
+        dialect = _sniff_source(source)
+    yielded = 0
+    while True:
+        skip = yielded
+        try:
+            for chunk in _read_chunks(source, dialect, chunksize):
+                if skip >= len(chunk):
+                    skip -= len(chunk)
+                    continue
+                chunk = chunk.iloc[skip:]
+                skip = 0
+                yielded += len(chunk)
+                yield chunk
+            return
+        except UnicodeDecodeError:
+            encoding = _next_encoding(dialect.encoding)
+            if encoding is None:
+                raise
+            dialect = dialect._replace(encoding=encoding)
+
+
+def read_csv(source, max_rows: Optional[int] = None,
+             chunksize: int = CHUNK_ROWS) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Read a CSV file in a single detection pass and chunked parsing.
+
+    A file that stops decoding after the sampled start is read again from
+    the beginning with the next encoding.
+
+    Args:
+        source: File path or seekable binary file object
+        max_rows: Stop after this many rows to bound memory
+        chunksize: Rows per parsed chunk
+
+    Returns:
+        Tuple of (DataFrame, report) where report holds the detected
+        encoding, delimiter and quotechar, the row count and whether the
+        file was truncated at max_rows
+    """
+    dialect = _sniff_source(source)
+    while True:
+        chunks = []
+        rows = 0
+        truncated = False
+        try:
+            for chunk in _read_chunks(source, dialect, chunksize):
+                if max_rows is not None and rows + len(chunk) > max_rows:
+                    chunks.append(chunk.iloc[:max_rows - rows])
+                    rows = max_rows
+                    truncated = True
+                    break
+                chunks.append(chunk)
+                rows += len(chunk)
+            break
+        except UnicodeDecodeError:
+            encoding = _next_encoding(dialect.encoding)
+            if encoding is None:
+                raise
+            dialect = dialect._replace(encoding=encoding)
+
+    df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+    report = {**dialect._asdict(), "rows": rows, "truncated": truncated}
+    return df, report
+
+
+
+def load_csv(file_path: str) -> pd.DataFrame:
+    """
+    Load a CSV file through the shared cache.
+
+    The returned DataFrame is shared between pages and reruns; callers must
+    treat it as read-only (use df.copy() or df.assign() before modifying).
+    Its cache key (path, mtime_ns, size) is kept in df.attrs["signature"],
+    so callers can key their own derived caches on the same version.
+
+    Args:
+        file_path: Path of the CSV file
+
+    Returns:
+        Parsed DataFrame
+    """
+    global _cache_bytes
+
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+            return entry[0]
+
+    df, _ = read_csv(path)
+    df.attrs["signature"] = key
+    nbytes = int(df.memory_usage(deep=True).sum())
+
+    with _lock:
+        # Drop stale versions of the same file
+        for stale_key in [k for k in _cache if k[0] == path and k != key]:
+            _cache_bytes -= _cache.pop(stale_key)[1]
+
+        if nbytes <= MAX_CACHE_BYTES and key not in _cache:
+            _cache[key] = (df, nbytes)
+            _cache_bytes += nbytes
+            while _cache_bytes > MAX_CACHE_BYTES:
+                _, (_, evicted_bytes) = _cache.popitem(last=False)
+                _cache_bytes -= evicted_bytes
+    return df
+
+
+def clear_cache() -> None:
+    """Drop every cached DataFrame."""
+    global _cache_bytes
+    with _lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+def cache_info() -> Dict[str, int]:
+    """Return the number of cached files and their total size in bytes."""
+    with _lock:
+        return {"entries": len(_cache), "bytes": _cache_bytes, "max_bytes": MAX_CACHE_BYTES}
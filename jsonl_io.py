@@ -0,0 +1,130 @@
+"""
+Newline-delimited JSON (JSONL) storage for scraped businesses.
+
+Records are written one line at a time as they are produced, so records
+with extra or missing fields never break the file and nothing has to be
+held in memory. The readers are generators and work in constant memory
+regardless of file size.
+"""
+
+import json
+import logging
+import threading
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JsonlWriter:
+    """Thread-safe, append-only JSONL writer usable as a per-record sink."""
+
+    def __init__(self, filename: str, append: bool = False):
+        """
+        Open the output file.
+
+        Args:
+            filename: Path of the JSONL file
+            append: Append to an existing file instead of truncating it
+        """
+        self.filename = filename
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = open(filename, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, record: Dict) -> None:
+        """Write a single record (a dict or any mapping) and flush it to disk."""
+        if not isinstance(record, dict):
+            record = dict(record)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.count += 1
+
+    __call__ = write
+
+    def close(self) -> None:
+        """Close the output file."""
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def write_jsonl(records: Iterable[Dict], filename: str, append: bool = False) -> int:
+    """
+    Stream records to a JSONL file.
+
+    Args:
+        records: Any iterable of dictionaries (lists, generators...)
+        filename: Path of the JSONL file
+        append: Append instead of overwriting
+
+    Returns:
+        Number of records written
+    """
+    with JsonlWriter(filename, append=append) as writer:
+        for record in records:
+            writer.write(record)
+        return writer.count
+
+
+def iter_jsonl(filename: str) -> Iterator[Dict]:
+    """
+    Yield records from a JSONL file one at a time.
+
+    Blank lines are skipped; malformed lines (e.g. a line cut off by a crash)
+    are logged and skipped.
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed JSONL line {line_number} in {filename}")
+                continue
+            if isinstance(record, dict):
+                yield record
+
+
+def iter_jsonl_batches(filename: str, batch_size: int = 50_000) -> Iterator[List[Dict]]:
+    """Yield lists of at most batch_size records from a JSONL file."""
+    records = iter_jsonl(filename)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def read_jsonl_page(filename: str, start: int, stop: int,
+                    predicate: Optional[callable] = None) -> List[Dict]:
+    """
+    Return records start..stop (after optional filtering) without loading the file.
+
+    Args:
+        filename: Path of the JSONL file
+        start: Index of the first record to return
+        stop: Index after the last record to return
+        predicate: Optional function selecting which records count
+    """
+    records = iter_jsonl(filename)
+    if predicate is not None:
+        records = filter(predicate, records)
+    return list(islice(records, start, stop))
+
+
+def count_jsonl(filename: str, predicate: Optional[callable] = None) -> int:
+    """Count the (optionally filtered) records of a JSONL file in one streaming pass."""
+    records = iter_jsonl(filename)
+    if predicate is not None:
+        records = filter(predicate, records)
+    return sum(1 for _ in records)
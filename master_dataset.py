@@ -0,0 +1,523 @@
+"""
+Deduplicated master dataset built from every file in csv_files.
+
+Each scraped or uploaded CSV (or streamed JSONL) file is merged into a local SQLite database keyed on
+the business' canonical mobile number (or, without one, its normalized name
+and address). The database remembers the mtime and size of every merged
+file, so a refresh only re-reads files that were added or changed and drops
+the contributions of deleted files. Phone and name indexes are persisted
+with the data, so merges never rescan the whole dataset.
+
+Name, address and category are also indexed in an SQLite FTS5 table kept in
+sync by triggers, and rating and review count are stored as numbers with
+their own indexes, so search() answers faceted full-text queries over all
+scraped businesses without loading them into memory.
+
+Businesses with coordinates are also kept in a SpatialIndex, built on first
+use and cached until the data changes, for radius queries (nearby()) and
+for finding the same place stored twice under different numbers or
+address spellings (near_duplicates()).
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from business_record import (
+    FIELDS, BusinessRecord, parse_coordinate, parse_rating, parse_review_count, records_to_dataframe
+)
+from csv_loader import CHUNK_ROWS, iter_csv_chunks
+from jsonl_io import iter_jsonl_batches
+
+logger = logging.getLogger(__name__)
+from spatial_index import SpatialIndex
+from wp_message_sender import normalize_turkish_mobiles
+
+SOURCE_EXTENSIONS = (".csv", ".jsonl")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    file TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    merged_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS businesses (
+    id INTEGER PRIMARY KEY,
+    dedup_key TEXT NOT NULL UNIQUE,
+    name_key TEXT NOT NULL,
+    address_key TEXT NOT NULL,
+    phone_e164 TEXT,
+    name TEXT, country TEXT, address TEXT, phone TEXT, website TEXT,
+    category TEXT, rating TEXT, num_reviews TEXT,
+    rating_value REAL, reviews_value INTEGER,
+    latitude REAL, longitude REAL,
+    source_csv TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_businesses_phone ON businesses (phone_e164);
+CREATE INDEX IF NOT EXISTS idx_businesses_name ON businesses (name_key, address_key);
+CREATE TABLE IF NOT EXISTS business_sources (
+    business_id INTEGER NOT NULL,
+    file TEXT NOT NULL,
+    PRIMARY KEY (business_id, file)
+);
+CREATE INDEX IF NOT EXISTS idx_business_sources_file ON business_sources (file);
+"""
+
+_FACET_SCHEMA = """
+CREATE INDEX IF NOT EXISTS idx_businesses_rating ON businesses (rating_value);
+CREATE INDEX IF NOT EXISTS idx_businesses_reviews ON businesses (reviews_value);
+"""
+
+# External-content FTS5 index over businesses, maintained by triggers
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS businesses_fts USING fts5(
+    name, address, category,
+    content='businesses', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS businesses_fts_insert AFTER INSERT ON businesses BEGIN
+    INSERT INTO businesses_fts (rowid, name, address, category)
+    VALUES (new.id, new.name, new.address, new.category);
+END;
+CREATE TRIGGER IF NOT EXISTS businesses_fts_delete AFTER DELETE ON businesses BEGIN
+    INSERT INTO businesses_fts (businesses_fts, rowid, name, address, category)
+    VALUES ('delete', old.id, old.name, old.address, old.category);
+END;
+CREATE TRIGGER IF NOT EXISTS businesses_fts_update AFTER UPDATE OF name, address, category ON businesses BEGIN
+    INSERT INTO businesses_fts (businesses_fts, rowid, name, address, category)
+    VALUES ('delete', old.id, old.name, old.address, old.category);
+    INSERT INTO businesses_fts (rowid, name, address, category)
+    VALUES (new.id, new.name, new.address, new.category);
+END;
+"""
+
+_TOKEN_RE = re.compile(r"\w+")
+
+_SPACE_RE = re.compile(r"\s+")
+
+# Loaded DataFrames keyed on (database path, generation)
+_frame_cache: Dict[tuple, pd.DataFrame] = {}
+_frame_lock = threading.Lock()
+
+# Spatial indexes keyed on (database path, generation, cell size)
+_spatial_cache: Dict[tuple, SpatialIndex] = {}
+
+# Signatures of files that could not be read, keyed on (database path, file name)
+_failed_sources: Dict[tuple, tuple] = {}
+
+
+def default_db_path() -> str:
+    """Return the master dataset database path in the working directory."""
+    return os.path.join(os.getcwd(), "master_dataset.db")
+
+
+def _iter_source_chunks(path: str):
+    """Yield DataFrame chunks of a CSV or JSONL source file."""
+    if path.endswith(".jsonl"):
+        for batch in iter_jsonl_batches(path, CHUNK_ROWS):
+            yield pd.DataFrame(batch, dtype=object)
+    else:
+        yield from iter_csv_chunks(path)
+
+
+def _text_key(value) -> str:
+    """Case- and whitespace-insensitive matching key for names and addresses."""
+    if value is None or value != value:
+        return ""
+    return _SPACE_RE.sub(" ", str(value)).strip().casefold()
+
+
+def _clean(value) -> str:
+    if value is None or value != value:
+        return ""
+    return str(value).strip()
+
+
+class MasterDataset:
+    """Incrementally maintained, deduplicated dataset of all CSV files."""
+
+    def __init__(self, csv_dir: Optional[str] = None, db_path: Optional[str] = None):
+        """
+        Open (and create if needed) the master dataset database.
+
+        Args:
+            csv_dir: Directory of source CSV files, defaults to ./csv_files
+            db_path: Database file path, defaults to master_dataset.db
+        """
+        self.csv_dir = csv_dir or os.path.join(os.getcwd(), "csv_files")
+        self.db_path = db_path or default_db_path()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self._migrate()
+        self.conn.executescript(_FACET_SCHEMA)
+        self.has_fts = self._create_fts()
+
+    def _migrate(self) -> None:
+        """Add columns introduced after the database was created."""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(businesses)")}
+        if "rating_value" not in columns:
+            with self.conn:
+                self.conn.execute("ALTER TABLE businesses ADD COLUMN rating_value REAL")
+                self.conn.execute("ALTER TABLE businesses ADD COLUMN reviews_value INTEGER")
+                # Re-merge every file on the next refresh to fill the new columns
+                self.conn.execute("DELETE FROM sources")
+        if "latitude" not in columns:
+            with self.conn:
+                self.conn.execute("ALTER TABLE businesses ADD COLUMN latitude REAL")
+                self.conn.execute("ALTER TABLE businesses ADD COLUMN longitude REAL")
+                self.conn.execute("DELETE FROM sources")
+
+    def _create_fts(self) -> bool:
+        """Create the full-text index; returns False if SQLite lacks FTS5."""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'businesses_fts'"
+        ).fetchone()
+        try:
+            self.conn.executescript(_FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            return False
+        if not exists:
+            with self.conn:
+                self.conn.execute("INSERT INTO businesses_fts (businesses_fts) VALUES ('rebuild')")
+        return True
+
+    @property
+    def generation(self) -> int:
+        """Counter incremented every time the merged data changes."""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Merge new and changed CSV files and drop deleted ones.
+
+        Returns:
+            Counts of processed, unchanged, removed and unreadable files,
+            merged rows and total businesses
+        """
+        stats = {"processed": 0, "unchanged": 0, "removed": 0, "failed": 0, "rows": 0}
+        known = {
+            row[0]: (row[1], row[2])
+            for row in self.conn.execute("SELECT file, mtime_ns, size FROM sources")
+        }
+
+        current = {}
+        if os.path.isdir(self.csv_dir):
+            for filename in os.listdir(self.csv_dir):
+                if filename.endswith(SOURCE_EXTENSIONS):
+                    stat = os.stat(os.path.join(self.csv_dir, filename))
+                    current[filename] = (stat.st_mtime_ns, stat.st_size)
+
+        with self.conn:
+            for filename in known.keys() - current.keys():
+                self._remove_source(filename)
+                stats["removed"] += 1
+
+            for filename, signature in sorted(current.items()):
+                if known.get(filename) == signature:
+                    stats["unchanged"] += 1
+                    continue
+                failed_key = (os.path.abspath(self.db_path), filename)
+                if _failed_sources.get(failed_key) == signature:
+                    stats["failed"] += 1
+                    continue
+                # A file that cannot be parsed gets no sources row and is
+                # skipped until it changes on disk
+                self.conn.execute("SAVEPOINT merge_file")
+                try:
+                    stats["rows"] += self._merge_file(filename, signature)
+                    stats["processed"] += 1
+                    _failed_sources.pop(failed_key, None)
+                except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError, OSError) as e:
+                    self.conn.execute("ROLLBACK TO merge_file")
+                    logger.warning(f"Skipping unreadable file {filename}: {e}")
+                    _failed_sources[failed_key] = signature
+                    stats["failed"] += 1
+                    if filename in known:
+                        # Its earlier contributions no longer match the file on disk
+                        self._remove_source(filename)
+                        stats["removed"] += 1
+                finally:
+                    self.conn.execute("RELEASE merge_file")
+
+            if stats["processed"] or stats["removed"]:
+                # Businesses no longer present in any file
+                self.conn.execute(
+                    "DELETE FROM businesses WHERE id NOT IN (SELECT business_id FROM business_sources)"
+                )
+                self.conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('generation', 1) "
+                    "ON CONFLICT (key) DO UPDATE SET value = value + 1"
+                )
+
+        stats["businesses"] = self.conn.execute("SELECT COUNT(*) FROM businesses").fetchone()[0]
+        return stats
+
+    def _remove_source(self, filename: str) -> None:
+        self.conn.execute("DELETE FROM business_sources WHERE file = ?", (filename,))
+        self.conn.execute("DELETE FROM sources WHERE file = ?", (filename,))
+
+    def _merge_file(self, filename: str, signature: tuple) -> int:
+        """Replace the contributions of one file; returns the number of rows read."""
+        self._remove_source(filename)
+        rows = 0
+        now = datetime.now().isoformat()
+
+        for chunk in _iter_source_chunks(os.path.join(self.csv_dir, filename)):
+            chunk.columns = [str(col).strip() for col in chunk.columns]
+            if "phone" in chunk.columns:
+                canonical = normalize_turkish_mobiles(chunk["phone"])
+            else:
+                canonical = pd.Series(None, index=chunk.index, dtype=object)
+
+            for record, phone_e164 in zip(chunk.to_dict("records"), canonical):
+                rows += 1
+                values = {field: _clean(record.get(field)) for field in FIELDS}
+                name_key = _text_key(values["name"])
+                address_key = _text_key(values["address"])
+                phone_e164 = phone_e164 if isinstance(phone_e164, str) else None
+                if not name_key and not phone_e164:
+                    continue
+                if phone_e164:
+                    values["phone"] = phone_e164
+                coordinates = (parse_coordinate(record.get("latitude")), parse_coordinate(record.get("longitude")))
+                business_id = self._upsert_business(
+                    values, name_key, address_key, phone_e164, coordinates, filename, now
+                )
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO business_sources (business_id, file) VALUES (?, ?)",
+                    (business_id, filename),
+                )
+
+        self.conn.execute(
+            "INSERT INTO sources (file, mtime_ns, size, rows, merged_at) VALUES (?, ?, ?, ?, ?)",
+            (filename, signature[0], signature[1], rows, now),
+        )
+        return rows
+
+    def _upsert_business(self, values: Dict[str, str], name_key: str, address_key: str,
+                         phone_e164: Optional[str], coordinates: Tuple[Optional[float], Optional[float]],
+                         filename: str, now: str) -> int:
+        """Insert a business or fill in an existing one; returns its id."""
+        if phone_e164:
+            dedup_key = f"tel:{phone_e164}"
+        else:
+            # Without a mobile number, reuse any business with the same name and address
+            existing = self.conn.execute(
+                "SELECT dedup_key FROM businesses WHERE name_key = ? AND address_key = ? LIMIT 1",
+                (name_key, address_key),
+            ).fetchone()
+            dedup_key = existing[0] if existing else f"name:{name_key}|{address_key}"
+
+        columns = ", ".join(FIELDS)
+        placeholders = ", ".join("?" for _ in FIELDS)
+        # Newer non-empty values win, empty values never overwrite known ones
+        updates = ", ".join(f"{f} = COALESCE(NULLIF(excluded.{f}, ''), businesses.{f})" for f in FIELDS)
+        self.conn.execute(
+            f"INSERT INTO businesses (dedup_key, name_key, address_key, phone_e164, {columns}, "
+            f"rating_value, reviews_value, latitude, longitude, source_csv, updated_at) "
+            f"VALUES (?, ?, ?, ?, {placeholders}, ?, ?, ?, ?, ?, ?) "
+            f"ON CONFLICT (dedup_key) DO UPDATE SET {updates}, "
+            f"rating_value = COALESCE(excluded.rating_value, businesses.rating_value), "
+            f"reviews_value = COALESCE(excluded.reviews_value, businesses.reviews_value), "
+            f"latitude = COALESCE(excluded.latitude, businesses.latitude), "
+            f"longitude = COALESCE(excluded.longitude, businesses.longitude), "
+            f"updated_at = excluded.updated_at",
+            (dedup_key, name_key, address_key, phone_e164, *[values[f] for f in FIELDS],
+             parse_rating(values["rating"]), parse_review_count(values["num_reviews"]), *coordinates, filename, now),
+        )
+        return self.conn.execute(
+            "SELECT id FROM businesses WHERE dedup_key = ?", (dedup_key,)
+        ).fetchone()[0]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Load the merged businesses, cached until the next change.
+
+        The returned DataFrame is shared; treat it as read-only. Its cache
+        key (database path, generation) is kept in df.attrs["signature"].
+        """
+        key = (os.path.abspath(self.db_path), self.generation)
+        with _frame_lock:
+            if key in _frame_cache:
+                return _frame_cache[key]
+
+        df = pd.read_sql_query(
+            f"SELECT {', '.join('b.' + f for f in FIELDS)}, b.latitude, b.longitude, b.source_csv, "
+            "(SELECT group_concat(file, ' | ') FROM business_sources s WHERE s.business_id = b.id) AS sources "
+            "FROM businesses b ORDER BY b.id",
+            self.conn,
+        )
+        df.attrs["signature"] = key
+        with _frame_lock:
+            _frame_cache.clear()
+            _frame_cache[key] = df
+        return df
+
+    def _search_filter(self, text: str, min_rating: Optional[float], min_reviews: Optional[int],
+                       mobile_only: bool) -> Tuple[str, list]:
+        """Return the WHERE clause and parameters of a search."""
+        conditions = []
+        params = []
+        tokens = _TOKEN_RE.findall(text or "")
+        if tokens:
+            if self.has_fts:
+                conditions.append("b.id IN (SELECT rowid FROM businesses_fts WHERE businesses_fts MATCH ?)")
+                params.append(" ".join(f'"{token}"*' for token in tokens))
+            else:
+                for token in tokens:
+                    conditions.append("(b.name_key || ' ' || b.address_key || ' ' || lower(b.category)) LIKE ?")
+                    params.append(f"%{token.casefold()}%")
+        if min_rating is not None:
+            conditions.append("b.rating_value >= ?")
+            params.append(min_rating)
+        if min_reviews:
+            conditions.append("b.reviews_value >= ?")
+            params.append(min_reviews)
+        if mobile_only:
+            conditions.append("b.phone_e164 IS NOT NULL")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, params
+
+    def search(self, text: str = "", min_rating: Optional[float] = None,
+               min_reviews: Optional[int] = None, mobile_only: bool = False,
+               limit: int = 50, offset: int = 0) -> Tuple[pd.DataFrame, int]:
+        """
+        Full-text and faceted search over all merged businesses.
+
+        Args:
+            text: Words to find in name, address or category (prefix match,
+                accent-insensitive, e.g. "kuafor mugla")
+            min_rating: Minimum rating
+            min_reviews: Minimum number of reviews
+            mobile_only: Only businesses with a Turkish mobile number
+            limit: Page size
+            offset: Rows to skip
+
+        Returns:
+            Tuple of (page of results, total number of matches)
+        """
+        where, params = self._search_filter(text, min_rating, min_reviews, mobile_only)
+        total = self.conn.execute(f"SELECT COUNT(*) FROM businesses b {where}", params).fetchone()[0]
+        page = pd.read_sql_query(
+            f"SELECT {', '.join('b.' + f for f in FIELDS)}, b.latitude, b.longitude, b.source_csv "
+            f"FROM businesses b {where} "
+            "ORDER BY b.rating_value IS NULL, b.rating_value DESC, b.reviews_value DESC LIMIT ? OFFSET ?",
+            self.conn,
+            params=[*params, limit, offset],
+        )
+        return page, total
+
+    def iter_businesses(self, text: str = "", min_rating: Optional[float] = None,
+                        min_reviews: Optional[int] = None,
+                        mobile_only: bool = False) -> Tuple[List[str], int, Iterator[tuple]]:
+        """
+        Stream all businesses matching a search, one row at a time.
+
+        Takes the same filters (and order) as search(); rows are read from
+        an SQLite cursor, so memory use does not grow with the number of
+        matches. The connection must stay open until the rows are consumed.
+
+        Returns:
+            Tuple of (column names, number of matches, row iterator)
+        """
+        where, params = self._search_filter(text, min_rating, min_reviews, mobile_only)
+        total = self.conn.execute(f"SELECT COUNT(*) FROM businesses b {where}", params).fetchone()[0]
+        cursor = self.conn.execute(
+            f"SELECT {', '.join('b.' + f for f in FIELDS)}, b.latitude, b.longitude, b.source_csv, "
+            "(SELECT group_concat(file, ' | ') FROM business_sources s WHERE s.business_id = b.id) AS sources "
+            f"FROM businesses b {where} "
+            "ORDER BY b.rating_value IS NULL, b.rating_value DESC, b.reviews_value DESC",
+            params,
+        )
+        columns = [description[0] for description in cursor.description]
+        return columns, total, cursor
+
+    def spatial_index(self, cell_km: float = 1.0) -> SpatialIndex:
+        """
+        Return a spatial index of the businesses with coordinates, cached
+        until the next change.
+
+        The indexed items are BusinessRecords (with 'id' as an extra field);
+        treat them as read-only.
+        """
+        key = (os.path.abspath(self.db_path), self.generation, cell_km)
+        with _frame_lock:
+            if key in _spatial_cache:
+                return _spatial_cache[key]
+
+        index = SpatialIndex(cell_km)
+        rows = self.conn.execute(
+            f"SELECT id, {', '.join(FIELDS)}, latitude, longitude, source_csv FROM businesses "
+            "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+        )
+        for business_id, *values, latitude, longitude, source_csv in rows:
+            record = BusinessRecord(*values, latitude=latitude, longitude=longitude,
+                                    source_csv=source_csv, id=business_id)
+            index.add(latitude, longitude, record)
+        with _frame_lock:
+            _spatial_cache.clear()
+            _spatial_cache[key] = index
+        return index
+
+    def nearby(self, latitude: float, longitude: float, radius_km: float, text: str = "",
+               limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Businesses within radius_km of a point, nearest first.
+
+        Args:
+            latitude: Latitude of the centre
+            longitude: Longitude of the centre
+            radius_km: Search radius in kilometres
+            text: Words that must all appear in name or category
+                (case-insensitive, e.g. "kafe")
+            limit: Maximum number of results
+
+        Returns:
+            DataFrame of the businesses with a 'distance_km' column
+        """
+        tokens = [token.casefold() for token in _TOKEN_RE.findall(text or "")]
+
+        def matches(record: BusinessRecord) -> bool:
+            haystack = f"{record.name} {record.category}".casefold()
+            return all(token in haystack for token in tokens)
+
+        found = self.spatial_index().within(latitude, longitude, radius_km, matches if tokens else None)
+        if limit is not None:
+            found = found[:limit]
+        df = records_to_dataframe(record for _, record in found)
+        df.insert(0, "distance_km", [round(distance, 3) for distance, _ in found])
+        return df.drop(columns="id", errors="ignore")
+
+    def near_duplicates(self, max_m: float = 30.0) -> List[Tuple[BusinessRecord, BusinessRecord, float]]:
+        """
+        Pairs of stored businesses with the same name within max_m metres.
+
+        These are the same place merged twice, e.g. found by overlapping
+        queries once with and once without a mobile number, or with the
+        address spelled differently.
+
+        Returns:
+            (first, second, distance_m) tuples
+        """
+        return self.spatial_index().near_duplicates(
+            max_m, same=lambda a, b: _text_key(a.name) == _text_key(b.name)
+        )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
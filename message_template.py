@@ -0,0 +1,110 @@
+"""
+Per-contact message templates for WhatsApp campaigns.
+
+A template such as "Merhaba {name}, {category} işletmeniz için..." is compiled
+once into a plain format string and then rendered for every recipient of a
+campaign in a single pass over the valid_phones records.
+"""
+
+from string import Formatter
+from typing import Dict, List, Sequence
+
+from wp_message_sender import message_hash
+
+# Record fields that can be used as placeholders in a message
+PLACEHOLDERS = ("name", "category", "address", "phone")
+
+
+def _clean_value(value) -> str:
+    """Convert a record value to display text (None/NaN become empty)."""
+    if value is None or value != value:
+        return ""
+    return str(value).strip()
+
+
+class MessageTemplate:
+    """A message compiled once and rendered for many contacts."""
+
+    __slots__ = ("text", "fields", "_format")
+
+    def __init__(self, text: str):
+        """
+        Compile the template text.
+
+        Args:
+            text: Message text with optional {name}, {category}, {address}
+                and {phone} placeholders. Unknown or malformed braces are
+                kept literally so ordinary messages are never altered.
+        """
+        self.text = text
+        fields: List[str] = []
+        parts: List[str] = []
+        try:
+            parsed = list(Formatter().parse(text))
+        except ValueError:
+            parsed = [(text, None, None, None)]
+
+        for literal, field, spec, conversion in parsed:
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is None:
+                continue
+            if field in PLACEHOLDERS and not spec and not conversion:
+                parts.append("{}")
+                fields.append(field)
+            else:
+                # Re-emit the original placeholder text as a literal
+                original = "{" + field
+                if conversion:
+                    original += "!" + conversion
+                if spec:
+                    original += ":" + spec
+                original += "}"
+                parts.append(original.replace("{", "{{").replace("}", "}}"))
+
+        self.fields = tuple(fields)
+        self._format = "".join(parts)
+
+    @property
+    def is_personalized(self) -> bool:
+        """Whether the rendered message differs per contact."""
+        return bool(self.fields)
+
+    def render(self, record: Dict) -> str:
+        """Render the message for a single contact record."""
+        if not self.fields:
+            return self._format.format()
+        return self._format.format(*[_clean_value(record.get(f)) for f in self.fields])
+
+    def render_batch(self, records: Sequence[Dict]) -> List[str]:
+        """
+        Render the message for every contact in one pass.
+
+        Args:
+            records: valid_phones records of the campaign
+
+        Returns:
+            Rendered messages in the same order as the records
+        """
+        if not self.fields:
+            message = self._format.format()
+            return [message] * len(records)
+        fmt = self._format.format
+        fields = self.fields
+        return [fmt(*[_clean_value(record.get(f)) for f in fields]) for record in records]
+
+
+def render_campaign(text: str, records: Sequence[Dict]) -> List[tuple]:
+    """
+    Render a campaign message for all recipients with their dedup hashes.
+
+    Args:
+        text: Template text
+        records: valid_phones records of the recipients
+
+    Returns:
+        List of (message, message_hash) tuples in record order. Each distinct
+        message is hashed only once.
+    """
+    messages = MessageTemplate(text).render_batch(records)
+    hashes = {message: message_hash(message) for message in set(messages)}
+    return [(message, hashes[message]) for message in messages]
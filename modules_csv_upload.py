@@ -1,7 +1,13 @@
 import streamlit as st
 import pandas as pd
 import os
-from wp_message_sender import is_valid_turkish_mobile
+from business_record import BusinessRecord
+from csv_loader import read_csv
+from master_dataset import MasterDataset
+from wp_message_sender import normalize_turkish_mobiles
+
+# Rows read from a single upload at most, to bound memory use
+MAX_UPLOAD_ROWS = 200_000
 
 def show_csv_upload():
     """CSV upload page"""
@@ -18,7 +24,7 @@ def show_csv_upload():
         st.markdown("""
         **Gerekli Sütunlar:**
         - `name` - İşletme/Kişi adı
-        - `phone` - Telefon numarası (05XXXXXXXXX formatında)
+        - `phone` - Telefon numarası (05XX XXX XX XX, +90 5XX..., (05XX) ... gibi)
         
         **İsteğe Bağlı Sütunlar:**
         - `address` - Adres bilgisi
@@ -43,30 +49,12 @@ def show_csv_upload():
         
         if uploaded_file is not None:
             try:
-                # Try different encodings for CSV reading
-                encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-                df = None
-                
-                for encoding in encodings:
-                    try:
-                        uploaded_file.seek(0)  # Reset file pointer
-                        # Try different separators (comma and semicolon)
-                        try:
-                            df = pd.read_csv(uploaded_file, dtype={'phone': str}, encoding=encoding, sep=',')
-                            # Check if we got proper columns
-                            if len(df.columns) == 1 and ';' in df.columns[0]:
-                                uploaded_file.seek(0)
-                                df = pd.read_csv(uploaded_file, dtype={'phone': str}, encoding=encoding, sep=';')
-                        except:
-                            uploaded_file.seek(0)
-                            df = pd.read_csv(uploaded_file, dtype={'phone': str}, encoding=encoding, sep=';')
-                        break
-                    except UnicodeDecodeError:
-                        continue
-                
-                if df is None:
-                    st.error("❌ Dosya kodlaması okunamadı. Lütfen dosyayı UTF-8 olarak kaydedin.")
-                    return
+                # Detect encoding, delimiter and quoting once, then read in chunks
+                df, report = read_csv(uploaded_file, max_rows=MAX_UPLOAD_ROWS)
+                delimiter_name = {',': 'virgül', ';': 'noktalı virgül', '\t': 'sekme', '|': 'dikey çizgi'}[report['delimiter']]
+                st.caption(f"🔎 Algılanan format: {report['encoding']} kodlaması, {delimiter_name} ayırıcı, {report['quotechar']} tırnak")
+                if report['truncated']:
+                    st.warning(f"⚠️ Dosya çok büyük, yalnızca ilk {MAX_UPLOAD_ROWS:,} kayıt okundu.")
                 
                 # Clean column names (remove quotes and whitespace)
                 df.columns = df.columns.str.strip().str.replace('"', '').str.replace("'", '')
@@ -146,24 +134,23 @@ def show_csv_upload():
         """)
 
 def _get_valid_phones(df):
-    """Extract valid phone numbers from dataframe"""
-    valid_phones = []
-    seen_phones = set()
+    """Extract valid phone numbers from dataframe, deduplicated on the canonical number"""
+    if "phone" not in df.columns:
+        return []
     
-    if "phone" in df.columns:
-        for idx, row in df.iterrows():
-            phone = str(row["phone"]).replace(" ", "").replace("(", "").replace(")", "").replace("-", "")
-            if phone and phone != "nan" and is_valid_turkish_mobile(phone):
-                if phone not in seen_phones:
-                    valid_phones.append({
-                        "name": row.get('name', 'İşletme'), 
-                        "phone": phone, 
-                        "idx": idx,
-                        "address": row.get('address', ''),
-                        "category": row.get('category', '')
-                    })
-                    seen_phones.add(phone)
-    return valid_phones
+    canonical = normalize_turkish_mobiles(df["phone"])
+    valid_df = df.assign(phone=canonical)[canonical.notna()].drop_duplicates(subset="phone")
+    
+    def column(name, default=""):
+        return valid_df[name].tolist() if name in valid_df.columns else [default] * len(valid_df)
+    
+    # Records are built straight from the columns, without a dict per row
+    return [
+        BusinessRecord(name=name, phone=phone, address=address, category=category)
+        for name, phone, address, category in zip(
+            column('name', 'İşletme'), valid_df["phone"].tolist(), column('address'), column('category')
+        )
+    ]
 
 def _show_save_options(df, filename, valid_phones):
     """Show options to save the uploaded CSV"""
@@ -212,6 +199,13 @@ def _save_csv_file(df, filename, valid_phones):
             df_copy['phone'] = df_copy['phone'].astype(str)
         df_copy.to_csv(file_path, index=False, encoding='utf-8', quoting=1)
         
+        # Make the new file searchable right away
+        master = MasterDataset()
+        try:
+            master.refresh()
+        finally:
+            master.close()
+        
         st.success(f"✅ Dosya başarıyla kaydedildi: `{clean_filename}`")
         st.info(f"📁 Konum: `csv_files/{clean_filename}`")
         st.info("💡 Artık 'Mesajlaşma' sekmesinden bu dosyayı seçerek mesaj gönderebilirsiniz!")
@@ -1,48 +1,338 @@
 import streamlit as st
 import pandas as pd
 import os
-from wp_message_sender import is_valid_turkish_mobile
+import re
+from business_record import parse_rating, parse_review_count
+from csv_loader import load_csv
+from jsonl_io import count_jsonl, iter_jsonl, read_jsonl_page, write_jsonl
+from components.paginator import show_paginator
+from master_dataset import MasterDataset
+from spatial_index import parse_coordinates
+from xlsx_export import XLSX_MIME, ExportSource, csv_source, export_xlsx_file, jsonl_source
+from wp_message_sender import normalize_turkish_mobile, normalize_turkish_mobiles
 
 def show_csv_viewer():
     """CSV viewing page"""
+    view_mode = st.radio("Görünüm:", ["📄 Dosya", "🔎 Tüm İşletmelerde Ara", "📍 Yakındaki İşletmeler"],
+                         horizontal=True, key="viewer_mode")
+    if view_mode == "🔎 Tüm İşletmelerde Ara":
+        _show_business_search()
+        return
+    if view_mode == "📍 Yakındaki İşletmeler":
+        _show_nearby_businesses()
+        return
+
     csv_dir = os.path.join(os.getcwd(), "csv_files")
     if not os.path.exists(csv_dir):
         os.makedirs(csv_dir)
-    
-    csv_files = [f for f in os.listdir(csv_dir) if f.endswith('.csv')]
-    
+
+    csv_files = [f for f in os.listdir(csv_dir) if f.endswith(('.csv', '.jsonl'))]
+
     if csv_files:
         selected_csv = st.selectbox("Bir CSV dosyası seçin", csv_files)
-        
-        # Read CSV with proper separator detection
+
+        if selected_csv.endswith('.jsonl'):
+            _show_jsonl_file(os.path.join(csv_dir, selected_csv))
+            return
+
+        # Read CSV through the shared cache (re-parsed only when the file changes)
         file_path = os.path.join(csv_dir, selected_csv)
-        try:
-            df = pd.read_csv(file_path, dtype={'phone': str})
-            # Check if semicolon separated
-            if len(df.columns) == 1 and ';' in df.columns[0]:
-                df = pd.read_csv(file_path, dtype={'phone': str}, sep=';')
-        except:
-            df = pd.read_csv(file_path, dtype={'phone': str}, sep=';')
-        st.dataframe(df)
-        
+        df = load_csv(file_path)
+
+        # Server-side filter and sort; only the current page is sent to the browser
+        col_filter, col_sort, col_order = st.columns([2, 1, 1])
+        with col_filter:
+            search_term = st.text_input("🔎 Filtrele:", placeholder="İsim, adres, kategori...", key="viewer_filter")
+        with col_sort:
+            sort_column = st.selectbox("Sırala:", ["(Sıralama yok)"] + list(df.columns), key="viewer_sort")
+        with col_order:
+            ascending = st.radio("Yön:", ["Artan", "Azalan"], horizontal=True, key="viewer_order") == "Artan"
+
+        view_index = _get_view_index(df, selected_csv, search_term, sort_column if sort_column in df.columns else None, ascending)
+        start, end = show_paginator(len(view_index), key="viewer_rows")
+        st.dataframe(df.loc[view_index[start:end]], use_container_width=True)
+        _show_file_export(file_path, lambda: csv_source(file_path))
+
         # Show valid mobile numbers
         if "phone" in df.columns:
-            valid_phones = []
-            for idx, row in df.iterrows():
-                phone = str(row["phone"]).replace(" ", "")
-                if phone and phone != "nan" and is_valid_turkish_mobile(phone):
-                    valid_phones.append({"name": row.get('name', 'İşletme'), "phone": phone})
-            
-            if valid_phones:
-                st.success(f"📱 {len(valid_phones)} geçerli cep telefonu numarası bulundu")
+            canonical = normalize_turkish_mobiles(df["phone"])
+            valid_df = df.assign(phone=canonical)[canonical.notna()].drop_duplicates(subset="phone")
+
+            if len(valid_df):
+                st.success(f"📱 {len(valid_df)} geçerli cep telefonu numarası bulundu")
                 st.info("💡 Mesaj göndermek için 'Mesaj Gönder' sekmesine geçin")
-                
-                with st.expander(f"Geçerli Numaraları Gör ({len(valid_phones)} adet)"):
-                    for item in valid_phones:
-                        st.write(f"• {item['name']} - {item['phone']}")
+
+                with st.expander(f"Geçerli Numaraları Gör ({len(valid_df)} adet)"):
+                    phone_start, phone_end = show_paginator(len(valid_df), key="viewer_phones")
+                    names = valid_df['name'] if 'name' in valid_df.columns else pd.Series('İşletme', index=valid_df.index)
+                    page_lines = [
+                        f"• {name} - {phone}"
+                        for name, phone in zip(names.iloc[phone_start:phone_end], valid_df['phone'].iloc[phone_start:phone_end])
+                    ]
+                    st.markdown("  \n".join(page_lines))
             else:
                 st.warning("⚠️ 05 ile başlayan geçerli cep telefonu numarası bulunamadı.")
         else:
             st.warning("CSV dosyasında 'phone' sütunu bulunamadı.")
+
+        if "website" in df.columns:
+            _show_website_enrichment(file_path, lambda: df.fillna("").to_dict("records"))
+    else:
+        st.info("'csv_files' klasöründe CSV dosyası bulunamadı. Yeni veri kazıyın veya dosyaları bu klasöre ekleyin.")
+
+def _show_jsonl_file(file_path):
+    """Page through a JSONL file without loading it; only the current page is kept in memory"""
+    search_term = st.text_input("🔎 Filtrele:", placeholder="İsim, adres, kategori...", key="viewer_filter")
+    st.caption("JSONL dosyaları akış halinde okunur; sıralama yalnızca CSV dosyalarında kullanılabilir.")
+
+    predicate = None
+    if search_term:
+        needle = search_term.casefold()
+        predicate = lambda record: any(needle in str(value).casefold() for value in record.values())
+
+    total = count_jsonl(file_path, predicate)
+    start, end = show_paginator(total, key="viewer_rows")
+    st.dataframe(pd.DataFrame(read_jsonl_page(file_path, start, end, predicate)), use_container_width=True)
+    _show_file_export(file_path, lambda: jsonl_source(file_path))
+
+    # Only the distinct valid numbers are collected while streaming the file
+    valid_phones = {}
+    for record in iter_jsonl(file_path):
+        phone = normalize_turkish_mobile(record.get("phone"))
+        if phone and phone not in valid_phones:
+            valid_phones[phone] = record.get("name") or "İşletme"
+
+    if valid_phones:
+        st.success(f"📱 {len(valid_phones)} geçerli cep telefonu numarası bulundu")
+        st.info("💡 Mesaj göndermek için 'Mesaj Gönder' sekmesine geçin")
+
+        with st.expander(f"Geçerli Numaraları Gör ({len(valid_phones)} adet)"):
+            phone_start, phone_end = show_paginator(len(valid_phones), key="viewer_phones")
+            page = list(valid_phones.items())[phone_start:phone_end]
+            st.markdown("  \n".join(f"• {name} - {phone}" for phone, name in page))
     else:
-        st.info("'csv_files' klasöründe CSV dosyası bulunamadı. Yeni veri kazıyın veya dosyaları bu klasöre ekleyin.")
\ No newline at end of file
+        st.warning("⚠️ 05 ile başlayan geçerli cep telefonu numarası bulunamadı.")
+
+    _show_website_enrichment(file_path, lambda: list(iter_jsonl(file_path)))
+
+def _show_file_export(file_path, open_source):
+    """Excel export of a CSV or JSONL file, offered again until the file changes"""
+    stat = os.stat(file_path)
+    export_name = os.path.splitext(os.path.basename(file_path))[0]
+    _show_excel_export(export_name, (file_path, stat.st_mtime_ns, stat.st_size), open_source)
+
+def _show_excel_export(export_name, export_key, open_source):
+    """Stream the data to an .xlsx file with a progress bar, then offer it for download"""
+    exports = st.session_state.setdefault("viewer_exports", {})
+
+    if st.button("📊 Excel'e Aktar", key=f"excel_export_{export_name}",
+                 help="Tüm satırlar akış halinde yazılır; büyük dosyalarda da bellek kullanımı sabit kalır"):
+        export_dir = os.path.join(os.getcwd(), "csv_files", "exports")
+        os.makedirs(export_dir, exist_ok=True)
+        export_path = os.path.join(export_dir, f"{export_name}.xlsx")
+
+        progress_bar = st.progress(0, text="Excel dosyası hazırlanıyor...")
+        def update_progress(done, total):
+            fraction = min(done / total, 1.0) if total else 0
+            progress_bar.progress(fraction, text=f"Excel dosyası hazırlanıyor... {done}/{total or '?'}")
+
+        rows = export_xlsx_file(open_source(), export_path, progress=update_progress)
+        progress_bar.progress(1.0, text=f"✅ {rows} satır aktarıldı")
+        exports[export_key] = (export_path, rows)
+
+    export = exports.get(export_key)
+    if export and os.path.exists(export[0]):
+        export_path, rows = export
+        with open(export_path, "rb") as f:
+            st.download_button(f"📥 Excel'i İndir ({rows} satır)", f, os.path.basename(export_path), XLSX_MIME,
+                               key=f"excel_download_{export_name}")
+
+def _show_website_enrichment(file_path, load_records):
+    """Fetch the businesses' websites and save emails, extra phones and social links to a new file"""
+    with st.expander("🌐 Web Sitelerinden İletişim Bilgisi Topla"):
+        st.caption("Her işletmenin web sitesi eşzamanlı olarak indirilir; e-posta, ek telefon ve sosyal medya "
+                   "bağlantıları yeni bir dosyaya kaydedilir. İndirilen sayfalar 'web_cache' klasöründe saklanır.")
+        if not st.button("Web sitelerini tara", key="enrich_websites"):
+            return
+
+        try:
+            from website_enricher import ResponseCache, enrich_businesses
+        except ImportError:
+            st.error("Bu özellik için aiohttp gerekli: pip install aiohttp")
+            return
+
+        progress_bar = st.progress(0, text="Web siteleri taranıyor...")
+        def update_progress(done, total):
+            progress_bar.progress(done / total, text=f"Web siteleri taranıyor... {done}/{total}")
+
+        enriched = enrich_businesses(load_records(), progress=update_progress, cache=ResponseCache())
+        progress_bar.progress(1.0, text="Tamamlandı")
+
+        root, ext = os.path.splitext(file_path)
+        out_path = f"{root}_enriched{ext}"
+        if ext == ".jsonl":
+            write_jsonl(enriched, out_path)
+        else:
+            pd.DataFrame(enriched).to_csv(out_path, index=False)
+
+        with_email = sum(1 for business in enriched if business["emails"])
+        with_social = sum(1 for business in enriched if business["social_links"])
+        st.success(f"✅ {len(enriched)} işletme tarandı: {with_email} e-posta, {with_social} sosyal medya bulundu. "
+                   f"Kaydedildi: {os.path.basename(out_path)}")
+
+def _get_view_index(df, selected_csv, search_term, sort_column, ascending):
+    """Return the row index of df after filtering and sorting, reused across reruns"""
+    # Keyed on the loaded version of the file; an id() could be reused by a newer frame
+    view_key = (selected_csv, df.attrs.get("signature"), search_term, sort_column, ascending)
+    cached = st.session_state.get("viewer_view")
+    if cached and cached[0] == view_key:
+        return cached[1]
+
+    view = df
+    if search_term:
+        text_columns = [col for col in df.columns if _is_text(df[col])]
+        mask = pd.Series(False, index=df.index)
+        for col in text_columns:
+            mask |= df[col].str.contains(search_term, case=False, regex=False, na=False)
+        view = view[mask]
+
+    if sort_column:
+        view = view.sort_values(sort_column, ascending=ascending, key=_sort_key, na_position="last")
+
+    st.session_state.viewer_view = (view_key, view.index)
+    return view.index
+
+# Columns with their own parser; "4.7" is a decimal rating, "13.055" a thousands-separated count
+_NUMERIC_PARSERS = {"rating": parse_rating, "num_reviews": parse_review_count}
+
+def _sort_key(column):
+    """Sort text columns holding numbers ("4,7", "13.055") numerically"""
+    if not _is_text(column):
+        return column
+    parser = _NUMERIC_PARSERS.get(str(column.name).strip())
+    if parser:
+        return pd.to_numeric(column.map(parser), errors="coerce")
+    numeric = pd.to_numeric(
+        column.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+        errors="coerce"
+    )
+    # Only treat the column as numeric if most values parse
+    if numeric.notna().sum() >= 0.9 * column.notna().sum():
+        return numeric
+    return column.str.lower()
+
+def _is_text(column):
+    """Whether a column holds text (object dtype, or the string dtype of newer pandas)"""
+    return pd.api.types.is_object_dtype(column.dtype) or pd.api.types.is_string_dtype(column.dtype)
+
+def _show_business_search():
+    """Full-text and faceted search over all scraped businesses"""
+    col_text, col_rating, col_reviews, col_mobile = st.columns([3, 1, 1, 1])
+    with col_text:
+        search_text = st.text_input("Ara:", placeholder="Örn: kuaför muğla", key="search_text",
+                                    help="İsim, adres ve kategoride arar; Türkçe karakterler olmadan da yazabilirsiniz")
+    with col_rating:
+        min_rating = st.number_input("Min. puan:", min_value=0.0, max_value=5.0, value=0.0, step=0.1, key="search_min_rating")
+    with col_reviews:
+        min_reviews = st.number_input("Min. yorum:", min_value=0, value=0, step=10, key="search_min_reviews")
+    with col_mobile:
+        st.markdown("<br>", unsafe_allow_html=True)
+        mobile_only = st.checkbox("📱 Sadece cep", key="search_mobile_only")
+
+    master = MasterDataset()
+    try:
+        # Only new or changed CSV files are indexed again
+        master.refresh()
+        # Fetch only the page selected in the paginator below (from the previous run)
+        page_size = st.session_state.get("search_results_page_size", 50)
+        page = st.session_state.get("search_results_page", 1)
+        filters = dict(min_rating=min_rating or None, min_reviews=min_reviews, mobile_only=mobile_only)
+        results, total = master.search(search_text, limit=page_size, offset=(page - 1) * page_size, **filters)
+        if results.empty and total:
+            # The filters shrank the result below the stored page; show the last page
+            last_page_offset = (-(-total // page_size) - 1) * page_size
+            results, total = master.search(search_text, limit=page_size, offset=last_page_offset, **filters)
+        st.success(f"🔎 {total} işletme bulundu")
+        show_paginator(total, key="search_results")
+        st.dataframe(results, use_container_width=True, hide_index=True)
+
+        # The export streams every match (not just this page) from the open database
+        def open_search_results():
+            columns, matches, rows = master.iter_businesses(search_text, **filters)
+            return ExportSource(columns, rows, matches)
+
+        export_name = "_".join(["isletmeler", *re.findall(r"\w+", search_text)])
+        export_key = (master.db_path, master.generation, search_text, tuple(filters.items()))
+        _show_excel_export(export_name, export_key, open_search_results)
+    finally:
+        master.close()
+
+def _parse_center(text):
+    """Coordinates from "36.88, 30.70" or a Google Maps link; None if not recognized"""
+    coordinates = parse_coordinates(text)
+    if coordinates:
+        return coordinates
+    parts = text.replace(";", ",").split(",")
+    if len(parts) != 2:
+        return None
+    try:
+        latitude, longitude = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+    if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+        return latitude, longitude
+    return None
+
+def _show_nearby_businesses():
+    """Radius search and near-duplicate check over businesses with coordinates"""
+    col_center, col_radius, col_text = st.columns([3, 1, 2])
+    with col_center:
+        center_text = st.text_input("Merkez:", placeholder="Örn: 36.8841, 30.7056 veya Google Maps linki",
+                                    key="nearby_center")
+    with col_radius:
+        radius_km = st.number_input("Yarıçap (km):", min_value=0.1, max_value=100.0, value=2.0, step=0.5,
+                                    key="nearby_radius")
+    with col_text:
+        nearby_text = st.text_input("İsim/kategori:", placeholder="Örn: kafe", key="nearby_text")
+
+    master = MasterDataset()
+    try:
+        master.refresh()
+        indexed = len(master.spatial_index())
+        if not indexed:
+            st.info("Konum bilgisi olan işletme yok. Yeni kazımalar konumları otomatik kaydeder.")
+            return
+
+        st.caption(f"📍 Konumu bilinen {indexed} işletme")
+        if center_text.strip():
+            center = _parse_center(center_text.strip())
+            if center is None:
+                st.error("Merkez anlaşılamadı. Enlem, boylam veya bir Google Maps linki girin.")
+            else:
+                results = master.nearby(*center, radius_km, text=nearby_text)
+                st.success(f"📍 {radius_km:g} km içinde {len(results)} işletme bulundu")
+                if not results.empty:
+                    st.map(results[["latitude", "longitude"]])
+                    st.dataframe(results, use_container_width=True, hide_index=True)
+
+        with st.expander("🧭 Aynı yerde tekrar eden işletmeler"):
+            max_m = st.slider("En fazla uzaklık (m):", min_value=5, max_value=200, value=30, step=5,
+                              key="nearby_duplicate_m")
+            pairs = master.near_duplicates(max_m)
+            if not pairs:
+                st.info("Aynı isimle yakın konumda kayıtlı işletme yok.")
+            else:
+                st.warning(f"⚠️ {len(pairs)} olası tekrar bulundu")
+                st.dataframe(pd.DataFrame([
+                    {
+                        "İsim": first.name,
+                        "Adres 1": first.address,
+                        "Telefon 1": first.phone,
+                        "Adres 2": second.address,
+                        "Telefon 2": second.phone,
+                        "Uzaklık (m)": round(distance_m, 1),
+                    }
+                    for first, second, distance_m in pairs
+                ]), use_container_width=True, hide_index=True)
+    finally:
+        master.close()
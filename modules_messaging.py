@@ -1,8 +1,17 @@
 import streamlit as st
 import pandas as pd
 import os
-import time
-from wp_message_sender import send_whatsapp_message, is_valid_turkish_mobile, is_message_already_sent, log_sent_message
+from csv_loader import load_csv
+from jsonl_io import iter_jsonl, read_jsonl_page
+from wp_message_sender import send_whatsapp_message, normalize_turkish_mobile, normalize_turkish_mobiles, SimulatedSender
+from message_template import MessageTemplate, PLACEHOLDERS
+from bulk_sender import send_bulk_messages
+from business_record import BusinessRecord
+from campaign_store import CampaignStore, default_store_path
+from master_dataset import MasterDataset
+
+# Pseudo file name that selects the merged dataset of all CSV files
+MASTER_DATASET_OPTION = "🗂️ Tüm dosyalar (birleşik, tekrarsız)"
 
 def show_messaging_page():
     """WhatsApp messaging page with enhanced UI/UX"""
@@ -16,6 +25,9 @@ def show_messaging_page():
     
     # Step-by-step process
     _show_step_process()
+    
+    # Results of previous campaigns
+    _show_campaign_analytics()
 
 def _show_step_process():
     """Show step-by-step messaging process"""
@@ -74,6 +86,40 @@ def _show_step_process():
     elif st.session_state.messaging_step == 4:
         _show_send_messages_step()
 
+def _show_campaign_analytics():
+    """Show aggregated results of previous campaigns"""
+    store_path = default_store_path()
+    if not os.path.exists(store_path):
+        return
+    
+    with st.expander("📈 Kampanya Analizi"):
+        store = CampaignStore(store_path)
+        try:
+            stats = store.category_stats()
+            campaigns = store.recent_campaigns(limit=10)
+        finally:
+            store.close()
+        
+        if not stats:
+            st.info("Henüz kaydedilmiş gönderim sonucu yok.")
+            return
+        
+        st.markdown("**CSV ve kategoriye göre başarı oranı:**")
+        stats_df = pd.DataFrame(stats).rename(columns={
+            "source_csv": "CSV Dosyası",
+            "category": "Kategori",
+            "attempts": "Deneme",
+            "successes": "Başarılı",
+            "errors": "Hatalı",
+            "skipped": "Atlandı",
+            "success_rate": "Başarı %",
+            "mean_latency_ms": "Ort. Süre (ms)"
+        })
+        st.dataframe(stats_df.round(1), use_container_width=True, hide_index=True)
+        
+        st.markdown("**Son kampanyalar:**")
+        st.dataframe(pd.DataFrame(campaigns).round(1), use_container_width=True, hide_index=True)
+
 def _show_csv_selection_step():
     """Step 1: CSV file selection"""
     st.markdown("### 📄 Adım 1: Veri Dosyası Seçimi")
@@ -81,7 +127,7 @@ def _show_csv_selection_step():
     csv_dir = os.path.join(os.getcwd(), "csv_files")
     if not os.path.exists(csv_dir):
         os.makedirs(csv_dir)
-    csv_files = [f for f in os.listdir(csv_dir) if f.endswith('.csv')]
+    csv_files = [f for f in os.listdir(csv_dir) if f.endswith(('.csv', '.jsonl'))]
     
     if not csv_files:
         st.error("🙅‍♂️ Hiçbir CSV dosyası bulunamadı!")
@@ -93,27 +139,22 @@ def _show_csv_selection_step():
     with col1:
         selected_csv = st.selectbox(
             "Mesaj gönderilecek CSV dosyasını seçin:",
-            csv_files,
-            help="Kazıdığınız işletme verilerini içeren dosyayı seçin"
+            [MASTER_DATASET_OPTION] + csv_files,
+            index=1,
+            help="Kazıdığınız işletme verilerini içeren dosyayı seçin veya tüm dosyaları birleştirin"
         )
         
         if selected_csv:
-            # Preview CSV data with proper separator detection
-            file_path = os.path.join(csv_dir, selected_csv)
-            try:
-                df = pd.read_csv(file_path, dtype={'phone': str})
-                # Check if semicolon separated
-                if len(df.columns) == 1 and ';' in df.columns[0]:
-                    df = pd.read_csv(file_path, dtype={'phone': str}, sep=';')
-            except:
-                df = pd.read_csv(file_path, dtype={'phone': str}, sep=';')
-            valid_phones = _get_valid_phones(df)
+            # Preview data (cached until the files change)
+            total_rows, valid_phones, preview = _load_recipients(selected_csv)
             
             st.success(f"✅ **{selected_csv}** seçildi")
-            st.info(f"📊 **{len(df)}** toplam kayıt | **{len(valid_phones)}** geçerli numara")
+            if selected_csv == MASTER_DATASET_OPTION:
+                st.caption(f"🗂️ {len(csv_files)} dosya birleştirildi; aynı numara/işletme yalnızca bir kez listelenir")
+            st.info(f"📊 **{total_rows}** toplam kayıt | **{len(valid_phones)}** geçerli numara")
             
             with st.expander("🔍 Veri Önizlemesi"):
-                st.dataframe(df.head(3), use_container_width=True)
+                st.dataframe(preview, use_container_width=True)
     
     with col2:
         st.markdown("<br><br>", unsafe_allow_html=True)
@@ -125,6 +166,54 @@ def _show_csv_selection_step():
             else:
                 st.error("Lütfen bir CSV dosyası seçin!")
 
+def _load_selected_data(selected_csv):
+    """Load the selected CSV file, or the merged dataset of all CSV files"""
+    if selected_csv == MASTER_DATASET_OPTION:
+        # Only new or changed files are merged again
+        master = MasterDataset()
+        try:
+            master.refresh()
+            return master.to_dataframe()
+        finally:
+            master.close()
+    return load_csv(os.path.join(os.getcwd(), "csv_files", selected_csv))
+
+def _load_recipients(selected_csv):
+    """Return (total rows, valid recipients, preview rows) of the selected data
+
+    JSONL files are streamed record by record and never loaded as a whole.
+    The result is kept in the session until the file, or the merged dataset's
+    generation, changes.
+    """
+    path = os.path.join(os.getcwd(), "csv_files", selected_csv)
+    if selected_csv.endswith('.jsonl'):
+        stat = os.stat(path)
+        df, signature = None, (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    else:
+        # CSV files and the merged dataset carry the version they were loaded from
+        df = _load_selected_data(selected_csv)
+        signature = df.attrs.get("signature")
+    
+    recipients_key = (selected_csv, signature)
+    cached = st.session_state.get("messaging_recipients")
+    if cached and cached[0] == recipients_key:
+        return cached[1]
+    
+    if df is None:
+        counter = {"rows": 0}
+        
+        def counted_records():
+            for record in iter_jsonl(path):
+                counter["rows"] += 1
+                yield record
+        
+        valid_phones = _get_valid_phones_from_records(counted_records(), selected_csv)
+        recipients = (counter["rows"], valid_phones, pd.DataFrame(read_jsonl_page(path, 0, 3)))
+    else:
+        recipients = (len(df), _get_valid_phones(df), df.head(3))
+    st.session_state.messaging_recipients = (recipients_key, recipients)
+    return recipients
+
 def _show_phone_input_step():
     """Step 2: Phone number input"""
     st.markdown("### 📞 Adım 2: Telefon Numaranız")
@@ -140,18 +229,10 @@ def _show_phone_input_step():
         )
         
         if phone_input:
-            # Clean and format phone number
-            clean_phone = phone_input.replace(' ', '').replace('(', '').replace(')', '').replace('-', '')
-            
-            # Remove +90 if user entered it
-            if clean_phone.startswith('+90'):
-                clean_phone = clean_phone[3:]
-            elif clean_phone.startswith('90'):
-                clean_phone = clean_phone[2:]
+            # Normalize any common notation to +905XXXXXXXXX
+            formatted_phone = normalize_turkish_mobile(phone_input)
             
-            # Check if valid 10-digit mobile number starting with 5
-            if len(clean_phone) == 10 and clean_phone.startswith('5') and clean_phone.isdigit():
-                formatted_phone = f"+90{clean_phone}"
+            if formatted_phone:
                 st.success(f"✅ Geçerli numara: **{formatted_phone}**")
                 valid_phone = True
                 # Update session state with formatted number
@@ -181,6 +262,14 @@ def _show_phone_input_step():
                 else:
                     st.error("Geçerli bir telefon numarsı girin!")
 
+# Example contact used to preview personalized messages
+_SAMPLE_CONTACT = {
+    "name": "Örnek Kafe",
+    "category": "Kafe",
+    "address": "Antalya Merkez",
+    "phone": "+905551234567"
+}
+
 def _show_message_composition_step():
     """Step 3: Message composition"""
     st.markdown("### ✍️ Adım 3: Mesajınızı Hazırlayın")
@@ -231,6 +320,7 @@ Saygılarımla"""
             help="Mesajınızı yazın veya yukarıdaki şablonlardan birini seçin",
             key="message_input"
         )
+        st.caption("🏷️ Kişiselleştirme: " + ", ".join(f"{{{field}}}" for field in PLACEHOLDERS) + " alanları her işletme için doldurulur")
         
         # Character count
         char_count = len(message)
@@ -245,7 +335,7 @@ Saygılarımla"""
         if message:
             st.text_area(
                 "Gönderilecek mesaj:",
-                value=message,
+                value=MessageTemplate(message).render(_SAMPLE_CONTACT),
                 height=200,
                 disabled=True
             )
@@ -274,17 +364,8 @@ def _show_send_messages_step():
     """Step 4: Send messages"""
     st.markdown("### 🚀 Adım 4: Mesajları Gönder")
     
-    # Load data with proper separator detection
-    csv_dir = os.path.join(os.getcwd(), "csv_files")
-    file_path = os.path.join(csv_dir, st.session_state.selected_csv)
-    try:
-        df = pd.read_csv(file_path, dtype={'phone': str})
-        # Check if semicolon separated
-        if len(df.columns) == 1 and ';' in df.columns[0]:
-            df = pd.read_csv(file_path, dtype={'phone': str}, sep=';')
-    except:
-        df = pd.read_csv(file_path, dtype={'phone': str}, sep=';')
-    valid_phones = _get_valid_phones(df)
+    # Load data (cached until the files change)
+    _, valid_phones, _ = _load_recipients(st.session_state.selected_csv)
     
     # Summary card
     st.markdown("""
@@ -317,7 +398,8 @@ def _show_send_messages_step():
     with col1:
         # Message preview
         with st.expander("🔍 Mesaj Önizlemesi", expanded=False):
-            st.text_area("Gönderilecek mesaj:", st.session_state.message_content, height=150, disabled=True)
+            preview = MessageTemplate(st.session_state.message_content).render(valid_phones[0])
+            st.text_area(f"Gönderilecek mesaj ({valid_phones[0]['name']}):", preview, height=150, disabled=True)
         
         # Contact selection
         st.markdown("**🎯 Hedef Seçimi:**")
@@ -350,6 +432,10 @@ def _show_send_messages_step():
             value=5,
             help="Saniye cinsinden bekleme süresi"
         )
+        dry_run = st.checkbox(
+            "🧪 Deneme modu",
+            help="Mesajlar gerçekten gönderilmez; gönderim simüle edilir ve ayrı bir deneme loguna yazılır"
+        )
         
         # Send button
         selected_count = len(selected_indices)
@@ -361,7 +447,16 @@ def _show_send_messages_step():
                 type="primary",
                 use_container_width=True
             ):
-                _send_bulk_messages_enhanced(valid_phones, selected_indices, st.session_state.message_content, st.session_state.user_phone, delay_seconds)
+                if dry_run:
+                    _send_bulk_messages_enhanced(
+                        valid_phones, selected_indices, st.session_state.message_content, st.session_state.user_phone, delay_seconds,
+                        backend=SimulatedSender(latency=0.2),
+                        log_file=os.path.join(os.getcwd(), "sent_messages_dry_run.json"),
+                        store_path=default_store_path(dry_run=True),
+                        wait=False
+                    )
+                else:
+                    _send_bulk_messages_enhanced(valid_phones, selected_indices, st.session_state.message_content, st.session_state.user_phone, delay_seconds)
         else:
             st.warning("Hiçbir numara seçilmedi!")
         
@@ -381,7 +476,7 @@ def _show_send_messages_step():
 def _show_messaging_interface(selected_csv, user_phone):
     """Show the main messaging interface"""
     csv_dir = os.path.join(os.getcwd(), "csv_files")
-    df_current = pd.read_csv(os.path.join(csv_dir, selected_csv))
+    df_current = load_csv(os.path.join(csv_dir, selected_csv))
     
     # Get valid phone numbers
     valid_phones = _get_valid_phones(df_current)
@@ -403,23 +498,44 @@ def _show_messaging_interface(selected_csv, user_phone):
     _show_individual_contacts(valid_phones, message, user_phone)
 
 def _get_valid_phones(df):
-    """Extract valid phone numbers from dataframe with deduplication"""
+    """Extract valid phone numbers from dataframe, deduplicated on the canonical number"""
+    if "phone" not in df.columns:
+        return []
+    
+    canonical = normalize_turkish_mobiles(df["phone"])
+    valid_df = df.assign(phone=canonical)[canonical.notna()].drop_duplicates(subset="phone")
+    selected_csv = st.session_state.get('selected_csv')
+    
+    def column(name, default=""):
+        return valid_df[name].tolist() if name in valid_df.columns else [default] * len(valid_df)
+    
+    # Records are built straight from the columns, without a dict per row
+    return [
+        BusinessRecord(name=name, phone=phone, address=address, category=category,
+                       source_csv=source if isinstance(source, str) else selected_csv)
+        for name, phone, address, category, source in zip(
+            column('name', 'İşletme'), valid_df["phone"].tolist(), column('address'),
+            column('category'), column('source_csv', selected_csv)
+        )
+    ]
+
+def _get_valid_phones_from_records(records, source_csv):
+    """Extract valid phone numbers from an iterable of records in a single streaming pass"""
     valid_phones = []
-    seen_phones = set()  # Track unique phone numbers
-    
-    if "phone" in df.columns:
-        for idx, row in df.iterrows():
-            phone = str(row["phone"]).replace(" ", "")
-            if phone and phone != "nan" and is_valid_turkish_mobile(phone):
-                # Only add if phone number hasn't been seen before
-                if phone not in seen_phones:
-                    valid_phones.append({
-                        "name": row.get('name', 'İşletme'), 
-                        "phone": phone, 
-                        "idx": idx,
-                        "address": row.get('address', '')
-                    })
-                    seen_phones.add(phone)
+    seen = set()
+    
+    for record in records:
+        phone = normalize_turkish_mobile(record.get("phone"))
+        if not phone or phone in seen:
+            continue
+        seen.add(phone)
+        valid_phones.append(BusinessRecord(
+            name=record.get('name') or 'İşletme',
+            phone=phone,
+            address=record.get('address', ''),
+            category=record.get('category', ''),
+            source_csv=source_csv
+        ))
     return valid_phones
 
 def _show_message_composer():
@@ -500,10 +616,13 @@ def _show_bulk_sender(valid_phones, message, user_phone):
         elif not selected_indices:
             st.warning("⚠️ En az bir numara seçin")
 
-def _send_bulk_messages_enhanced(valid_phones, selected_indices, message, user_phone, delay_seconds):
-    """Enhanced bulk message sending with duplicate prevention"""
-    import hashlib
-    
+def _send_bulk_messages_enhanced(valid_phones, selected_indices, message, user_phone, delay_seconds, backend=None, log_file=None, store_path=None,
+                                 wait=True):
+    """Enhanced bulk message sending with per-recipient rendering and duplicate prevention
+
+    With wait=False (dry run) nothing waits between messages; the summary
+    still shows the duration the campaign would take with delay_seconds.
+    """
     # Create containers for better organization
     progress_container = st.container()
     results_container = st.container()
@@ -526,54 +645,40 @@ def _send_bulk_messages_enhanced(valid_phones, selected_indices, message, user_p
     
     # Results tracking
     results = []
+    recipients = [valid_phones[idx] for idx in selected_indices]
+    if recipients:
+        current_contact.info(f"📱 İşleniyor (1/{selected_count}): **{recipients[0]['name']}** - {recipients[0]['phone']}")
     
-    # Create message hash for duplicate checking
-    message_hash = hashlib.md5(message.encode()).hexdigest()[:8]
-    
-    for i, idx in enumerate(selected_indices):
-        item = valid_phones[idx]
-        
-        # Update current contact info
-        current_contact.info(f"📱 İşleniyor ({i+1}/{selected_count}): **{item['name']}** - {item['phone']}")
+    store = CampaignStore(store_path)
+    # Released even if sending fails or the rerun is interrupted mid-campaign
+    try:
+        send_results = send_bulk_messages(
+            recipients, message, user_phone, delay_seconds if wait else 0,
+            backend=backend, log_file=log_file,
+            store=store, source_csv=st.session_state.selected_csv
+        )
+        try:
+            for i, result in enumerate(send_results):
+                results.append(result)
+                if result['status'] == 'success':
+                    success_count += 1
+                elif result['status'] == 'skipped':
+                    skip_count += 1
+                else:
+                    error_count += 1
         
-        # Check if message already sent to this number
-        if is_message_already_sent(item['phone'], message):
-            skip_count += 1
-            results.append({
-                "name": item['name'],
-                "phone": item['phone'],
-                "status": "skipped",
-                "message": "Bu numaraya aynı mesaj daha önce gönderildi"
-            })
-        else:
-            try:
-                send_whatsapp_message(user_phone, item['phone'], message)
-                log_sent_message(item['phone'], message_hash)
-                success_count += 1
-                results.append({
-                    "name": item['name'],
-                    "phone": item['phone'],
-                    "status": "success",
-                    "message": "Başarıyla gönderildi"
-                })
-                
-                # Wait between messages (except for last one)
-                if i < selected_count - 1:
-                    time.sleep(delay_seconds)
-                    
-            except Exception as e:
-                error_count += 1
-                results.append({
-                    "name": item['name'],
-                    "phone": item['phone'],
-                    "status": "error",
-                    "message": str(e)[:100]
-                })
-        
-        # Update progress
-        progress = (i + 1) / selected_count
-        progress_bar.progress(progress)
-        status_text.text(f"İlerleme: {i+1}/{selected_count} ({int(progress*100)}%)")
+                # Update progress and show the next contact
+                progress = (i + 1) / selected_count
+                progress_bar.progress(progress)
+                status_text.text(f"İlerleme: {i+1}/{selected_count} ({int(progress*100)}%)")
+                if i + 1 < selected_count:
+                    next_item = recipients[i + 1]
+                    current_contact.info(f"📱 İşleniyor ({i+2}/{selected_count}): **{next_item['name']}** - {next_item['phone']}")
+        finally:
+            # Let the generator finish its own cleanup while the store is open
+            send_results.close()
+    finally:
+        store.close()
     
     # Final status
     current_contact.empty()
@@ -596,7 +701,8 @@ def _send_bulk_messages_enhanced(valid_phones, selected_indices, message, user_p
         with col5:
             actual_sent = success_count + error_count  # Only count actual attempts
             total_time = actual_sent * delay_seconds
-            st.metric("⏱️ Süre", f"{total_time//60}dk {total_time%60}sn")
+            st.metric("⏱️ Süre", f"{total_time//60}dk {total_time%60}sn",
+                      help=None if wait else "Gerçek gönderimde mesajlar arası bekleme ile geçecek tahmini süre")
         
         # Detailed results
         if error_count > 0 or skip_count > 0:
@@ -1,7 +1,20 @@
 import streamlit as st
 import pandas as pd
 import os
-from wp_message_sender import is_valid_turkish_mobile
+from business_record import BusinessRecord, records_to_dataframe
+from components.log_panel import LogPanel
+from jsonl_io import JsonlWriter
+from wp_message_sender import normalize_turkish_mobiles
+
+# Why the scraper stopped scrolling the result list (GoogleMapsScraper.last_stop_reason)
+STOP_REASON_LABELS = {
+    "max_results": "maksimum sonuç sayısına ulaşıldı",
+    "end_of_list": "listenin sonuna ulaşıldı",
+    "no_growth": "kaydırınca yeni sonuç gelmedi",
+    "errors": "art arda çok fazla hata",
+    "browser_crash": "tarayıcı tekrar tekrar çöktü",
+    "failed": "kazıma hatayla sonlandı",
+}
 
 def show_scraper_page():
     """Google Maps scraping page"""
@@ -96,6 +109,15 @@ def show_scraper_page():
     
     with col4:
         headless = st.checkbox("Tarayıcıyı gizli modda çalıştır", value=True)
+        output_format = st.radio(
+            "Kayıt formatı:", ["CSV", "JSONL"], horizontal=True,
+            help="JSONL: her işletme kazındığı anda dosyaya yazılır; büyük aramalar için önerilir"
+        ).lower()
+        delta_mode = st.checkbox(
+            "🔁 Sadece yeni/değişen işletmeleri aç (delta)",
+            help="Bu arama daha önce kaydedildiyse puanı ve yorum sayısı değişmeyen işletmelere "
+                 "tıklanmaz; eklenen, değişen ve kaybolan işletmeler ayrıca listelenir"
+        )
     
     # Search query preview
     if language == "English":
@@ -105,20 +127,53 @@ def show_scraper_page():
     
     st.info(f"🔍 Arama sorgusu: **{search_query}**")
     
+    # Composite queries ("Antalya, otel restoran, kafe") are scraped per category
+    sub_queries = []
+    if query_type:
+        from query_splitter import split_composite_query
+        
+        location = st.text_input("Konum (opsiyonel):", placeholder="Örn: Antalya Kepez",
+                                 help="Boş bırakılırsa konum arama teriminden tahmin edilir")
+        sub_queries = split_composite_query(query_type, location.strip() or None)
+        if len(sub_queries) > 1:
+            split_col1, split_col2 = st.columns([3, 1])
+            with split_col1:
+                split_query = st.checkbox(
+                    f"🧩 Kategorilere böl ({len(sub_queries)} alt sorgu)", value=True,
+                    help="Her kategori ayrı aranır, sonuçlar birleştirilip tekrarlar çıkarılır"
+                )
+                st.caption(" • ".join(sub_query.query for sub_query in sub_queries))
+            with split_col2:
+                split_workers = st.number_input("Paralel tarayıcı:", min_value=1, max_value=4, value=2)
+            if not split_query:
+                sub_queries = []
+        else:
+            # A single category; an explicit location is added to it
+            query_type = sub_queries[0].query if sub_queries else query_type
+            sub_queries = []
+    
     # Show saved custom searches if any exist
-    _show_saved_searches(language)
+    _show_saved_searches(language, GoogleMapsScraper, country_english, max_results, headless)
     
     scrape_btn = st.button("Kazımaya Başla", type="primary", use_container_width=True)
 
     if scrape_btn:
         if not GoogleMapsScraper:
             st.error("Kazıyıcı modülü bulunamadı. scraper.py dosyasının aynı klasörde olduğundan emin olun.")
+        elif sub_queries:
+            _run_composite_scraping(GoogleMapsScraper, country_english, query_type, sub_queries,
+                                    max_results, headless, split_workers, output_format, delta_mode)
         else:
-            _run_scraping(GoogleMapsScraper, country_english, query_type, max_results, headless, search_query)
+            _run_scraping(GoogleMapsScraper, country_english, query_type, max_results, headless, search_query,
+                          output_format, delta_mode)
 
-def _run_scraping(GoogleMapsScraper, country, query_type, max_results, headless, search_query):
+def _run_scraping(GoogleMapsScraper, country, query_type, max_results, headless, search_query, output_format="csv",
+                  delta_mode=False):
     """Run the scraping process with logging"""
     csv_dir = os.path.join(os.getcwd(), "csv_files")
+    # JSONL output is streamed to csv_files while scraping, one record per line
+    jsonl_writer = None
+    delta = None
     
     # Create containers for progress and logs
     progress_container = st.container()
@@ -131,167 +186,212 @@ def _run_scraping(GoogleMapsScraper, country, query_type, max_results, headless,
     
     with log_container:
         st.markdown("### 📄 Kazıma Süreci Logları")
-        log_area = st.empty()
-        logs = []
+        # Keeps only the tail in memory and on screen; the full log goes to logs/
+        log_panel = LogPanel(st.empty(), name="scrape")
+        st.caption(f"📝 Tam log dosyası: {log_panel.path}")
     
     try:
-        import datetime
-        
         # Initialize logs
-        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        logs.append(f"{current_time} - INFO - Kazıyıcı başlatılıyor...")
-        logs.append(f"{current_time} - INFO - Hedef: {country} - {query_type}")
-        logs.append(f"{current_time} - INFO - Maksimum sonuç: {max_results}")
-        logs.append(f"{current_time} - INFO - Tarayıcı modu: {'Gizli' if headless else 'Görünür'}")
-        log_area.text_area("Loglar:", "\n".join(logs), height=300)
+        log_panel.add("Kazıyıcı başlatılıyor...")
+        log_panel.add(f"Hedef: {country} - {query_type}")
+        log_panel.add(f"Maksimum sonuç: {max_results}")
+        log_panel.add(f"Tarayıcı modu: {'Gizli' if headless else 'Görünür'}")
         
         status_text.text("🚀 Kazıyıcı başlatılıyor...")
         progress_bar.progress(10)
         
         scraper = GoogleMapsScraper(headless=headless)
-        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        logs.append(f"{current_time} - INFO - Tarayıcı başlatıldı")
-        log_area.text_area("Loglar:", "\n".join(logs), height=300)
+        log_panel.add("Tarayıcı başlatıldı")
+        
+        # Loaded before the output file is rewritten
+        if delta_mode:
+            delta = _load_delta(csv_dir, country, query_type, log_panel)
+        
+        if output_format == "jsonl":
+            os.makedirs(csv_dir, exist_ok=True)
+            jsonl_writer = JsonlWriter(os.path.join(csv_dir, f"{country.lower()}_{query_type}.jsonl"))
+            log_panel.add(f"Sonuçlar kazındıkça yazılıyor: {jsonl_writer.filename}")
         
         status_text.text("🔍 Arama yapılıyor...")
         progress_bar.progress(30)
         
-        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        logs.append(f"{current_time} - INFO - Google Maps'te arama: {search_query}")
-        log_area.text_area("Loglar:", "\n".join(logs), height=300)
+        log_panel.add(f"Google Maps'te arama: {search_query}")
         
         # Capture scraper logs and run scraping
-        businesses = _scrape_with_log_capture(scraper, country, query_type, max_results, logs, log_area, business_progress, progress_bar)
+        businesses = _scrape_with_log_capture(scraper, country, query_type, max_results, log_panel, business_progress, progress_bar,
+                                              on_record=jsonl_writer, delta=delta)
+        if jsonl_writer:
+            jsonl_writer.close()
+        
+        stop_reason = getattr(scraper, "last_stop_reason", None)
+        if stop_reason:
+            log_panel.add(f"Kaydırma durdu: {STOP_REASON_LABELS.get(stop_reason, stop_reason)}")
+            st.caption(f"⏹️ Kaydırma durma nedeni: {STOP_REASON_LABELS.get(stop_reason, stop_reason)}")
         
         status_text.text("📋 Veriler işleniyor...")
         progress_bar.progress(90)
         
         if businesses:
-            current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            logs.append(f"{current_time} - INFO - Toplam {len(businesses)} işletme kazındı")
-            logs.append(f"{current_time} - INFO - DataFrame oluşturuluyor...")
-            log_area.text_area("Loglar:", "\n".join(logs), height=300)
+            log_panel.add(f"Toplam {len(businesses)} işletme kazındı")
+            log_panel.add("DataFrame oluşturuluyor...")
             
-            df2 = pd.DataFrame(businesses)
+            df2 = records_to_dataframe(businesses)
             
             progress_bar.progress(100)
             status_text.text("✅ Kazıma tamamlandı!")
             
-            current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            logs.append(f"{current_time} - INFO - Kazıma başarıyla tamamlandı!")
-            log_area.text_area("Loglar:", "\n".join(logs), height=300)
+            log_panel.add("Kazıma başarıyla tamamlandı!")
+            log_panel.render(force=True)
             
             st.success(f"{len(df2)} işletme kazındı.")
             st.dataframe(df2)
             
             _show_valid_numbers(df2)
-            _save_csv_file(df2, country, query_type, csv_dir, logs, log_area)
+            if delta is not None:
+                _show_change_set(delta.change_set(complete=getattr(scraper, "result_list_exhausted", False)),
+                                 csv_dir, f"{country.lower()}_{query_type}", log_panel)
+            if jsonl_writer:
+                _finish_jsonl_file(jsonl_writer, log_panel)
+            else:
+                _save_csv_file(df2, country, query_type, csv_dir, log_panel)
         else:
-            current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            logs.append(f"{current_time} - WARNING - Hiçbir işletme bulunamadı")
-            log_area.text_area("Loglar:", "\n".join(logs), height=300)
+            log_panel.add("Hiçbir işletme bulunamadı", level="WARNING")
             st.warning("Hiçbir işletme kazınamadı.")
     except Exception as e:
-        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        logs.append(f"{current_time} - ERROR - {str(e)}")
-        log_area.text_area("Loglar:", "\n".join(logs), height=300)
+        log_panel.add(str(e), level="ERROR")
         st.error(f"Kazıma sırasında hata: {e}")
+    finally:
+        if jsonl_writer:
+            jsonl_writer.close()
+        log_panel.close()
 
-def _scrape_with_log_capture(scraper, country, query_type, max_results, logs, log_area, business_progress, progress_bar):
+def _scrape_with_log_capture(scraper, country, query_type, max_results, log_panel, business_progress, progress_bar, on_record=None,
+                             delta=None):
     """Scrape businesses and capture real-time logs"""
-    import datetime
     import logging
-    import io
-    import sys
+    import logging.handlers
+    import queue
     import threading
     import time
     
     businesses = []
     
+    # Scraper log records are queued by the worker thread and drained here
+    log_queue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.setLevel(logging.INFO)
+    
+    # Get the scraper's logger
+    scraper_logger = logging.getLogger()
+    scraper_logger.addHandler(handler)
+    scraper_logger.setLevel(logging.INFO)
+    
+    def drain_logs():
+        while True:
+            try:
+                record = log_queue.get_nowait()
+            except queue.Empty:
+                return
+            line = record.getMessage().strip()
+            if not line:
+                continue
+            log_panel.add_raw(line)
+            
+            # Check if this is a business scraping log
+            if "Scraped" in line and "/" in line:
+                try:
+                    # Extract business count from log
+                    parts = line.split("Scraped ")[1]
+                    current_business = int(parts.split("/")[0])
+                    total_business = int(parts.split("/")[1].split(":")[0])
+                    business_name = parts.split(": ")[1] if ": " in parts else "Unknown"
+                    
+                    # Update progress
+                    progress = 30 + (current_business / total_business) * 50
+                    progress_bar.progress(int(progress))
+                    business_progress.text(f"🏢 {current_business}/{total_business}: {business_name}")
+                except (IndexError, ValueError, ZeroDivisionError):
+                    pass
+    
     try:
-        # Create a custom log handler to capture scraper logs
-        log_capture = io.StringIO()
-        handler = logging.StreamHandler(log_capture)
-        handler.setLevel(logging.INFO)
-        
-        # Get the scraper's logger
-        scraper_logger = logging.getLogger()
-        scraper_logger.addHandler(handler)
-        scraper_logger.setLevel(logging.INFO)
-        
-        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        logs.append(f"{current_time} - INFO - İşletme arama başlatılıyor...")
-        log_area.text_area("Loglar:", "\n".join(logs), height=300)
+        log_panel.add("İşletme arama başlatılıyor...")
         
         # Start scraping in a separate thread to capture logs
         def scrape_worker():
             nonlocal businesses
-            businesses = scraper.scrape_businesses(country, query_type, max_results)
+            options = {"delta": delta} if delta is not None else {}
+            businesses = scraper.scrape_businesses(country, query_type, max_results, on_record=on_record, **options)
         
         scrape_thread = threading.Thread(target=scrape_worker)
         scrape_thread.start()
         
         # Monitor logs while scraping
-        last_log_pos = 0
-        business_count = 0
-        
         while scrape_thread.is_alive():
-            # Get new log content
-            log_content = log_capture.getvalue()
-            if len(log_content) > last_log_pos:
-                new_logs = log_content[last_log_pos:].strip()
-                if new_logs:
-                    # Process new log lines
-                    for line in new_logs.split('\n'):
-                        if line.strip():
-                            logs.append(line.strip())
-                            
-                            # Check if this is a business scraping log
-                            if "Scraped" in line and "/" in line:
-                                try:
-                                    # Extract business count from log
-                                    parts = line.split("Scraped ")[1]
-                                    current_business = int(parts.split("/")[0])
-                                    total_business = int(parts.split("/")[1].split(":")[0])
-                                    business_name = parts.split(": ")[1] if ": " in parts else "Unknown"
-                                    
-                                    # Update progress
-                                    progress = 30 + (current_business / total_business) * 50
-                                    progress_bar.progress(int(progress))
-                                    business_progress.text(f"🏢 {current_business}/{total_business}: {business_name}")
-                                    business_count = current_business
-                                except:
-                                    pass
-                    
-                    # Update log display
-                    log_area.text_area("Loglar:", "\n".join(logs[-50:]), height=300)  # Show last 50 lines
-                    last_log_pos = len(log_content)
-            
+            drain_logs()
+            log_panel.render()
             time.sleep(0.5)  # Check for new logs every 0.5 seconds
         
-        # Wait for thread to complete
+        # Wait for thread to complete and get any remaining logs
         scrape_thread.join()
-        
-        # Get any remaining logs
-        final_log_content = log_capture.getvalue()
-        if len(final_log_content) > last_log_pos:
-            new_logs = final_log_content[last_log_pos:].strip()
-            if new_logs:
-                for line in new_logs.split('\n'):
-                    if line.strip():
-                        logs.append(line.strip())
-        
-        # Clean up
-        scraper_logger.removeHandler(handler)
-        handler.close()
-        
+        drain_logs()
         return businesses
         
     except Exception as e:
-        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        logs.append(f"{current_time} - ERROR - Scraping error: {str(e)}")
-        log_area.text_area("Loglar:", "\n".join(logs), height=300)
+        log_panel.add(f"Scraping error: {str(e)}", level="ERROR")
         return businesses
+    finally:
+        # Clean up
+        scraper_logger.removeHandler(handler)
+        handler.close()
+
+def _load_delta(csv_dir, country, query_type, log_panel):
+    """Load the stored results of this query for a delta re-scrape"""
+    from scrape_delta import DeltaIndex
+    
+    base_name = f"{country.lower()}_{query_type}"
+    for extension in (".csv", ".jsonl"):
+        path = os.path.join(csv_dir, base_name + extension)
+        if os.path.exists(path):
+            delta = DeltaIndex.from_file(path)
+            log_panel.add(f"Delta modu: {os.path.basename(path)} dosyasındaki {len(delta)} işletme ile karşılaştırılıyor")
+            return delta
+    
+    log_panel.add("Delta modu: bu arama için kayıtlı sonuç yok, tüm işletmeler açılacak", level="WARNING")
+    return DeltaIndex([])
+
+def _show_change_set(change_set, csv_dir, base_name, log_panel):
+    """Show and save the businesses added, changed and disappeared since the stored results"""
+    import datetime
+    
+    st.markdown("#### 🔁 Değişiklikler")
+    summary = change_set.summary()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("🆕 Yeni", summary["added"])
+    col2.metric("✏️ Değişen", summary["changed"])
+    col3.metric("✅ Değişmeyen (tıklanmadı)", summary["unchanged"])
+    col4.metric("❌ Kaybolan", summary["disappeared"] if change_set.complete else "-")
+    if not change_set.complete:
+        st.caption("Liste sonuna kadar taranmadığı için kaybolan işletmeler hesaplanmadı.")
+    log_panel.add(f"Delta: {summary['added']} yeni, {summary['changed']} değişen, "
+                  f"{summary['unchanged']} değişmeyen, {summary['disappeared']} kaybolan")
+    
+    changes = change_set.records()
+    if not changes:
+        st.info("Kayıtlı sonuçlara göre değişiklik yok.")
+        return
+    
+    changes_df = records_to_dataframe(changes)
+    st.dataframe(changes_df, use_container_width=True)
+    
+    # Kept out of csv_files itself so the change lists are not merged as businesses
+    changes_dir = os.path.join(csv_dir, "changes")
+    os.makedirs(changes_dir, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_path = os.path.join(changes_dir, f"{base_name}_{stamp}.csv")
+    changes_df.to_csv(out_path, index=False)
+    st.download_button("Değişiklikleri CSV olarak indir", changes_df.to_csv(index=False).encode('utf-8'),
+                       os.path.basename(out_path), "text/csv")
+    log_panel.add(f"Değişiklikler kaydedildi: {out_path}")
 
 def _save_custom_search(search_term, language):
     """Save custom search term to file"""
@@ -320,7 +420,7 @@ def _save_custom_search(search_term, language):
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(saved_searches, f, ensure_ascii=False, indent=2)
 
-def _show_saved_searches(language):
+def _show_saved_searches(language, GoogleMapsScraper=None, country=None, max_results=15, headless=True):
     """Show saved custom searches"""
     import os
     import json
@@ -335,17 +435,114 @@ def _show_saved_searches(language):
             with st.expander(f"💾 Kaydedilmiş Özel Aramalar ({len(saved_searches[lang_key])} adet)"):
                 for term in saved_searches[lang_key]:
                     st.write(f"• {term}")
+                
+                if GoogleMapsScraper and country:
+                    workers = st.number_input("Aynı anda çalışan tarayıcı:", min_value=1, max_value=4, value=1,
+                                              key="saved_search_workers")
+                    if st.button("▶️ Kaydedilmiş aramaların hepsini çalıştır", key="run_saved_searches"):
+                        _run_saved_searches(GoogleMapsScraper, saved_searches[lang_key], country, max_results, headless, workers)
     except (FileNotFoundError, json.JSONDecodeError):
         pass
 
+def _run_saved_searches(GoogleMapsScraper, terms, country, max_results, headless, workers):
+    """Run saved searches through the job scheduler and save each result"""
+    from scrape_scheduler import ScrapeScheduler, DONE
+    
+    scheduler = ScrapeScheduler(scraper_factory=lambda: GoogleMapsScraper(headless=headless))
+    for term in terms:
+        scheduler.submit(country, term, max_results, user="saved_searches")
+    _run_scheduler(scheduler, workers)
+    
+    csv_dir = os.path.join(os.getcwd(), "csv_files")
+    os.makedirs(csv_dir, exist_ok=True)
+    saved = 0
+    for job in scheduler.jobs:
+        if job.status == DONE and job.results:
+            records_to_dataframe(job.results).to_csv(os.path.join(csv_dir, f"{country.lower()}_{job.query}.csv"), index=False)
+            saved += 1
+    if saved:
+        _index_csv_files()
+    
+    cache = scheduler.detail_cache
+    st.success(f"✅ {saved}/{len(scheduler.jobs)} arama kaydedildi. "
+               f"Ortak detay önbelleği: {cache.hits} işletme tekrar tıklanmadan dolduruldu.")
+
+def _run_scheduler(scheduler, workers):
+    """Run all queued jobs of a scheduler while showing a live job table"""
+    import threading
+    import time
+    
+    status_table = st.empty()
+    progress_bar = st.progress(0)
+    runner = threading.Thread(target=scheduler.run, kwargs={"workers": workers})
+    runner.start()
+    # Jobs run in worker threads; the table is refreshed from this thread only
+    while runner.is_alive():
+        finished = sum(1 for job in scheduler.jobs if job.status not in ("pending", "running"))
+        progress_bar.progress(finished / len(scheduler.jobs))
+        status_table.dataframe(pd.DataFrame([job.summary() for job in scheduler.jobs]), hide_index=True)
+        time.sleep(0.5)
+    runner.join()
+    progress_bar.progress(1.0)
+    status_table.dataframe(pd.DataFrame([job.summary() for job in scheduler.jobs]), hide_index=True)
+
+def _run_composite_scraping(GoogleMapsScraper, country, query_type, sub_queries, max_results, headless, workers, output_format="csv",
+                            delta_mode=False):
+    """Scrape each category of a composite query concurrently and merge the results"""
+    from scrape_scheduler import ScrapeScheduler
+    from scrape_delta import combine_change_sets
+    from query_splitter import merge_results
+    
+    csv_dir = os.path.join(os.getcwd(), "csv_files")
+    st.markdown("### 🧩 Alt Sorgular")
+    
+    log_panel = LogPanel(st.empty(), name="scrape")
+    try:
+        # The merged results are stored under the composite query; every
+        # sub-query is compared with all of them through its own fork
+        delta = _load_delta(csv_dir, country, query_type, log_panel) if delta_mode else None
+        
+        scheduler = ScrapeScheduler(scraper_factory=lambda: GoogleMapsScraper(headless=headless))
+        jobs = [(sub_query.category, scheduler.submit(country, sub_query.query, max_results, user="composite",
+                                                      delta=delta.fork() if delta is not None else None))
+                for sub_query in sub_queries]
+        _run_scheduler(scheduler, workers)
+        
+        businesses = merge_results((category, job.results) for category, job in jobs)
+        total = sum(len(job.results) for _, job in jobs)
+        log_panel.add(f"{len(sub_queries)} alt sorgu: {total} sonuç, tekrarlar çıkarıldıktan sonra {len(businesses)} işletme")
+        
+        if not businesses:
+            st.warning("Hiçbir işletme kazınamadı.")
+            return
+        
+        df = records_to_dataframe(businesses)
+        st.success(f"{len(df)} işletme kazındı ({len(sub_queries)} alt sorgu birleştirildi).")
+        st.dataframe(df)
+        _show_valid_numbers(df)
+        if delta is not None:
+            change_set = combine_change_sets((job.delta for _, job in jobs),
+                                             complete=all(job.result_list_exhausted for _, job in jobs))
+            _show_change_set(change_set, csv_dir, f"{country.lower()}_{query_type}", log_panel)
+        
+        if output_format == "jsonl":
+            os.makedirs(csv_dir, exist_ok=True)
+            with JsonlWriter(os.path.join(csv_dir, f"{country.lower()}_{query_type}.jsonl")) as jsonl_writer:
+                for business in businesses:
+                    jsonl_writer.write(business)
+            _finish_jsonl_file(jsonl_writer, log_panel)
+        else:
+            _save_csv_file(df, country, query_type, csv_dir, log_panel)
+    finally:
+        log_panel.close()
+
 def _show_valid_numbers(df):
     """Show valid mobile numbers from scraped data"""
     if "phone" in df.columns:
-        valid_phones = []
-        for idx, row in df.iterrows():
-            phone = str(row["phone"]).replace(" ", "")
-            if phone and phone != "nan" and is_valid_turkish_mobile(phone):
-                valid_phones.append({"name": row.get('name', 'İşletme'), "phone": phone})
+        canonical = normalize_turkish_mobiles(df["phone"])
+        valid_df = df.assign(phone=canonical)[canonical.notna()].drop_duplicates(subset="phone")
+        names = valid_df['name'].tolist() if 'name' in valid_df.columns else ['İşletme'] * len(valid_df)
+        valid_phones = [BusinessRecord(name=name, phone=phone) for name, phone in zip(names, valid_df["phone"].tolist())]
         
         if valid_phones:
             st.success(f"📱 {len(valid_phones)} geçerli cep telefonu numarası bulundu")
@@ -359,21 +556,42 @@ def _show_valid_numbers(df):
     else:
         st.warning("Sonuçlarda 'phone' sütunu bulunamadı.")
 
-def _save_csv_file(df, country, query_type, csv_dir, logs, log_area):
+def _index_csv_files():
+    """Merge new or changed CSV files into the searchable master dataset"""
+    from master_dataset import MasterDataset
+    
+    master = MasterDataset()
+    try:
+        master.refresh()
+    finally:
+        master.close()
+
+def _finish_jsonl_file(jsonl_writer, log_panel):
+    """Offer the streamed JSONL file for download and index it"""
+    # The open file is handed to Streamlit, as the Excel export does, instead of an in-memory copy
+    with open(jsonl_writer.filename, 'rb') as f:
+        st.download_button("Sonuçları JSONL olarak indir", f,
+                           os.path.basename(jsonl_writer.filename), "application/x-ndjson")
+    _index_csv_files()
+    
+    log_panel.add(f"✅ JSONL kaydedildi: {jsonl_writer.filename} ({jsonl_writer.count} kayıt)")
+    log_panel.render(force=True)
+
+def _save_csv_file(df, country, query_type, csv_dir, log_panel):
     """Save scraped data to CSV file"""
     # Option to download CSV
     csv = df.to_csv(index=False).encode('utf-8')
     st.download_button("Sonuçları CSV olarak indir", csv, f"{country.lower()}_{query_type}.csv", "text/csv")
     
     # Save to csv_files directory
-    logs.append("💾 CSV dosyası kaydediliyor...")
-    log_area.text_area("Loglar:", "\n".join(logs), height=200)
+    log_panel.add("💾 CSV dosyası kaydediliyor...")
     
     out_path = os.path.join(csv_dir, f"{country.lower()}_{query_type}.csv")
     df.to_csv(out_path, index=False)
+    _index_csv_files()
     
-    logs.append(f"✅ CSV kaydedildi: {out_path}")
-    log_area.text_area("Loglar:", "\n".join(logs), height=200)
+    log_panel.add(f"✅ CSV kaydedildi: {out_path}")
+    log_panel.render(force=True)
     
     st.info(f"Sonuçlar ayrıca {out_path} konumuna kaydedildi")
     
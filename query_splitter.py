@@ -0,0 +1,224 @@
+"""
+Split composite search queries into per-category sub-queries.
+
+Users type queries like "Antalya, otel restoran, kafe, kitap kafe". Sent to
+Maps as one string, such a query returns a single mixed and capped feed.
+split_composite_query() turns it into one sub-query per category
+("otel Antalya", "restoran Antalya", "kafe Antalya", "kitap kafe Antalya"),
+which can be scraped concurrently and merged with merge_results().
+
+The location is either given explicitly or taken from the leading comma
+separated parts that start with a Turkish province (e.g. "Amasya, Taşova")
+or from a province at the start of the first part ("istanbul turist dostu
+restoran").
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from business_record import BusinessRecord, parse_coordinate
+from spatial_index import SpatialIndex
+from wp_message_sender import normalize_turkish_mobile
+
+_TURKISH_FOLD = str.maketrans("ıİşŞğĞüÜöÖçÇâÂîÎ", "iissgguuooccaaii")
+# Businesses with the same name this close are one place found by two sub-queries
+DUPLICATE_RADIUS_KM = 0.05
+
+_SEPARATOR_RE = re.compile(r"\s*(?:,|;|/|&|\+|\bve\b|\band\b)\s*", re.IGNORECASE)
+
+PROVINCES = frozenset("""
+adana adiyaman afyonkarahisar afyon agri aksaray amasya ankara antalya ardahan artvin aydin
+balikesir bartin batman bayburt bilecik bingol bitlis bolu burdur bursa canakkale cankiri
+corum denizli diyarbakir duzce edirne elazig erzincan erzurum eskisehir gaziantep giresun
+gumushane hakkari hatay igdir isparta istanbul izmir kahramanmaras karabuk karaman kars
+kastamonu kayseri kilis kirikkale kirklareli kirsehir kocaeli konya kutahya malatya manisa
+mardin mersin mugla mus nevsehir nigde ordu osmaniye rize sakarya samsun sanliurfa siirt
+sinop sivas sirnak tekirdag tokat trabzon tunceli usak van yalova yozgat zonguldak
+""".split())
+
+# Business categories (folded); two word phrases are matched before single words
+CATEGORIES = frozenset("""
+restoran restorant restaurant lokanta kafe cafe kafeterya otel hotel pansiyon hostel market
+supermarket eczane pharmacy kuafor berber bar pub meyhane pastane firin bakery kasap manav
+kebapci pizzaci emlakci veteriner kirtasiye cicekci gym store
+""".split()) | frozenset({
+    "kitap kafe", "nargile kafe", "oyun salonu", "spor salonu", "dugun salonu", "guzellik salonu",
+    "oto tamiri", "oto yikama", "dis hekimi", "hair salon", "coffee shop",
+})
+
+
+class SubQuery(NamedTuple):
+    """One category of a composite query."""
+    query: str
+    category: str
+
+
+def fold_turkish(text: str) -> str:
+    """Lowercase text and fold Turkish letters to ASCII for matching."""
+    return text.translate(_TURKISH_FOLD).casefold()
+
+
+def _category_words(words: List[str]) -> List[Tuple[str, bool]]:
+    """Group words into (phrase, is_category) pairs, preferring two word categories."""
+    groups = []
+    i = 0
+    while i < len(words):
+        pair = " ".join(words[i:i + 2])
+        if i + 1 < len(words) and fold_turkish(pair) in CATEGORIES:
+            groups.append((pair, True))
+            i += 2
+        else:
+            groups.append((words[i], fold_turkish(words[i]) in CATEGORIES))
+            i += 1
+    return groups
+
+
+def split_composite_query(query: str, location: Optional[str] = None) -> List[SubQuery]:
+    """
+    Split a composite query into one sub-query per category.
+
+    Args:
+        query: The query as typed, e.g. "Antalya, otel restoran, kafe"
+        location: Optional explicit location; detected from the query when None
+
+    Returns:
+        Sub-queries in input order without duplicates. Without an explicit
+        location, a query that names a single category is returned unchanged.
+
+    Examples:
+        >>> [sub.query for sub in split_composite_query("Antalya, otel restoran, kafe")]
+        ['otel Antalya', 'restoran Antalya', 'kafe Antalya']
+        >>> [sub.query for sub in split_composite_query("otel, pansiyon, kafe restoran Kepez")]
+        ['otel Kepez', 'pansiyon Kepez', 'kafe Kepez', 'restoran Kepez']
+        >>> [sub.query for sub in split_composite_query("kafe restoran Antalya")]
+        ['kafe Antalya', 'restoran Antalya']
+        >>> [sub.query for sub in split_composite_query("kafe, restoran merkez")]
+        ['kafe merkez', 'restoran merkez']
+        >>> [sub.query for sub in split_composite_query("Antalya, otel, kafe merkez")]
+        ['otel Antalya merkez', 'kafe Antalya merkez']
+        >>> [sub.query for sub in split_composite_query("antalya, deniz kenarı kafe restoran")]
+        ['deniz kenarı kafe antalya', 'deniz kenarı restoran antalya']
+        >>> [sub.query for sub in split_composite_query("istanbul turist dostu restoran")]
+        ['istanbul turist dostu restoran']
+    """
+    parts = [part for part in _SEPARATOR_RE.split(query.strip()) if part]
+    location_parts = [] if location is None else [location.strip()]
+    categories: List[str] = []  # categories with their qualifiers
+
+    for index, part in enumerate(parts):
+        words = part.split()
+        groups = _category_words(words)
+        has_category = any(is_category for _, is_category in groups)
+
+        if location is None and not categories and not has_category and len(parts) > 1:
+            # Leading parts without a category are the location ("Amasya, Taşova, ...")
+            # as long as they start with a province
+            if location_parts or fold_turkish(words[0]) in PROVINCES:
+                location_parts.append(part)
+                continue
+
+        if not has_category:
+            categories.append(part)
+            continue
+
+        # Words before the first category qualify each of them ("deniz kenarı
+        # kafe restoran" -> "deniz kenarı kafe", "deniz kenarı restoran"); words
+        # between two categories belong to the next one
+        first = next(i for i, (_, is_category) in enumerate(groups) if is_category)
+        last = max(i for i, (_, is_category) in enumerate(groups) if is_category)
+        qualifier_words = [phrase for phrase, _ in groups[:first]]
+        if (location is None and index == 0 and not location_parts and qualifier_words
+                and fold_turkish(qualifier_words[0]) in PROVINCES):
+            location_parts.append(qualifier_words.pop(0))
+        qualifier = " ".join(qualifier_words)
+
+        # Words after the last category: the location at the end of the query
+        # ("kafe restoran Kepez"), otherwise they qualify this part's categories
+        suffix = " ".join(phrase for phrase, _ in groups[last + 1:])
+        if suffix and location is None and index == len(parts) - 1:
+            location_parts.append(suffix)
+            suffix = ""
+
+        pending = []
+        for phrase, is_category in groups[first:last + 1]:
+            pending.append(phrase)
+            if is_category:
+                categories.append(" ".join(filter(None, (qualifier, " ".join(pending), suffix))))
+                pending = []
+
+    place = " ".join(location_parts)
+    sub_queries: List[SubQuery] = []
+    seen = set()
+    for category in categories:
+        text = " ".join(filter(None, (category, place)))
+        key = fold_turkish(text)
+        if key not in seen:
+            seen.add(key)
+            sub_queries.append(SubQuery(text, category))
+
+    if len(sub_queries) <= 1 and location is None:
+        return [SubQuery(query.strip(), query.strip())]
+    return sub_queries
+
+
+def _name_key(business) -> str:
+    return " ".join(fold_turkish(str(business.get("name") or "")).split())
+
+
+def _business_key(business: Dict[str, str]) -> str:
+    phone = normalize_turkish_mobile(business.get("phone"))
+    if phone:
+        return "tel:" + phone
+    return "name:" + "|".join(
+        " ".join(fold_turkish(str(business.get(field) or "")).split()) for field in ("name", "address")
+    )
+
+
+def merge_results(results: Iterable[Tuple[str, List[Dict[str, str]]]]) -> List[BusinessRecord]:
+    """
+    Merge sub-query results, dropping duplicate businesses.
+
+    Businesses are matched on their canonical mobile number, otherwise on
+    name and address; businesses with coordinates are also matched on name
+    within DUPLICATE_RADIUS_KM, since overlapping sub-queries may render the
+    address of the same place differently. Each merged record gets a
+    'search_category' field with the categories it was found under, joined
+    with "; ".
+
+    Args:
+        results: (category, businesses) pairs in sub-query order
+
+    Returns:
+        Merged businesses in first-seen order
+    """
+    merged: Dict[str, BusinessRecord] = {}
+    places: SpatialIndex = SpatialIndex(cell_km=DUPLICATE_RADIUS_KM * 4)
+    for category, businesses in results:
+        for business in businesses:
+            key = _business_key(business)
+            existing = merged.get(key)
+            latitude = parse_coordinate(business.get("latitude"))
+            longitude = parse_coordinate(business.get("longitude"))
+            has_coordinates = latitude is not None and longitude is not None
+            if existing is None and has_coordinates:
+                name_key = _name_key(business)
+                nearby = places.within(
+                    latitude, longitude, DUPLICATE_RADIUS_KM,
+                    predicate=lambda record: _name_key(record) == name_key
+                )
+                existing = nearby[0][1] if nearby else None
+            if existing is None:
+                record = BusinessRecord.from_mapping(business)
+                record["search_category"] = category
+                merged[key] = record
+                if has_coordinates:
+                    places.add(record.latitude, record.longitude, record)
+                continue
+            found_under = existing["search_category"].split("; ")
+            if category not in found_under:
+                existing["search_category"] += "; " + category
+            # Fill fields the first copy was missing
+            for field, value in business.items():
+                if value and not existing.get(field):
+                    existing[field] = value
+    return list(merged.values())
@@ -0,0 +1,249 @@
+"""
+Delta re-scrapes: only open the details of new or changed businesses.
+
+Opening a business' details panel is the expensive part of a scrape. When a
+query was scraped before, the result cards alone (name, rating, review count
+and the place id in the card link) are enough to tell whether a business is
+known and unchanged. A DeltaIndex built from the stored results of the
+query is passed to GoogleMapsScraper.scrape_businesses(delta=...): known
+businesses whose rating and review count did not change are filled in from
+the stored record without a click, and every card is classified as added,
+changed or unchanged. Stored businesses not seen again are reported as
+disappeared, but only when the scrape went through the whole result list.
+The sub-queries of a composite query are scraped concurrently, each with a
+fork() of the index, and combine_change_sets() merges their changes.
+"""
+
+import copy
+import logging
+import os
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from business_record import BusinessRecord
+from csv_loader import iter_csv_chunks
+from jsonl_io import iter_jsonl
+from query_splitter import fold_turkish
+
+logger = logging.getLogger(__name__)
+
+# Change states
+ADDED = "added"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+DISAPPEARED = "disappeared"
+
+# Fields only the details panel provides, copied from the stored record
+DETAIL_FIELDS = ("address", "phone", "website", "category")
+
+
+def _name_key(name) -> str:
+    return " ".join(fold_turkish(str(name or "")).split())
+
+
+def load_records(path: str) -> Iterator[BusinessRecord]:
+    """Yield the business records of a stored CSV or JSONL result file."""
+    if path.endswith(".jsonl"):
+        for record in iter_jsonl(path):
+            yield BusinessRecord.from_mapping(record)
+        return
+    for chunk in iter_csv_chunks(path):
+        chunk.columns = [str(col).strip() for col in chunk.columns]
+        for record in chunk.to_dict("records"):
+            yield BusinessRecord.from_mapping(record)
+
+
+class ChangeSet:
+    """Businesses added, changed, unchanged and disappeared since the stored scrape."""
+
+    def __init__(
+        self,
+        added: List[BusinessRecord],
+        changed: List[Tuple[BusinessRecord, BusinessRecord]],
+        unchanged: List[BusinessRecord],
+        disappeared: List[BusinessRecord],
+        complete: bool
+    ):
+        self.added = added
+        self.changed = changed  # (stored, current) pairs
+        self.unchanged = unchanged
+        self.disappeared = disappeared
+        # Whether the whole result list was scraped; otherwise nothing is reported as disappeared
+        self.complete = complete
+
+    def summary(self) -> Dict[str, int]:
+        """Number of businesses per change state."""
+        return {
+            ADDED: len(self.added),
+            CHANGED: len(self.changed),
+            UNCHANGED: len(self.unchanged),
+            DISAPPEARED: len(self.disappeared),
+        }
+
+    def records(self) -> List[BusinessRecord]:
+        """
+        Return the added, changed and disappeared businesses as records with a
+        'change' field; changed ones also carry their previous rating and
+        review count.
+        """
+        rows = []
+        for record in self.added:
+            row = record.copy()
+            row["change"] = ADDED
+            rows.append(row)
+        for stored, current in self.changed:
+            row = current.copy()
+            row["change"] = CHANGED
+            row["previous_rating"] = stored.rating
+            row["previous_num_reviews"] = stored.num_reviews
+            rows.append(row)
+        for record in self.disappeared:
+            row = record.copy()
+            row["change"] = DISAPPEARED
+            rows.append(row)
+        return rows
+
+
+class DeltaIndex:
+    """Stored results of a query, matched against result cards during a re-scrape."""
+
+    def __init__(self, stored: Iterable[Mapping]):
+        """
+        Args:
+            stored: Previously scraped businesses (records or dicts)
+        """
+        self.stored: List[BusinessRecord] = [BusinessRecord.from_mapping(record) for record in stored]
+        self._by_place: Dict[str, int] = {}
+        self._by_name: Dict[str, List[int]] = {}
+        for index, record in enumerate(self.stored):
+            if record.place_id:
+                self._by_place.setdefault(record.place_id, index)
+            self._by_name.setdefault(_name_key(record.name), []).append(index)
+        self._matched: Dict[int, str] = {}  # stored index -> change state
+        self.added: List[BusinessRecord] = []
+        self.changed: List[Tuple[BusinessRecord, BusinessRecord]] = []
+        self.unchanged: List[BusinessRecord] = []
+
+    @classmethod
+    def from_file(cls, path: str) -> "DeltaIndex":
+        """Build the index from a stored CSV or JSONL result file (empty if it does not exist)."""
+        if not os.path.exists(path):
+            return cls([])
+        return cls(load_records(path))
+
+    def __len__(self) -> int:
+        return len(self.stored)
+
+    def fork(self) -> "DeltaIndex":
+        """
+        Return an index over the same stored records with its own match state.
+
+        Concurrent scrapes (the sub-queries of a composite query) each get a
+        fork; combine_change_sets() merges their changes afterwards.
+        """
+        fork = copy.copy(self)
+        fork._matched = {}
+        fork.added, fork.changed, fork.unchanged = [], [], []
+        return fork
+
+    def match(self, card: BusinessRecord) -> Optional[int]:
+        """
+        Return the index of the stored record for a result card, or None.
+
+        Cards are matched on their place id; stored records without one
+        (older files) are matched on the normalized name.
+        """
+        if card.place_id:
+            index = self._by_place.get(card.place_id)
+            if index is not None and index not in self._matched:
+                return index
+        for index in self._by_name.get(_name_key(card.name), ()):
+            stored_place = self.stored[index].place_id
+            if index not in self._matched and (not stored_place or not card.place_id):
+                return index
+        return None
+
+    @staticmethod
+    def is_changed(card: BusinessRecord, stored: BusinessRecord) -> bool:
+        """Whether the card's rating or review count differs from the stored record."""
+        return card.num_reviews != stored.num_reviews or card.rating != stored.rating
+
+    def lookup(self, card: BusinessRecord) -> Tuple[Optional[int], Optional[Dict[str, str]]]:
+        """
+        Classify a result card before its details are opened.
+
+        Returns:
+            Tuple of (stored index or None, stored details); the details are
+            only returned for an unchanged business, which needs no click
+        """
+        index = self.match(card)
+        if index is None:
+            return None, None
+        stored = self.stored[index]
+        if self.is_changed(card, stored):
+            return index, None
+        return index, {field: stored[field] for field in DETAIL_FIELDS}
+
+    def record(self, business: BusinessRecord, index: Optional[int]) -> str:
+        """Register a scraped business and return its change state."""
+        if index is None:
+            self.added.append(business)
+            return ADDED
+        stored = self.stored[index]
+        if self.is_changed(business, stored):
+            state = CHANGED
+            self.changed.append((stored, business))
+        else:
+            state = UNCHANGED
+            self.unchanged.append(business)
+        self._matched[index] = state
+        return state
+
+    def change_set(self, complete: bool = True) -> ChangeSet:
+        """
+        Return the changes found so far.
+
+        Args:
+            complete: Whether the scrape went through the whole result list;
+                stored businesses are only reported as disappeared if so
+        """
+        disappeared = [
+            record for index, record in enumerate(self.stored) if index not in self._matched
+        ] if complete else []
+        return ChangeSet(list(self.added), list(self.changed), list(self.unchanged), disappeared, complete)
+
+
+def combine_change_sets(indexes: Iterable[DeltaIndex], complete: bool = True) -> ChangeSet:
+    """
+    Merge the changes of forks of one DeltaIndex.
+
+    A business found by several forks is reported once, as changed if any
+    fork saw it changed. A stored business is disappeared only if no fork
+    matched it.
+
+    Args:
+        indexes: Forks of the same index
+        complete: Whether every fork's scrape went through its whole result list
+    """
+    indexes = list(indexes)
+    seen = set()
+    changed, unchanged, added = [], [], []
+    for stored, current in (pair for index in indexes for pair in index.changed):
+        if id(stored) not in seen:
+            seen.add(id(stored))
+            changed.append((stored, current))
+    for index in indexes:
+        # record() matches each stored record once, so both are in scrape order
+        unchanged_indexes = [stored_index for stored_index, state in index._matched.items() if state == UNCHANGED]
+        for stored_index, current in zip(unchanged_indexes, index.unchanged):
+            stored = index.stored[stored_index]
+            if id(stored) not in seen:
+                seen.add(id(stored))
+                unchanged.append(current)
+    added_keys = set()
+    for business in (business for index in indexes for business in index.added):
+        key = business.place_id or _name_key(business.name)
+        if key not in added_keys:
+            added_keys.add(key)
+            added.append(business)
+    disappeared = [record for record in indexes[0].stored if id(record) not in seen] if complete and indexes else []
+    return ChangeSet(added, changed, unchanged, disappeared, complete)
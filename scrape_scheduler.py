@@ -0,0 +1,283 @@
+"""
+Priority scheduler for scrape jobs.
+
+Jobs are queued per user and picked by priority, then by how many jobs the
+user already had started (so one user's long list cannot starve the others),
+then by deadline and submission order. Jobs whose deadline has passed
+before a worker is free are expired instead of started.
+
+Queries are compared by their normalized words: an identical query that is
+already queued or running is not submitted twice, and overlapping queries
+(e.g. "kafe restoran Antalya" and "Antalya Kepez kafe") are recorded on the
+job. All jobs share one DetailCache, so a business already opened by one
+job is filled in from the cache by the others instead of being clicked again.
+"""
+
+import re
+import time
+import heapq
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+from query_splitter import fold_turkish
+
+logger = logging.getLogger(__name__)
+
+# Jobs whose word sets share at least this fraction of the smaller set overlap
+OVERLAP_THRESHOLD = 0.5
+
+_WORD_RE = re.compile(r"\w+")
+_STOPWORDS = frozenset({"in", "ve", "and", "the", "de", "da", "ile"})
+
+# Job states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+EXPIRED = "expired"
+
+
+def query_tokens(query: str) -> FrozenSet[str]:
+    """Return the normalized words of a query (case, Turkish letters and stopwords folded)."""
+    return frozenset(word for word in _WORD_RE.findall(fold_turkish(query)) if word not in _STOPWORDS)
+
+
+def query_overlap(first: FrozenSet[str], second: FrozenSet[str]) -> float:
+    """Return the share of the smaller word set that also appears in the other one."""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / min(len(first), len(second))
+
+
+class DetailCache:
+    """Thread-safe store of detail-panel fields keyed by place."""
+
+    def __init__(self):
+        self._details: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        """Return a copy of the cached details for key, or None."""
+        with self._lock:
+            details = self._details.get(key)
+            if details is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(details)
+
+    def put(self, key: str, details: Dict[str, str]) -> None:
+        """Store the details of one place."""
+        with self._lock:
+            self._details[key] = dict(details)
+
+    def __len__(self) -> int:
+        return len(self._details)
+
+
+class ScrapeJob:
+    """A single query to scrape and, once finished, its results."""
+
+    def __init__(
+        self,
+        job_id: int,
+        country: str,
+        query: str,
+        max_results: int,
+        user: str,
+        priority: int,
+        deadline: Optional[float],
+        delta=None
+    ):
+        self.job_id = job_id
+        self.country = country
+        self.query = query
+        self.max_results = max_results
+        self.user = user
+        self.priority = priority
+        self.deadline = deadline  # time.monotonic() value, None for no deadline
+        self.delta = delta  # scrape_delta.DeltaIndex of the stored results, None for a full scrape
+        self.tokens = query_tokens(query)
+        self.overlaps: List[int] = []  # Ids of earlier jobs with overlapping queries
+        self.status = PENDING
+        self.results: List[Dict[str, str]] = []
+        self.errors: List[str] = []
+        self.stop_reason: Optional[str] = None
+        self.result_list_exhausted = False
+        self.duration = 0.0
+
+    def summary(self) -> Dict:
+        """Return the job state without its results."""
+        return {
+            "job_id": self.job_id,
+            "country": self.country,
+            "query": self.query,
+            "user": self.user,
+            "status": self.status,
+            "count": len(self.results),
+            "overlaps": self.overlaps,
+            "stop_reason": self.stop_reason,
+            "duration_s": round(self.duration, 1),
+            "errors": self.errors,
+        }
+
+
+def _default_scraper_factory():
+    from scraper import GoogleMapsScraper
+    return GoogleMapsScraper(headless=True)
+
+
+class ScrapeScheduler:
+    """Runs queued scrape jobs on a pool of workers, one browser per job."""
+
+    def __init__(
+        self,
+        scraper_factory: Optional[Callable[[], object]] = None,
+        detail_cache: Optional[DetailCache] = None
+    ):
+        """
+        Args:
+            scraper_factory: Returns a new GoogleMapsScraper-like object for each job
+            detail_cache: Detail cache shared by all jobs, a new one by default
+        """
+        self.scraper_factory = scraper_factory or _default_scraper_factory
+        self.detail_cache = detail_cache or DetailCache()
+        self.jobs: List[ScrapeJob] = []
+        self._queues: Dict[str, list] = {}
+        self._started_per_user: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        country: str,
+        query: str,
+        max_results: int = 15,
+        user: str = "default",
+        priority: int = 0,
+        timeout: Optional[float] = None,
+        delta=None
+    ) -> ScrapeJob:
+        """
+        Queue a scrape job.
+
+        Args:
+            country: The country to search in
+            query: Type of search query
+            max_results: Maximum number of results to scrape
+            user: Owner of the job, used for fairness
+            priority: Higher runs first
+            timeout: Seconds from now within which the job must start, None for no deadline
+            delta: Optional scrape_delta.DeltaIndex; unchanged businesses are not opened
+
+        Returns:
+            The queued job, or the already queued or running job with the same query
+        """
+        with self._lock:
+            tokens = query_tokens(query)
+            for job in self.jobs:
+                if (job.tokens == tokens and job.country == country and job.status in (PENDING, RUNNING)
+                        and job.max_results >= max_results):
+                    logger.info(f"'{query}' is already scheduled as job {job.job_id}")
+                    return job
+
+            deadline = time.monotonic() + timeout if timeout is not None else None
+            job = ScrapeJob(len(self.jobs) + 1, country, query, max_results, user, priority, deadline, delta)
+            job.overlaps = [
+                other.job_id for other in self.jobs
+                if other.country == country and query_overlap(other.tokens, job.tokens) >= OVERLAP_THRESHOLD
+            ]
+            if job.overlaps:
+                logger.info(f"'{query}' overlaps jobs {job.overlaps}; their details are reused")
+            self.jobs.append(job)
+            heapq.heappush(
+                self._queues.setdefault(user, []),
+                (-priority, deadline if deadline is not None else float("inf"), job.job_id, job)
+            )
+            return job
+
+    def _next_job(self) -> Optional[ScrapeJob]:
+        """Pop the next job to run, expiring jobs whose deadline passed."""
+        with self._lock:
+            while True:
+                best_user, best_key = None, None
+                for user, queue in self._queues.items():
+                    if not queue:
+                        continue
+                    negative_priority, deadline, job_id, _ = queue[0]
+                    key = (negative_priority, self._started_per_user.get(user, 0), deadline, job_id)
+                    if best_key is None or key < best_key:
+                        best_user, best_key = user, key
+                if best_user is None:
+                    return None
+
+                job = heapq.heappop(self._queues[best_user])[3]
+                if job.deadline is not None and time.monotonic() > job.deadline:
+                    job.status = EXPIRED
+                    logger.warning(f"Job {job.job_id} '{job.query}' expired before it could start")
+                    continue
+                self._started_per_user[best_user] = self._started_per_user.get(best_user, 0) + 1
+                job.status = RUNNING
+                return job
+
+    def _run_job(self, job: ScrapeJob) -> None:
+        started = time.monotonic()
+        try:
+            scraper = self.scraper_factory()
+            options = {"delta": job.delta} if job.delta is not None else {}
+            job.results = scraper.scrape_businesses(
+                job.country, job.query, job.max_results, detail_cache=self.detail_cache, **options
+            )
+            job.errors = list(getattr(scraper, "errors", []))
+            job.stop_reason = getattr(scraper, "last_stop_reason", None)
+            job.result_list_exhausted = getattr(scraper, "result_list_exhausted", False)
+            job.status = DONE
+        except Exception as e:
+            logger.error(f"Job {job.job_id} '{job.query}' failed: {str(e)}")
+            job.errors.append(str(e))
+            job.status = FAILED
+        for business in job.results:
+            business["query"] = job.query
+        job.duration = time.monotonic() - started
+
+    def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            self._run_job(job)
+
+    def pending_count(self) -> int:
+        """Number of jobs still waiting for a worker."""
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def run(self, workers: int = 1, executor: Optional[ThreadPoolExecutor] = None) -> List[ScrapeJob]:
+        """
+        Run queued jobs until the queue is empty.
+
+        Args:
+            workers: Number of jobs (browsers) running at the same time
+            executor: Existing pool to run the workers on; a new one is used by default
+
+        Returns:
+            All jobs submitted so far
+        """
+        workers = max(1, workers)
+        if executor is not None:
+            futures = [executor.submit(self._worker) for _ in range(workers)]
+            for future in futures:
+                future.result()
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for future in [pool.submit(self._worker) for _ in range(workers)]:
+                    future.result()
+
+        logger.info(
+            f"Scheduler finished {len(self.jobs)} jobs; detail cache: "
+            f"{self.detail_cache.hits} hits, {self.detail_cache.misses} misses"
+        )
+        return self.jobs
@@ -5,10 +5,15 @@ This script allows users to scrape information about businesses from Google Maps
 based on search criteria such as location and business type.
 """
 
+import re
+import sys
 import time
 import csv
+import json
+import argparse
 import logging
-from typing import Dict, List, Optional, Set
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -20,8 +25,13 @@ from selenium.common.exceptions import (
     TimeoutException,
     NoSuchElementException,
     StaleElementReferenceException,
+    WebDriverException,
 )
 
+from business_record import FIELDS, BusinessRecord, parse_rating, parse_review_count
+from jsonl_io import JsonlWriter, write_jsonl
+from spatial_index import parse_coordinates
+
 
 # Configure logging
 logging.basicConfig(
@@ -31,21 +41,98 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Column order of the output files; fields added later (e.g. 'query') follow these
+BUSINESS_FIELDS = FIELDS
+
+# Renderer memory is read every this many scraped cards
+MEMORY_CHECK_INTERVAL = 10
+# Seconds a trivial script may take before the browser is considered hung
+HEALTH_CHECK_TIMEOUT = 10
+
+# After a scroll the feed is polled this long for new cards
+SCROLL_SETTLE_SECONDS = 4.0
+SCROLL_POLL_SECONDS = 0.25
+# Scrolls in a row without new cards before the feed is considered exhausted
+MAX_IDLE_SCROLLS = 3
+# Errors in a row before giving up on the feed
+MAX_SCROLL_ERRORS = 30
+# Elements Maps shows below the last result
+END_OF_LIST_LOCATORS = (
+    (By.CSS_SELECTOR, "span.HlvSq"),
+    (By.XPATH, "//div[@role='feed']//span[contains(text(), 'end of the list') or contains(text(), 'listenin sonuna')]"),
+)
+
+# Place id ("!19sChIJ...") and feature id ("!1s0x...:0x...") in a result card link
+_PLACE_ID_RE = re.compile(r"!19s([^!?&]+)")
+_FEATURE_ID_RE = re.compile(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)")
+
+# Why the last scrape stopped scrolling (GoogleMapsScraper.last_stop_reason)
+STOP_MAX_RESULTS = "max_results"
+STOP_END_OF_LIST = "end_of_list"
+STOP_NO_GROWTH = "no_growth"
+STOP_ERRORS = "errors"
+STOP_BROWSER_CRASH = "browser_crash"
+STOP_FAILED = "failed"
+
+
+class DriverUnresponsiveError(WebDriverException):
+    """Raised when the browser crashed or stopped answering commands."""
+
 
 class GoogleMapsScraper:
     """Class to handle scraping operations from Google Maps."""
 
-    def __init__(self, headless: bool = False, wait_time: int = 15):
+    def __init__(
+        self,
+        headless: bool = False,
+        wait_time: int = 15,
+        short_wait_time: float = 2,
+        recycle_after_cards: int = 150,
+        memory_limit_mb: float = 1024,
+        max_restarts: int = 3
+    ):
         """
         Initialize the scraper with browser settings.
         
         Args:
             headless: Whether to run the browser in headless mode
-            wait_time: Default wait time for Selenium WebDriverWait
+            wait_time: Wait time for required elements (search box, results, details panel)
+            short_wait_time: Wait time for elements that usually, but not always, appear
+            recycle_after_cards: Restart the browser after this many scraped cards (0 disables)
+            memory_limit_mb: Restart the browser once the page's JS heap exceeds this (0 disables)
+            max_restarts: Crashed or hung browsers replaced per scrape before giving up
         """
+        self.headless = headless
         self.wait_time = wait_time
-        self.driver = self._setup_driver(headless)
+        self.recycle_after_cards = recycle_after_cards
+        self.memory_limit_mb = memory_limit_mb
+        self.recycle_count = 0
+        self.peak_memory_mb: Optional[float] = None
+        self.max_restarts = max_restarts
+        self.restart_count = 0  # Browsers replaced after a crash or hang
+        self.lost_seconds = 0.0  # Time from the last scraped card to a recovered browser
+        self._last_progress = time.monotonic()
+        self._feed_size = 0
+        self.last_stop_reason: Optional[str] = None
+        self._cards_since_recycle = 0
+        self._recycle_reason: Optional[str] = None
+        self._search_query = ""
+        self.short_wait_time = min(short_wait_time, wait_time)
+        self.wait_stats: Dict[str, Dict[str, float]] = {}
+        self._reset_wait_stats()
+        self.errors: List[str] = []  # Errors of the last scrape_businesses call
+        self.on_record: Optional[Callable[[BusinessRecord], None]] = None
+        self.detail_cache = None
+        self.delta = None
+        self._start_driver()
+    
+    def _start_driver(self) -> None:
+        """Start a browser and the waits bound to it."""
+        self.driver = self._setup_driver(self.headless)
+        # Bound page loads so a stuck navigation raises instead of blocking forever
+        self.driver.set_page_load_timeout(self.wait_time * 4)
         self.wait = WebDriverWait(self.driver, self.wait_time)
+        self.short_wait = WebDriverWait(self.driver, self.short_wait_time, poll_frequency=0.2)
         
     def _setup_driver(self, headless: bool) -> webdriver.Chrome:
         """
@@ -73,8 +160,11 @@ class GoogleMapsScraper:
         self, 
         country: str, 
         query_type: str = "companies", 
-        max_results: int = 100
-    ) -> List[Dict[str, str]]:
+        max_results: int = 100,
+        on_record: Optional[Callable[[BusinessRecord], None]] = None,
+        detail_cache=None,
+        delta=None
+    ) -> List[BusinessRecord]:
         """
         Scrape businesses from Google Maps for a specific country and query.
         
@@ -82,47 +172,151 @@ class GoogleMapsScraper:
             country: The country to search in
             query_type: Type of search query (e.g., 'companies', 'restaurants')
             max_results: Maximum number of results to scrape
+            on_record: Optional callback receiving each business as soon as it
+                is scraped (e.g. a JsonlWriter streaming results to disk)
+            detail_cache: Optional shared scrape_scheduler.DetailCache; places
+                found in it are filled in without opening their details panel
+            delta: Optional scrape_delta.DeltaIndex of the stored results of this
+                query; only new businesses and those whose rating or review
+                count changed are opened, and every card is classified in it
             
         Returns:
-            List of dictionaries containing business information
+            List of BusinessRecord objects
         """
         search_query = f"{query_type} in {country}"
         results = []
+        self.errors = []
+        self.on_record = on_record
+        self.detail_cache = detail_cache
+        self.delta = delta
+        self._reset_wait_stats()
+        self._search_query = search_query
+        self._cards_since_recycle = 0
+        self._recycle_reason = None
+        self.recycle_count = 0
+        self.peak_memory_mb = None
+        self.restart_count = 0
+        self.lost_seconds = 0.0
+        self._last_progress = time.monotonic()
+        self._feed_size = 0
+        self.last_stop_reason = None
         
         try:
             # Navigate to Google Maps and perform search
-            self._navigate_to_google_maps()
-            self._handle_cookie_consent()
-            self._perform_search(search_query)
+            self._open_search()
             
-            # Process search results
-            results = self._process_search_results(country, max_results)
+            # Process search results (collected in place, so a failure keeps them)
+            self._process_search_results(country, max_results, results)
             
             logger.info(f"Successfully scraped {len(results)} businesses in {country}")
             return results
             
         except Exception as e:
             logger.error(f"An error occurred during scraping: {str(e)}")
+            self.errors.append(str(e))
+            self.last_stop_reason = STOP_FAILED
             return results
             
         finally:
+            logger.info(f"Stopped scrolling: {self.last_stop_reason}")
+            logger.info(f"Wait time by tier: {self.format_wait_stats()}")
+            if self.recycle_count:
+                logger.info(f"Browser restarted {self.recycle_count} time(s) to bound memory")
+            if self.restart_count:
+                logger.info(
+                    f"Browser restarted {self.restart_count} time(s) after a crash, "
+                    f"{self.lost_seconds:.1f}s lost"
+                )
+            if self.delta is not None:
+                logger.info(
+                    f"Delta: {len(self.delta.added)} added, {len(self.delta.changed)} changed, "
+                    f"{len(self.delta.unchanged)} unchanged (not opened)"
+                )
             self.close()
     
+    def _reset_wait_stats(self) -> None:
+        """Reset the per-tier wait counters."""
+        self.wait_stats = {
+            tier: {"calls": 0, "found": 0, "seconds": 0.0} for tier in ("probe", "short", "full")
+        }
+    
+    def format_wait_stats(self) -> str:
+        """Return the wait counters as a one-line summary."""
+        return ", ".join(
+            f"{tier}: {stats['found']}/{stats['calls']} found in {stats['seconds']:.1f}s"
+            for tier, stats in self.wait_stats.items()
+        )
+    
+    def _count_wait(self, tier: str, started: float, found: bool) -> None:
+        stats = self.wait_stats[tier]
+        stats["calls"] += 1
+        stats["found"] += int(found)
+        stats["seconds"] += time.monotonic() - started
+    
+    def _probe(self, by: str, selector: str):
+        """
+        Return the first matching element if it is present right now, without waiting.
+        
+        Use for optional elements that are usually absent (e.g. overlays).
+        """
+        started = time.monotonic()
+        elements = self.driver.find_elements(by, selector)
+        self._count_wait("probe", started, bool(elements))
+        return elements[0] if elements else None
+    
+    def _wait_short(self, condition):
+        """
+        Wait up to short_wait_time for a likely element; returns None instead of raising.
+        
+        Args:
+            condition: An expected_conditions callable
+        """
+        started = time.monotonic()
+        try:
+            element = self.short_wait.until(condition)
+        except TimeoutException:
+            self._count_wait("short", started, False)
+            return None
+        self._count_wait("short", started, True)
+        return element
+    
+    def _wait_full(self, condition):
+        """
+        Wait up to wait_time for a required element; raises TimeoutException.
+        
+        Args:
+            condition: An expected_conditions callable
+        """
+        started = time.monotonic()
+        try:
+            element = self.wait.until(condition)
+        except TimeoutException:
+            self._count_wait("full", started, False)
+            raise
+        self._count_wait("full", started, True)
+        return element
+    
+    def _open_search(self) -> None:
+        """Open Google Maps in the current browser and run the current search."""
+        self._navigate_to_google_maps()
+        self._handle_cookie_consent()
+        self._perform_search(self._search_query)
+    
     def _navigate_to_google_maps(self) -> None:
         """Navigate to the Google Maps website."""
         self.driver.get("https://www.google.com/maps")
     
     def _handle_cookie_consent(self) -> None:
         """Accept cookies if the consent dialog appears."""
-        try:
-            cookie_accept = self.wait.until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Accept all')]"))
-            )
+        # The dialog is shown with the page or not at all, so a short wait is enough
+        cookie_accept = self._wait_short(
+            EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Accept all')]"))
+        )
+        if cookie_accept:
             cookie_accept.click()
-        except TimeoutException:
+        else:
             # Cookie dialog didn't appear or has different format
             logger.debug("No cookie consent dialog found or it has a different format")
-            pass
     
     def _perform_search(self, query: str) -> None:
         """
@@ -131,35 +325,44 @@ class GoogleMapsScraper:
         Args:
             query: The search query to enter
         """
-        search_box = self.wait.until(EC.presence_of_element_located((By.ID, "searchboxinput")))
+        search_box = self._wait_full(EC.presence_of_element_located((By.ID, "searchboxinput")))
         search_box.clear()
         search_box.send_keys(query)
         search_box.send_keys(Keys.ENTER)
         
         # Wait for results to load
-        self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='feed']")))
+        self._wait_full(EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='feed']")))
         time.sleep(3)  # Additional wait to ensure all elements are loaded
     
-    def _process_search_results(self, country: str, max_results: int) -> List[Dict[str, str]]:
+    def _process_search_results(
+        self,
+        country: str,
+        max_results: int,
+        businesses: Optional[List[BusinessRecord]] = None
+    ) -> List[BusinessRecord]:
         """
         Process the search results to extract business information.
         
         Args:
             country: The country being searched
             max_results: Maximum number of results to process
+            businesses: Optional list the results are appended to
             
         Returns:
-            List of business information dictionaries
+            List of business records
         """
-        businesses = []
+        if businesses is None:
+            businesses = []
         processed_results: Set[str] = set()  # Track processed results by name
-        scroll_attempts = 0
-        max_scroll_attempts = 30
+        idle_scrolls = 0
+        scroll_errors = 0
+        self.last_stop_reason = STOP_MAX_RESULTS
         
-        while len(businesses) < max_results and scroll_attempts < max_scroll_attempts:
+        while len(businesses) < max_results:
             try:
                 # Find all result elements currently visible
                 result_elements = self.driver.find_elements(By.CSS_SELECTOR, "div.Nv2PK")
+                self._feed_size = max(self._feed_size, len(result_elements))
                 logger.debug(f"Found {len(result_elements)} elements in this batch")
                 
                 self._process_visible_results(result_elements, businesses, processed_results, max_results, country)
@@ -168,15 +371,36 @@ class GoogleMapsScraper:
                 if len(businesses) >= max_results:
                     break
                 
+                if self._recycle_reason:
+                    self._recycle_driver(len(result_elements))
+                    continue
+                
                 # Try to load more results by scrolling
-                if not self._scroll_for_more_results(result_elements):
-                    scroll_attempts += 1
+                if self._scroll_for_more_results(result_elements):
+                    idle_scrolls = 0  # Reset if we loaded new results
+                    scroll_errors = 0
+                elif self._end_of_list_reached():
+                    self.last_stop_reason = STOP_END_OF_LIST
+                    break
                 else:
-                    scroll_attempts = 0  # Reset if we loaded new results
+                    idle_scrolls += 1
+                    if idle_scrolls >= MAX_IDLE_SCROLLS:
+                        self.last_stop_reason = STOP_NO_GROWTH
+                        break
                     
             except Exception as e:
+                if isinstance(e, DriverUnresponsiveError) or not self._driver_responsive():
+                    # Dead or hung browser: retrying against it cannot succeed
+                    if not self._recover_driver(e):
+                        self.last_stop_reason = STOP_BROWSER_CRASH
+                        break
+                    idle_scrolls = scroll_errors = 0
+                    continue
                 logger.error(f"Error during scrolling: {str(e)}")
-                scroll_attempts += 1
+                scroll_errors += 1
+                if scroll_errors >= MAX_SCROLL_ERRORS:
+                    self.last_stop_reason = STOP_ERRORS
+                    break
                 time.sleep(1)
         
         return businesses
@@ -184,7 +408,7 @@ class GoogleMapsScraper:
     def _process_visible_results(
         self, 
         result_elements: List, 
-        businesses: List[Dict[str, str]], 
+        businesses: List[BusinessRecord], 
         processed_results: Set[str],
         max_results: int,
         country: str
@@ -210,15 +434,38 @@ class GoogleMapsScraper:
                 if not business_info or business_info.get('name') in processed_results:
                     continue
 
-                # Remove "back to top" button if present (can interfere with clicking)
-                self._remove_back_to_top_button()
-                    
-                # Click to get detailed info
-                element.click()
-                time.sleep(1.5)  # Wait for details panel
+                # Details already opened by another job need no click
+                cache_key = self._card_place_key(business_info) if self.detail_cache is not None else None
+                detailed_info = self.detail_cache.get(cache_key) if cache_key else None
                 
-                # Get additional details from the side panel
-                detailed_info = self._extract_detailed_info()
+                # Neither do businesses unchanged since the stored scrape (delta mode)
+                delta_index = None
+                if self.delta is not None:
+                    delta_index, stored_details = self.delta.lookup(business_info)
+                    if detailed_info is None:
+                        detailed_info = stored_details
+                opened = detailed_info is None
+                
+                if opened:
+                    # Remove "back to top" button if present (can interfere with clicking)
+                    self._remove_back_to_top_button()
+                        
+                    # Click to get detailed info
+                    element.click()
+                    time.sleep(1.5)  # Wait for details panel
+                    
+                    # Get additional details from the side panel
+                    detailed_info = self._extract_detailed_info()
+                    if not detailed_info and not self._driver_responsive():
+                        # Do not try the remaining cards against a dead browser
+                        raise DriverUnresponsiveError("Browser stopped responding")
+                    if detailed_info and cache_key:
+                        self.detail_cache.put(cache_key, detailed_info)
+                    if business_info.latitude is None:
+                        # No coordinates in the card link: take them from the place URL
+                        coordinates = self._page_coordinates()
+                        if coordinates:
+                            business_info.latitude, business_info.longitude = coordinates
                 if detailed_info:
                     business_info.update(detailed_info)
                 
@@ -226,23 +473,176 @@ class GoogleMapsScraper:
                 if business_info.get('name') not in processed_results:
                     businesses.append(business_info)
                     processed_results.add(business_info.get('name'))
+                    if self.delta is not None:
+                        self.delta.record(business_info, delta_index)
+                    if self.on_record:
+                        self.on_record(business_info)
                     logger.info(f"Scraped {len(businesses)}/{max_results}: {business_info.get('name', 'Unknown')}")
+                    self._cards_since_recycle += 1
+                    self._last_progress = time.monotonic()
                 
                 # Try to go back to results list
-                self._return_to_results_list()
+                if opened:
+                    self._return_to_results_list()
+                
+                # Stop the batch; the caller restarts the browser before continuing
+                self._recycle_reason = self._check_recycle()
+                if self._recycle_reason:
+                    break
                 
             except (StaleElementReferenceException, NoSuchElementException) as e:
                 logger.warning(f"Error processing element: {str(e)}")
                 continue
     
+    def renderer_memory_mb(self) -> Optional[float]:
+        """
+        Return the page's used JS heap in MB, or None if the browser does not report it.
+        
+        Uses the Chrome DevTools Performance metrics and falls back to the
+        non-standard performance.memory API.
+        """
+        try:
+            self.driver.execute_cdp_cmd("Performance.enable", {})
+            metrics = self.driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+            used = next(m["value"] for m in metrics if m["name"] == "JSHeapUsedSize")
+        except Exception:
+            try:
+                used = self.driver.execute_script(
+                    "return window.performance.memory ? window.performance.memory.usedJSHeapSize : null"
+                )
+            except Exception:
+                used = None
+        if used is None:
+            return None
+        memory_mb = used / (1024 * 1024)
+        self.peak_memory_mb = max(self.peak_memory_mb or 0.0, memory_mb)
+        return memory_mb
+    
+    def _check_recycle(self) -> Optional[str]:
+        """Return why the browser should be restarted now, or None."""
+        cards = self._cards_since_recycle
+        if not cards:
+            return None
+        if self.recycle_after_cards and cards >= self.recycle_after_cards:
+            return f"{cards} cards"
+        if self.memory_limit_mb and cards % MEMORY_CHECK_INTERVAL == 0:
+            memory_mb = self.renderer_memory_mb()
+            if memory_mb is not None and memory_mb > self.memory_limit_mb:
+                return f"JS heap {memory_mb:.0f} MB"
+        return None
+    
+    def _recycle_driver(self, feed_size: int) -> None:
+        """
+        Replace the browser with a fresh one and scroll the feed back to where it was.
+        
+        Already scraped businesses are skipped by name afterwards, so the
+        scrape continues with the next unseen card.
+        
+        Args:
+            feed_size: Number of result cards that were loaded before the restart
+        """
+        logger.info(f"Restarting browser after {self._recycle_reason} to keep memory bounded")
+        self._recycle_reason = None
+        self._cards_since_recycle = 0
+        self.recycle_count += 1
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        self._reopen_feed(feed_size)
+    
+    def _reopen_feed(self, feed_size: int) -> None:
+        """Start a browser, repeat the search and load the feed up to feed_size cards."""
+        self._start_driver()
+        self._open_search()
+        
+        # Load the feed up to its previous length without opening any card
+        elements = self.driver.find_elements(By.CSS_SELECTOR, "div.Nv2PK")
+        while len(elements) < feed_size and self._scroll_for_more_results(elements):
+            elements = self.driver.find_elements(By.CSS_SELECTOR, "div.Nv2PK")
+    
+    def _driver_responsive(self) -> bool:
+        """Whether the browser answers a trivial script within HEALTH_CHECK_TIMEOUT seconds."""
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            executor.submit(self.driver.execute_script, "return 1").result(timeout=HEALTH_CHECK_TIMEOUT)
+            return True
+        except Exception:
+            return False
+        finally:
+            # Do not wait for a hung call; the thread ends once the driver is killed
+            executor.shutdown(wait=False)
+    
+    def _kill_driver(self) -> None:
+        """
+        Kill chromedriver and its browser processes without talking to the driver.
+        
+        Uses psutil, when installed, to kill the whole process tree; otherwise
+        only chromedriver is killed.
+        """
+        process = getattr(getattr(self.driver, "service", None), "process", None)
+        if process is None or getattr(process, "pid", None) is None:
+            return
+        try:
+            import psutil
+        except ImportError:
+            psutil = None
+        
+        if psutil:
+            try:
+                parent = psutil.Process(process.pid)
+                for child in parent.children(recursive=True):
+                    child.kill()
+                parent.kill()
+            except psutil.Error:
+                pass
+        else:
+            try:
+                process.kill()
+            except OSError:
+                pass
+    
+    def _recover_driver(self, error: Exception) -> bool:
+        """
+        Replace a crashed or hung browser and resume at the previous feed position.
+        
+        Args:
+            error: The exception raised by the dead browser
+            
+        Returns:
+            True if a working browser is back at the feed, False once max_restarts is used up
+        """
+        while self.restart_count < self.max_restarts:
+            self.restart_count += 1
+            logger.warning(
+                f"Browser crashed or stopped responding ({type(error).__name__}), "
+                f"restarting ({self.restart_count}/{self.max_restarts})"
+            )
+            self._kill_driver()
+            try:
+                self._reopen_feed(self._feed_size)
+            except Exception as e:
+                error = e
+                continue
+            self.lost_seconds += time.monotonic() - self._last_progress
+            self._last_progress = time.monotonic()
+            return True
+        
+        message = f"Browser crashed {self.restart_count} time(s), giving up: {str(error)}"
+        logger.error(message)
+        self.errors.append(message)
+        return False
+    
     def _remove_back_to_top_button(self) -> None:
         """Remove the 'back to top' button that can interfere with clicking elements."""
         try:
-            back_to_top = self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.RiRi5e")))
-            # Execute JavaScript to remove the element
-            self.driver.execute_script("arguments[0].remove()", back_to_top)
+            # Usually absent: probe instead of waiting before every card click
+            back_to_top = self._probe(By.CSS_SELECTOR, "div.RiRi5e")
+            if back_to_top:
+                # Execute JavaScript to remove the element
+                self.driver.execute_script("arguments[0].remove()", back_to_top)
         except Exception:
-            # Element not found, continue
+            # Element vanished meanwhile, continue
             pass
     
     def _return_to_results_list(self) -> None:
@@ -271,18 +671,58 @@ class GoogleMapsScraper:
             feed = self.driver.find_element(By.CSS_SELECTOR, "div[role='feed']")
             self.driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", feed)
             
-            # Wait for new results to load
-            time.sleep(2)
-            
-            # Check if we loaded new results
-            new_elements = self.driver.find_elements(By.CSS_SELECTOR, "div.Nv2PK")
-            return len(new_elements) > len(current_elements)
+            # Poll until new results appear, the end marker shows up or the settle time passes
+            deadline = time.monotonic() + SCROLL_SETTLE_SECONDS
+            while True:
+                time.sleep(SCROLL_POLL_SECONDS)
+                new_elements = self.driver.find_elements(By.CSS_SELECTOR, "div.Nv2PK")
+                if len(new_elements) > len(current_elements):
+                    return True
+                if time.monotonic() >= deadline or self._end_of_list_reached():
+                    return False
             
         except Exception as e:
             logger.warning(f"Error scrolling for more results: {str(e)}")
             return False
     
-    def _extract_basic_info_from_card(self, element, country: str) -> Optional[Dict[str, str]]:
+    @staticmethod
+    def _card_place(element) -> Tuple[Optional[str], Optional[Tuple[float, float]]]:
+        """Return the place id (or feature id) and coordinates from a result card's link, if any."""
+        try:
+            href = element.find_element(By.CSS_SELECTOR, "a.hfpxzc").get_attribute("href") or ""
+        except (NoSuchElementException, StaleElementReferenceException):
+            return None, None
+        match = _PLACE_ID_RE.search(href) or _FEATURE_ID_RE.search(href)
+        return (match.group(1) if match else None), parse_coordinates(href)
+    
+    def _page_coordinates(self) -> Optional[Tuple[float, float]]:
+        """Return the coordinates in the URL of the open details panel, if any."""
+        try:
+            return parse_coordinates(self.driver.current_url)
+        except Exception:
+            return None
+    
+    @staticmethod
+    def _card_place_key(business_info: BusinessRecord) -> str:
+        """
+        Return a key identifying the place of a result card.
+        
+        Uses the place id and falls back to name, rating and review count.
+        """
+        if business_info.place_id:
+            return business_info.place_id
+        return f"{business_info.name}|{business_info.rating or ''}|{business_info.num_reviews or ''}"
+    
+    @property
+    def result_list_exhausted(self) -> bool:
+        """Whether the last scrape saw the whole result list (not cut off by max_results or errors)."""
+        return self.last_stop_reason in (STOP_END_OF_LIST, STOP_NO_GROWTH)
+    
+    def _end_of_list_reached(self) -> bool:
+        """Whether Maps shows its "You've reached the end of the list" marker."""
+        return any(self._probe(by, selector) for by, selector in END_OF_LIST_LOCATORS)
+    
+    def _extract_basic_info_from_card(self, element, country: str) -> Optional[BusinessRecord]:
         """
         Extract basic business information from a result card.
         
@@ -291,7 +731,7 @@ class GoogleMapsScraper:
             country: The country being searched
             
         Returns:
-            Dictionary containing basic business information or None if extraction fails
+            Record with the basic business information or None if extraction fails
         """
         try:
             # Extract name
@@ -299,33 +739,26 @@ class GoogleMapsScraper:
             name = name_element.text if name_element else "Unknown"
             
             # Initialize with basic info
-            business_info = {
-                "name": name,
-                "country": country,
-                "address": "",
-                "phone": "",
-                "website": "",
-                "category": "",
-                "rating": "",
-                "num_reviews": "",
-            }
+            business_info = BusinessRecord(name=name, country=country)
             
             # Try to extract rating and review count
             try:
                 rating_element = element.find_element(By.CSS_SELECTOR, "span.MW4etd")
                 if rating_element:
-                    business_info["rating"] = rating_element.text
+                    business_info.rating = parse_rating(rating_element.text)
                     
                 review_count_element = element.find_element(By.CSS_SELECTOR, "span.UY7F9")
                 if review_count_element:
-                    # Clean the review count (remove parentheses)
-                    review_count = review_count_element.text
-                    business_info["num_reviews"] = review_count.strip("()")
+                    # "(1.234)" -> 1234
+                    business_info.num_reviews = parse_review_count(review_count_element.text)
                     
             except (NoSuchElementException, StaleElementReferenceException):
                 # Some elements might not be available for all results
                 pass
-                
+            
+            business_info.place_id, coordinates = self._card_place(element)
+            if coordinates:
+                business_info.latitude, business_info.longitude = coordinates
             return business_info
             
         except Exception as e:
@@ -341,7 +774,7 @@ class GoogleMapsScraper:
         """
         try:
             # Wait for details panel to load
-            self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.rogA2c")))
+            self._wait_full(EC.presence_of_element_located((By.CSS_SELECTOR, "div.rogA2c")))
             time.sleep(1)  # Give a moment for all details to render
             
             detailed_info = {}
@@ -387,7 +820,26 @@ class GoogleMapsScraper:
     def close(self) -> None:
         """Close the browser and clean up resources."""
         if self.driver:
-            self.driver.quit()
+            try:
+                self.driver.quit()
+            except Exception:
+                # The browser is already dead; make sure no process is left behind
+                self._kill_driver()
+
+
+def output_fieldnames(data: Iterable[Dict[str, str]]) -> List[str]:
+    """
+    Return the columns for a set of business records.
+    
+    The canonical BUSINESS_FIELDS come first, followed by any extra fields in
+    the order they first appear, so records with differing keys share one header.
+    """
+    extras = {}
+    for item in data:
+        for key in item:
+            if key not in BUSINESS_FIELDS:
+                extras.setdefault(key, None)
+    return list(BUSINESS_FIELDS) + list(extras)
 
 
 def save_to_csv(data: List[Dict[str, str]], filename: str = "businesses.csv") -> bool:
@@ -407,8 +859,7 @@ def save_to_csv(data: List[Dict[str, str]], filename: str = "businesses.csv") ->
     
     try:
         with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = data[0].keys()
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.DictWriter(csvfile, fieldnames=output_fieldnames(data), restval="")
             
             writer.writeheader()
             for item in data:
@@ -422,6 +873,33 @@ def save_to_csv(data: List[Dict[str, str]], filename: str = "businesses.csv") ->
         return False
 
 
+def save_to_jsonl(data: Iterable[Dict[str, str]], filename: str = "businesses.jsonl") -> bool:
+    """
+    Save business data to a JSONL file, one record per line.
+    
+    Unlike save_to_csv this accepts any iterable (e.g. a generator) and never
+    holds more than one record in memory.
+    
+    Args:
+        data: Business dictionaries to save
+        filename: Name of the output JSONL file
+        
+    Returns:
+        Boolean indicating whether any record was written
+    """
+    try:
+        count = write_jsonl(data, filename)
+    except Exception as e:
+        logger.error(f"Error saving data to JSONL: {str(e)}")
+        return False
+    
+    if not count:
+        logger.warning("No data to save.")
+        return False
+    logger.info(f"{count} records saved to {filename}")
+    return True
+
+
 def get_user_input() -> tuple:
     """
     Get search parameters from user input.
@@ -452,8 +930,177 @@ def get_user_input() -> tuple:
     return country, query_type, max_results
 
 
-def main():
+def read_query_file(path: str, default_country: str) -> List[Tuple[str, str]]:
+    """
+    Read batch queries from a text file.
+    
+    Each non-empty line is either "query" (searched in default_country) or
+    "country | query". Lines starting with '#' are ignored.
+    
+    Args:
+        path: Path of the query file
+        default_country: Country used for lines without one
+        
+    Returns:
+        List of (country, query) tuples
+    """
+    queries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if '|' in line:
+                country, query = (part.strip() for part in line.split('|', 1))
+            else:
+                country, query = default_country, line
+            if country and query:
+                queries.append((country, query))
+    return queries
+
+
+def _run_batch_query(
+    country: str,
+    query: str,
+    max_results: int,
+    headless: bool,
+    sink: Optional[Callable[[Dict[str, str]], None]] = None,
+    scraper_options: Optional[Dict] = None
+) -> Dict:
+    """
+    Scrape a single batch query with its own browser.
+    
+    Args:
+        country: The country to search in
+        query: Type of search query
+        max_results: Maximum number of results to scrape
+        headless: Whether to run the browser headless
+        sink: Optional callback receiving each tagged business as it is scraped
+        scraper_options: Extra GoogleMapsScraper keyword arguments
+    
+    Returns:
+        Run summary with the scraped businesses under 'businesses'
+    """
+    start = time.monotonic()
+    summary = {"country": country, "query": query, "count": 0, "duration_s": 0.0, "errors": []}
+    businesses = []
+    on_record = (lambda business: sink({**business, "query": query})) if sink else None
+    try:
+        scraper = GoogleMapsScraper(headless=headless, **(scraper_options or {}))
+        businesses = scraper.scrape_businesses(country, query, max_results, on_record=on_record)
+        summary["errors"] = scraper.errors
+        summary["wait_stats"] = scraper.wait_stats
+        summary["browser_restarts"] = scraper.recycle_count
+        summary["crash_restarts"] = scraper.restart_count
+        summary["lost_s"] = round(scraper.lost_seconds, 1)
+        summary["stop_reason"] = scraper.last_stop_reason
+    except Exception as e:
+        logger.error(f"Query '{query}' in {country} failed: {str(e)}")
+        summary["errors"].append(str(e))
+    
+    for business in businesses:
+        business["query"] = query
+    summary["count"] = len(businesses)
+    summary["duration_s"] = round(time.monotonic() - start, 1)
+    summary["businesses"] = businesses
+    return summary
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    """
+    Run every query of a query file headless and write combined results.
+    
+    Returns:
+        Exit status: 0 if every query returned results without errors,
+        1 if some queries failed, 2 if all failed or there was nothing to run
+    """
+    try:
+        queries = read_query_file(args.queries_file, args.country)
+    except OSError as e:
+        logger.error(f"Cannot read query file: {str(e)}")
+        return 2
+    if not queries:
+        logger.error("No queries found in the query file.")
+        return 2
+    
+    output = args.output or f"batch_results.{args.format}"
+    # JSONL results are streamed to disk as they are scraped, so a crash keeps
+    # everything scraped so far (in completion order rather than query order)
+    writer = JsonlWriter(output) if args.format == "jsonl" else None
+    scraper_options = {
+        "recycle_after_cards": args.recycle_after,
+        "memory_limit_mb": args.memory_limit_mb,
+        "max_restarts": args.max_restarts,
+    }
+    
+    logger.info(f"Running {len(queries)} queries with {args.workers} worker(s)")
+    summaries = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            futures = [
+                executor.submit(
+                    _run_batch_query, country, query, args.max_results, not args.visible, writer, scraper_options
+                )
+                for country, query in queries
+            ]
+            for future in as_completed(futures):
+                summary = future.result()
+                logger.info(
+                    f"Finished '{summary['query']}' in {summary['country']}: "
+                    f"{summary['count']} businesses in {summary['duration_s']}s"
+                )
+                summaries.append(summary)
+    finally:
+        if writer:
+            writer.close()
+    
+    # Keep the order of the query file in the outputs
+    order = {query: i for i, query in enumerate(queries)}
+    summaries.sort(key=lambda item: order[(item["country"], item["query"])])
+    businesses = [business for summary in summaries for business in summary.pop("businesses")]
+    
+    if writer:
+        saved = writer.count > 0
+        logger.info(f"{writer.count} records streamed to {output}")
+    else:
+        saved = save_to_csv(businesses, output) if businesses else False
+    with open(args.summary, 'w', encoding='utf-8') as f:
+        json.dump({"output": output if saved else None, "queries": summaries}, f, ensure_ascii=False, indent=2)
+    logger.info(f"Run summary written to {args.summary}")
+    
+    failed = sum(1 for summary in summaries if summary["errors"] or not summary["count"])
+    if failed == len(summaries):
+        return 2
+    return 1 if failed else 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments; without --queries-file the scraper runs interactively."""
+    parser = argparse.ArgumentParser(description="Google Maps business scraper")
+    parser.add_argument("--queries-file", help="Text file with one query (or 'country | query') per line")
+    parser.add_argument("--country", default="Turkey", help="Country for queries without one (default: Turkey)")
+    parser.add_argument("--max-results", type=int, default=15, help="Maximum results per query (default: 15)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of concurrent browsers (default: 1)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv",
+                        help="Output format; jsonl streams each business to disk as it is scraped (default: csv)")
+    parser.add_argument("--output", help="Combined output file (default: batch_results.<format>)")
+    parser.add_argument("--summary", default="batch_summary.json", help="Per-query run summary JSON file")
+    parser.add_argument("--recycle-after", type=int, default=150,
+                        help="Restart each browser after this many businesses, 0 to disable (default: 150)")
+    parser.add_argument("--memory-limit-mb", type=float, default=1024,
+                        help="Restart a browser once its page heap exceeds this many MB, 0 to disable (default: 1024)")
+    parser.add_argument("--max-restarts", type=int, default=3,
+                        help="Crashed browsers replaced per query before giving up (default: 3)")
+    parser.add_argument("--visible", action="store_true", help="Show the browser windows instead of running headless")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     """Main function to execute the scraping process."""
+    args = parse_args(argv)
+    if args.queries_file:
+        return run_batch(args)
+    
     logger.info("Google Maps Scraper")
     logger.info("-----------------")
     
@@ -461,7 +1108,7 @@ def main():
     country, query_type, max_results = get_user_input()
     if not country or not query_type:
         logger.error("Missing required input. Exiting.")
-        return
+        return 2
     
     # Initialize scraper
     logger.info(f"Starting to scrape {query_type} - {country}...")
@@ -473,9 +1120,10 @@ def main():
     # Save results
     if businesses:
         save_to_csv(businesses, f"{country.lower()}_{query_type}.csv")
-    else:
-        logger.warning("No businesses were scraped.")
+        return 0
+    logger.warning("No businesses were scraped.")
+    return 1
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
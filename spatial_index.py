@@ -0,0 +1,199 @@
+"""
+Grid spatial index over business coordinates.
+
+Maps place links carry the coordinates of a business ("!3d36.88!4d30.70" in
+the data part, or "@36.88,30.70,15z" in the path); parse_coordinates()
+extracts them. SpatialIndex buckets points into a uniform latitude/longitude
+grid, so radius queries ("cafés within 2 km of this point"), nearest
+neighbour lookups and the search for near-identical records (the same
+business scraped by overlapping queries) only look at the few cells around a
+point instead of the whole dataset.
+"""
+
+import math
+import re
+from typing import Callable, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+EARTH_RADIUS_KM = 6371.0088
+# Kilometres per degree of latitude
+KM_PER_DEGREE = 111.32
+
+_DATA_COORDINATES_RE = re.compile(r"!3d(-?\d+(?:\.\d+)?)!4d(-?\d+(?:\.\d+)?)")
+_PATH_COORDINATES_RE = re.compile(r"@(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?)")
+
+T = TypeVar("T")
+
+
+def parse_coordinates(url: Optional[str]) -> Optional[Tuple[float, float]]:
+    """
+    Return (latitude, longitude) from a Maps place URL, or None.
+
+    The "!3d...!4d..." pair (the place itself) is preferred over "@lat,lng",
+    which is the map viewport and can be off-centre.
+    """
+    if not url:
+        return None
+    match = _DATA_COORDINATES_RE.search(url) or _PATH_COORDINATES_RE.search(url)
+    if not match:
+        return None
+    latitude, longitude = float(match.group(1)), float(match.group(2))
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialIndex(Generic[T]):
+    """Points with attached items, bucketed in a uniform degree grid."""
+
+    def __init__(self, cell_km: float = 1.0):
+        """
+        Args:
+            cell_km: Cell height in kilometres; about the typical query radius
+        """
+        self.cell_deg = cell_km / KM_PER_DEGREE
+        self._cells: Dict[Tuple[int, int], List[Tuple[float, float, T]]] = {}
+        self._size = 0
+
+    @classmethod
+    def from_records(cls, records: Iterable, cell_km: float = 1.0) -> "SpatialIndex":
+        """Index records (mappings) that have 'latitude' and 'longitude'; others are skipped."""
+        index = cls(cell_km)
+        for record in records:
+            latitude, longitude = record.get("latitude"), record.get("longitude")
+            # NaN from DataFrame rows fails both comparisons and is skipped too
+            if latitude is None or longitude is None or not (latitude == latitude and longitude == longitude):
+                continue
+            index.add(float(latitude), float(longitude), record)
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self.cell_deg), math.floor(longitude / self.cell_deg)
+
+    def add(self, latitude: float, longitude: float, item: T) -> None:
+        """Add a point."""
+        self._cells.setdefault(self._cell(latitude, longitude), []).append((latitude, longitude, item))
+        self._size += 1
+
+    def _candidates(self, latitude: float, longitude: float, radius_km: float):
+        """Points in the cells overlapping the bounding box of a circle."""
+        d_lat = radius_km / KM_PER_DEGREE
+        # Degrees of longitude shrink towards the poles
+        d_lng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+        row_min, col_min = self._cell(latitude - d_lat, max(longitude - d_lng, -180.0))
+        row_max, col_max = self._cell(latitude + d_lat, min(longitude + d_lng, 180.0))
+        if (row_max - row_min + 1) * (col_max - col_min + 1) > len(self._cells):
+            # Box larger than the data: scanning the occupied cells is cheaper
+            for points in self._cells.values():
+                yield from points
+            return
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                yield from self._cells.get((row, col), ())
+
+    def within(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        predicate: Optional[Callable[[T], bool]] = None
+    ) -> List[Tuple[float, T]]:
+        """
+        Return the items within radius_km of a point.
+
+        Args:
+            latitude: Latitude of the centre
+            longitude: Longitude of the centre
+            radius_km: Search radius in kilometres
+            predicate: Optional filter on the items (e.g. category)
+
+        Returns:
+            (distance_km, item) pairs sorted by distance
+        """
+        found = []
+        for lat, lng, item in self._candidates(latitude, longitude, radius_km):
+            distance = haversine_km(latitude, longitude, lat, lng)
+            if distance <= radius_km and (predicate is None or predicate(item)):
+                found.append((distance, item))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int = 1,
+        max_km: Optional[float] = None,
+        predicate: Optional[Callable[[T], bool]] = None
+    ) -> List[Tuple[float, T]]:
+        """
+        Return the k items nearest to a point.
+
+        The search radius starts at one cell and doubles until k items are
+        found (or max_km, or the whole index, is covered).
+
+        Returns:
+            Up to k (distance_km, item) pairs sorted by distance
+        """
+        if not self._size or k <= 0:
+            return []
+        radius = self.cell_deg * KM_PER_DEGREE
+        while True:
+            if max_km is not None:
+                radius = min(radius, max_km)
+            found = self.within(latitude, longitude, radius, predicate)
+            covers_all = max_km is not None and radius >= max_km or radius >= math.pi * EARTH_RADIUS_KM
+            if len(found) >= k or covers_all:
+                return found[:k]
+            radius *= 2
+
+    def near_duplicates(
+        self,
+        max_m: float = 50.0,
+        same: Optional[Callable[[T, T], bool]] = None
+    ) -> List[Tuple[T, T, float]]:
+        """
+        Return pairs of items closer than max_m metres.
+
+        Args:
+            max_m: Distance under which two points may be the same place
+            same: Optional extra test on the two items (e.g. similar names)
+
+        Returns:
+            (first, second, distance_m) tuples, each pair once
+        """
+        # Re-bucket into cells of max_m, so only the adjacent cells hold candidates
+        grid = SpatialIndex(max_m / 1000)
+        for points in self._cells.values():
+            for lat, lng, item in points:
+                grid.add(lat, lng, item)
+
+        pairs = []
+        for (row, col), points in grid._cells.items():
+            for position, (lat, lng, item) in enumerate(points):
+                # Longitude cells are narrower than max_m away from the equator
+                span = math.ceil(1 / max(math.cos(math.radians(lat)), 0.01))
+                # Later points of the same cell, then cells after this one in
+                # (row, col) order, so that every pair is seen once
+                candidates = [points[position + 1:]]
+                for other_row in (row, row + 1):
+                    for other_col in range(col - span, col + span + 1):
+                        if (other_row, other_col) > (row, col):
+                            candidates.append(grid._cells.get((other_row, other_col), ()))
+                for others in candidates:
+                    for other_lat, other_lng, other in others:
+                        distance_m = haversine_km(lat, lng, other_lat, other_lng) * 1000
+                        if distance_m <= max_m and (same is None or same(item, other)):
+                            pairs.append((item, other, distance_m))
+        return pairs
@@ -0,0 +1,388 @@
+"""
+Website enrichment - collect contact details from scraped business websites.
+
+Every business website is fetched with a pooled asyncio HTTP client (aiohttp):
+a fixed number of workers share one connection pool with a per-host
+connection limit and a total timeout per request. Emails, extra phone numbers
+and social media links are extracted from the page. Responses are cached on
+disk keyed by a hash of the URL, so re-running an enrichment only fetches new
+or expired sites. Error pages and failed requests are not cached.
+
+aiohttp is imported lazily; the rest of the app works without it.
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+import logging
+from html import unescape
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urljoin, urlparse
+
+from wp_message_sender import normalize_turkish_mobile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 50
+DEFAULT_PER_HOST = 2
+DEFAULT_TIMEOUT = 15.0
+DEFAULT_MAX_AGE = 7 * 24 * 3600  # Cached responses are reused for a week
+MAX_BODY_BYTES = 1024 * 1024
+USER_AGENT = "Mozilla/5.0 (compatible; business-enricher/1.0)"
+
+# Fields added to each business record
+ENRICHED_FIELDS = ("emails", "extra_phones", "social_links", "website_status")
+
+_HREF_RE = re.compile(r"""href\s*=\s*["']([^"'#]+)["']""", re.IGNORECASE)
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+_PHONE_RE = re.compile(r"(?:\+90|0)\s*\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{2}[\s.-]?\d{2}")
+_TAG_RE = re.compile(r"<script.*?</script>|<style.*?</style>|<[^>]+>", re.IGNORECASE | re.DOTALL)
+# Email-like asset names such as "logo@2x.png"
+_ASSET_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp")
+SOCIAL_DOMAINS = (
+    "facebook.com", "instagram.com", "twitter.com", "x.com",
+    "linkedin.com", "youtube.com", "tiktok.com",
+)
+
+
+def default_cache_dir() -> str:
+    """Return the response cache directory in the working directory."""
+    return os.path.join(os.getcwd(), "web_cache")
+
+
+def normalize_website(url: Optional[str]) -> Optional[str]:
+    """
+    Return a fetchable http(s) URL for a scraped website value.
+
+    Google redirect links ("/url?q=...") are unwrapped and a missing scheme
+    defaults to http. Empty, malformed or non-web values give None.
+    """
+    if not url or not isinstance(url, str):
+        return None
+    url = url.strip()
+    try:
+        parsed = urlparse(url)
+        if parsed.path == "/url" and "google." in parsed.netloc:
+            url = parse_qs(parsed.query).get("q", [""])[0]
+            parsed = urlparse(url)
+        if not parsed.scheme:
+            url = "http://" + url
+            parsed = urlparse(url)
+    except ValueError:
+        # e.g. an unclosed IPv6 bracket ("http://[bad")
+        return None
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        return None
+    return url
+
+
+def extract_contacts(html: str, base_url: str = "") -> Dict[str, List[str]]:
+    """
+    Extract emails, phone numbers and social links from an HTML page.
+
+    Args:
+        html: Page source
+        base_url: URL of the page, used to resolve relative links
+
+    Returns:
+        Dictionary with sorted 'emails', 'phones' and 'social_links' lists
+    """
+    emails, phones, social = set(), set(), set()
+
+    for href in _HREF_RE.findall(html):
+        href = unescape(href).strip()
+        lower = href.lower()
+        if lower.startswith("mailto:"):
+            address = href[7:].split("?")[0].strip()
+            if _EMAIL_RE.fullmatch(address):
+                emails.add(address.lower())
+        elif lower.startswith("tel:"):
+            phones.add(re.sub(r"[^\d+]", "", href[4:]))
+        else:
+            host = urlparse(urljoin(base_url, href)).netloc.lower()
+            if host.startswith("www."):
+                host = host[4:]
+            if any(host == domain or host.endswith("." + domain) for domain in SOCIAL_DOMAINS):
+                social.add(urljoin(base_url, href))
+
+    text = unescape(_TAG_RE.sub(" ", html))
+    for address in _EMAIL_RE.findall(text):
+        if not address.lower().endswith(_ASSET_SUFFIXES):
+            emails.add(address.lower())
+    for number in _PHONE_RE.findall(text):
+        phones.add(re.sub(r"[^\d+]", "", number))
+
+    return {"emails": sorted(emails), "phones": sorted(p for p in phones if p), "social_links": sorted(social)}
+
+
+async def _read_limited(response, limit: int) -> bytes:
+    """Read at most limit bytes of a response body (large pages are truncated)."""
+    chunks, size = [], 0
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            break
+    return b"".join(chunks)[:limit]
+
+
+def _decode(body: bytes, charset: Optional[str]) -> str:
+    """Decode a response body, falling back to UTF-8 for missing or unknown charsets."""
+    try:
+        return body.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+class ResponseCache:
+    """Disk cache of fetched pages, one gzipped JSON file per URL hash."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_age: float = DEFAULT_MAX_AGE):
+        """
+        Args:
+            cache_dir: Cache directory, defaults to ./web_cache
+            max_age: Seconds a cached response stays valid
+        """
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_age = max_age
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".json.gz")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cached response for url, or None if missing or expired."""
+        path = self._path(url)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                return None
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, response: Dict) -> None:
+        """Store a response; written to a temp file first so readers never see partial files."""
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(response, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class WebsiteEnricher:
+    """Fetch websites concurrently through one pooled aiohttp session."""
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        per_host: int = DEFAULT_PER_HOST,
+        timeout: float = DEFAULT_TIMEOUT,
+        cache: Optional[ResponseCache] = None,
+        user_agent: str = USER_AGENT,
+    ):
+        """
+        Args:
+            concurrency: Number of requests in flight (and pooled connections)
+            per_host: Maximum simultaneous connections to one host
+            timeout: Total timeout of a single request in seconds
+            cache: Response cache, None disables caching
+            user_agent: User-Agent header sent with every request
+        """
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.cache = cache
+        self.user_agent = user_agent
+        self.stats = {"fetched": 0, "cached": 0, "errors": 0}
+
+    async def _fetch(self, session, url: str) -> Dict:
+        import aiohttp
+
+        if self.cache:
+            cached = self.cache.get(url)
+            if cached is not None:
+                self.stats["cached"] += 1
+                return cached
+
+        try:
+            async with session.get(url, allow_redirects=True) as response:
+                body = await _read_limited(response, MAX_BODY_BYTES)
+                result = {
+                    "url": url,
+                    "final_url": str(response.url),
+                    "status": response.status,
+                    "body": _decode(body, response.charset),
+                }
+            self.stats["fetched"] += 1
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.stats["errors"] += 1
+            # Failures are not cached, so they are retried on the next run
+            return {"url": url, "final_url": url, "status": None, "body": "", "error": type(e).__name__}
+
+        # Error pages (404, 503, ...) are retried on the next run like failures
+        if self.cache and 200 <= result["status"] < 300:
+            self.cache.put(url, result)
+        return result
+
+    async def enrich_urls(
+        self,
+        urls: Iterable[str],
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Dict]:
+        """
+        Fetch every URL and extract its contacts.
+
+        A fixed pool of workers pulls URLs from a queue, so memory does not
+        grow with the number of sites.
+
+        Args:
+            urls: URLs to fetch (duplicates are fetched once)
+            progress: Optional callback called with (done, total)
+
+        Returns:
+            Mapping of URL to {'status', 'error', 'emails', 'phones', 'social_links'}
+        """
+        import aiohttp
+
+        unique_urls = list(dict.fromkeys(urls))
+        queue: asyncio.Queue = asyncio.Queue()
+        for url in unique_urls:
+            queue.put_nowait(url)
+
+        results: Dict[str, Dict] = {}
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        headers = {"User-Agent": self.user_agent}
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+            async def worker():
+                while True:
+                    try:
+                        url = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    try:
+                        response = await self._fetch(session, url)
+                        contacts = extract_contacts(response["body"], response["final_url"])
+                        results[url] = {"status": response["status"], "error": response.get("error"), **contacts}
+                    except Exception as e:
+                        # One bad URL must not discard the results of all the others
+                        logger.warning(f"Enriching {url} failed: {e!r}")
+                        self.stats["errors"] += 1
+                        results[url] = {"status": None, "error": type(e).__name__,
+                                        "emails": [], "phones": [], "social_links": []}
+                    if progress:
+                        progress(len(results), len(unique_urls))
+
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(unique_urls)))))
+
+        return results
+
+
+def _phone_key(phone) -> str:
+    """Comparable form of a phone number (canonical for mobiles, digits otherwise)."""
+    return normalize_turkish_mobile(phone) or re.sub(r"\D", "", str(phone or ""))
+
+
+def enrich_businesses(
+    businesses: List[Dict],
+    progress: Optional[Callable[[int, int], None]] = None,
+    **enricher_options
+) -> List[Dict]:
+    """
+    Add website contact details to business records.
+
+    Args:
+        businesses: Business dictionaries with a 'website' field
+        progress: Optional callback called with (done, total)
+        **enricher_options: Passed to WebsiteEnricher (concurrency, per_host, timeout, cache)
+
+    Returns:
+        New business dictionaries with the ENRICHED_FIELDS added; list values
+        are joined with "; " so the records can be written to CSV
+    """
+    enricher = WebsiteEnricher(**enricher_options)
+    websites = [normalize_website(business.get("website")) for business in businesses]
+    results = asyncio.run(enricher.enrich_urls((url for url in websites if url), progress))
+    logger.info(f"Website enrichment: {enricher.stats}")
+
+    enriched = []
+    for business, url in zip(businesses, websites):
+        result = results.get(url) if url else None
+        own_phone = _phone_key(business.get("phone"))
+        if result is None:
+            status = "no website"
+        elif result["status"] is None:
+            status = result["error"]
+        else:
+            status = str(result["status"])
+        enriched.append({
+            **business,
+            "emails": "; ".join(result["emails"]) if result else "",
+            "extra_phones": "; ".join(p for p in result["phones"] if _phone_key(p) != own_phone) if result else "",
+            "social_links": "; ".join(result["social_links"]) if result else "",
+            "website_status": status,
+        })
+    return enriched
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Collect emails, phones and social links from business websites")
+    parser.add_argument("input", help="Scraped CSV or JSONL file with a 'website' column")
+    parser.add_argument("--output", help="Output file (default: <input>_enriched.<ext>)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Requests in flight")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST, help="Connections per host")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Timeout per request in seconds")
+    parser.add_argument("--cache-dir", default=None, help="Response cache directory (default: ./web_cache)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the response cache")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Enrich a scraped file from the command line."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = parse_args(argv)
+
+    from jsonl_io import iter_jsonl, write_jsonl
+
+    root, ext = os.path.splitext(args.input)
+    if ext == ".jsonl":
+        businesses = list(iter_jsonl(args.input))
+    else:
+        from csv_loader import load_csv
+        businesses = load_csv(args.input).fillna("").to_dict("records")
+
+    started = time.monotonic()
+    enriched = enrich_businesses(
+        businesses,
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        timeout=args.timeout,
+        cache=None if args.no_cache else ResponseCache(args.cache_dir),
+    )
+    elapsed = time.monotonic() - started
+
+    output = args.output or f"{root}_enriched{ext or '.csv'}"
+    if output.endswith(".jsonl"):
+        write_jsonl(enriched, output)
+    else:
+        import pandas as pd
+        pd.DataFrame(enriched).to_csv(output, index=False)
+
+    with_email = sum(1 for business in enriched if business["emails"])
+    logger.info(f"{len(enriched)} businesses enriched in {elapsed:.1f}s ({with_email} with email) -> {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
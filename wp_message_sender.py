@@ -1,35 +1,123 @@
 # Lazy import to avoid X11 issues on startup
+import re
+from functools import lru_cache
+
+# Digits of a Turkish mobile number in any common notation, once every
+# non-digit and a leading international "00" have been stripped:
+# "05321234567", "905321234567" or "5321234567".
+_NON_DIGIT_RE = re.compile(r"\D")
+_MOBILE_DIGITS_RE = re.compile(r"^(?:00)?(?:90|0)?(5\d{9})$")
+
+def _normalize_digits(phone):
+    match = _MOBILE_DIGITS_RE.match(_NON_DIGIT_RE.sub("", phone))
+    return "+90" + match.group(1) if match else None
+
+_normalize_phone_text = lru_cache(maxsize=65536)(_normalize_digits)
+
+def normalize_turkish_mobile(phone):
+    """
+    Normalize a Turkish mobile number to canonical E.164 (+905XXXXXXXXX).
+
+    Accepts "0532 123 45 67", "+90 532 123 45 67", "(0532) 123-45-67",
+    "0090 532 ...", "532 123 45 67" and similar notations. Returns None for
+    landlines, foreign numbers and empty values.
+    """
+    if phone is None:
+        return None
+    return _normalize_phone_text(str(phone))
+
+def normalize_turkish_mobiles(phones):
+    """
+    Normalize a pandas Series of phone numbers to canonical E.164 in one pass.
+
+    Each distinct value is normalized once and the result is broadcast
+    back, so repeated numbers cost nothing extra. The distinct values skip
+    the scalar function's cache, where they would only miss and evict.
+    Invalid numbers become NaN.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = phones.factorize()
+    # Missing values get code -1, which picks the trailing NaN
+    canonical = np.append(uniques.astype(str).map(_normalize_digits).to_numpy(dtype=object), np.nan)
+    return pd.Series(canonical[codes], index=phones.index, name=phones.name)
 
 def is_valid_turkish_mobile(phone):
     """
-    Check if phone number is a valid Turkish mobile number (starts with 05)
+    Check if phone number is a valid Turkish mobile number (05XX in any notation)
     """
-    # Clean phone number
-    clean_phone = phone.replace(" ", "").replace("(", "").replace(")", "").replace("-", "")
-    
-    # Check if starts with 05 and has 11 digits total
-    if clean_phone.startswith("05") and len(clean_phone) == 11:
-        return True
-    return False
+    return normalize_turkish_mobile(phone) is not None
 
 def format_turkish_mobile(phone):
     """
-    Format Turkish mobile number for WhatsApp (+90 prefix)
+    Format Turkish mobile number for WhatsApp (canonical +90 prefix)
+    """
+    canonical = normalize_turkish_mobile(phone)
+    if canonical is None:
+        raise ValueError(f"Geçersiz numara: {phone}")
+    return canonical
+
+class PyWhatKitSender:
+    """Sender backend that delivers messages through WhatsApp Web with pywhatkit"""
+    
+    name = "pywhatkit"
+    
+    def send(self, formatted_phone, message):
+        # Lazy import pywhatkit to avoid X11 issues on startup
+        import pywhatkit
+        
+        # Send message instantly with proper timing and tab close
+        pywhatkit.sendwhatmsg_instantly(
+            formatted_phone, 
+            message,
+            wait_time=15,
+            tab_close=True,
+            close_time=5
+        )
+
+class SimulatedSender:
+    """
+    Dry-run sender backend that never contacts WhatsApp
+    
+    Args:
+        latency (float): Seconds each simulated send takes
+        failure_rate (float): Probability (0-1) that a send raises an error
+        seed (int): Optional random seed for reproducible failures
     """
-    clean_phone = phone.replace(" ", "").replace("(", "").replace(")", "").replace("-", "")
-    return "+90" + clean_phone[1:]  # Remove first 0 and add +90
+    
+    name = "simulated"
+    
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=None):
+        import random
+        
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent_count = 0
+        self._random = random.Random(seed)
+    
+    def send(self, formatted_phone, message):
+        import time
+        
+        if self.latency > 0:
+            time.sleep(self.latency)
+        if self._random.random() < self.failure_rate:
+            raise ConnectionError(f"Simüle edilmiş gönderim hatası: {formatted_phone}")
+        self.sent_count += 1
 
-def send_whatsapp_message(sender_phone, recipient_phone, message):
+def send_whatsapp_message(sender_phone, recipient_phone, message, backend=None):
     """
-    Send WhatsApp message using pywhatkit (only to Turkish mobile numbers)
+    Send WhatsApp message (only to Turkish mobile numbers)
     
     Args:
         sender_phone (str): Your phone number
         recipient_phone (str): Recipient's phone number
         message (str): Message to send
+        backend: Sender backend with a send(formatted_phone, message) method
+                 (defaults to PyWhatKitSender)
     """
-    # Lazy import pywhatkit to avoid X11 issues on startup
-    import pywhatkit
+    if backend is None:
+        backend = PyWhatKitSender()
     
     # Validate Turkish mobile number
     if not is_valid_turkish_mobile(recipient_phone):
@@ -38,26 +126,23 @@ def send_whatsapp_message(sender_phone, recipient_phone, message):
     try:
         # Format phone number for WhatsApp
         formatted_phone = format_turkish_mobile(recipient_phone)
-        
-        # Send message instantly with proper timing and tab close
-        pywhatkit.sendwhatmsg_instantly(
-            formatted_phone, 
-            message,
-            wait_time=15,
-            tab_close=True,
-            close_time=5
-        )
+        backend.send(formatted_phone, message)
         return True
     except Exception as e:
-        raise Exception(f"WhatsApp mesajı gönderilemedi: {str(e)}")
+        raise Exception(f"WhatsApp mesajı gönderilemedi: {str(e)}") from e
+
+def _sent_log_path(log_file=None):
+    """Path of the sent messages log (sent_messages.json in the working directory by default)"""
+    import os
+    
+    return log_file or os.path.join(os.getcwd(), "sent_messages.json")
 
-def create_sent_log():
+def create_sent_log(log_file=None):
     """Create or load sent messages log to prevent duplicates"""
     import os
     import json
-    from datetime import datetime
     
-    log_file = os.path.join(os.getcwd(), "sent_messages.json")
+    log_file = _sent_log_path(log_file)
     
     if not os.path.exists(log_file):
         with open(log_file, 'w', encoding='utf-8') as f:
@@ -70,32 +155,39 @@ def create_sent_log():
     except:
         return {}
 
-def log_sent_message(phone, message_hash):
+def log_sent_message(phone, message_hash, log_file=None):
     """Log sent message to prevent duplicates"""
-    import os
     import json
-    import hashlib
     from datetime import datetime
     
-    log_file = os.path.join(os.getcwd(), "sent_messages.json")
-    sent_log = create_sent_log()
+    log_file = _sent_log_path(log_file)
+    sent_log = create_sent_log(log_file)
     
     # Create unique key for this phone-message combination
-    key = f"{phone}_{message_hash}"
+    key = f"{normalize_turkish_mobile(phone) or phone}_{message_hash}"
     sent_log[key] = datetime.now().isoformat()
     
     with open(log_file, 'w', encoding='utf-8') as f:
         json.dump(sent_log, f, ensure_ascii=False, indent=2)
 
-def is_message_already_sent(phone, message):
-    """Check if message was already sent to this phone"""
+def message_hash(message):
+    """Short hash of a message text used in the sent messages log"""
     import hashlib
     
-    sent_log = create_sent_log()
-    message_hash = hashlib.md5(message.encode()).hexdigest()[:8]
-    key = f"{phone}_{message_hash}"
+    return hashlib.md5(message.encode()).hexdigest()[:8]
+
+def is_message_already_sent(phone, message, message_hash_value=None, log_file=None):
+    """Check if message was already sent to this phone"""
+    sent_log = create_sent_log(log_file)
+    if message_hash_value is None:
+        message_hash_value = message_hash(message)
+    canonical = normalize_turkish_mobile(phone)
+    if canonical is None:
+        return f"{phone}_{message_hash_value}" in sent_log
     
-    return key in sent_log
+    # Older logs are keyed on the 05XXXXXXXXX notation
+    return (f"{canonical}_{message_hash_value}" in sent_log
+            or f"0{canonical[3:]}_{message_hash_value}" in sent_log)
 
 # Example usage (commented out)
 # send_whatsapp_message("+905349127082", "+905551234567", "Merhaba, bu bir test mesajıdır!")
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+Streaming Excel (.xlsx) export of stored results.
+
+pandas' to_excel builds the whole workbook in memory, which is slow and
+memory-hungry for large scrapes. export_xlsx() writes with openpyxl's
+write-only mode instead: rows are appended one at a time and flushed to a
+temporary file, so memory use stays constant however many rows are
+exported. Rows come from an ExportSource, which streams a CSV file in
+chunks, a JSONL file record by record, or the master dataset from an
+SQLite cursor.
+"""
+
+import os
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+from business_record import FIELDS
+from csv_loader import iter_csv_chunks
+from jsonl_io import iter_jsonl
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Excel's row limit, minus the header row; larger exports continue on a new sheet
+MAX_SHEET_ROWS = 1_048_575
+
+# Rows per CSV chunk; smaller than the loader's default to keep the export's footprint low
+CSV_CHUNK_ROWS = 5_000
+
+# Rows written between two progress reports
+PROGRESS_EVERY = 2_000
+
+# Widths (in characters) of the canonical columns; others get DEFAULT_WIDTH
+COLUMN_WIDTHS = {"name": 35, "address": 45, "phone": 18, "website": 35, "category": 22}
+DEFAULT_WIDTH = 14
+
+
+class ExportSource(NamedTuple):
+    """Column names, a row iterator and the (estimated) row count of the data to export."""
+
+    columns: List[str]
+    rows: Iterable[Sequence]
+    total: Optional[int]
+
+
+def csv_source(path: str) -> ExportSource:
+    """
+    Stream a CSV file for export.
+
+    The row count used for progress is the number of lines, which
+    overestimates files with multi-line quoted values.
+    """
+    with open(path, "rb") as f:
+        total = max(0, sum(1 for _ in f) - 1)
+    chunks = iter_csv_chunks(path, chunksize=CSV_CHUNK_ROWS)
+    first = next(chunks, None)
+    if first is None:
+        return ExportSource([], [], 0)
+    columns = [str(col).strip() for col in first.columns]
+
+    def rows() -> Iterator[tuple]:
+        chunk = first
+        while chunk is not None:
+            yield from chunk.itertuples(index=False, name=None)
+            chunk = next(chunks, None)
+
+    return ExportSource(columns, rows(), total)
+
+
+def jsonl_source(path: str) -> ExportSource:
+    """
+    Stream a JSONL file for export.
+
+    A first pass collects the columns (canonical fields first, then the
+    others in the order they first appear) and the record count.
+    """
+    keys = {}
+    total = 0
+    for record in iter_jsonl(path):
+        total += 1
+        for key in record:
+            keys.setdefault(key, None)
+    columns = [field for field in FIELDS if field in keys] + [key for key in keys if key not in FIELDS]
+    rows = ([record.get(column) for column in columns] for record in iter_jsonl(path))
+    return ExportSource(columns, rows, total)
+
+
+def _cell_value(value):
+    """Value as written to a cell; missing values (None, NaN, pd.NA) become empty cells."""
+    if value is None or type(value) is str:
+        return value
+    try:
+        if value != value:
+            return None
+    except TypeError:
+        # pd.NA refuses comparison
+        return None
+    if isinstance(value, (list, dict)):
+        return str(value)
+    return value
+
+
+def export_xlsx(
+    source: ExportSource,
+    target,
+    sheet_name: str = "Veriler",
+    progress: Optional[Callable[[int, Optional[int]], None]] = None
+) -> int:
+    """
+    Write rows to an .xlsx file in constant memory.
+
+    Args:
+        source: Columns and rows to write
+        target: Output path or binary file object
+        sheet_name: Name of the first sheet; overflow sheets get " (2)", " (3)", ...
+        progress: Called with (rows written, source.total) every
+            PROGRESS_EVERY rows and once at the end
+
+    Returns:
+        Number of rows written
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    header_font = Font(bold=True)
+
+    def new_sheet(number: int):
+        sheet = workbook.create_sheet(sheet_name if number == 1 else f"{sheet_name} ({number})")
+        # Layout must be set before the first row is written
+        sheet.freeze_panes = "A2"
+        for position, column in enumerate(source.columns, start=1):
+            width = COLUMN_WIDTHS.get(column, DEFAULT_WIDTH)
+            sheet.column_dimensions[get_column_letter(position)].width = width
+        header = []
+        for column in source.columns:
+            cell = WriteOnlyCell(sheet, column)
+            cell.font = header_font
+            header.append(cell)
+        sheet.append(header)
+        return sheet
+
+    def text_cell(sheet, value: str):
+        value = ILLEGAL_CHARACTERS_RE.sub("", value)
+        if not value.startswith("="):
+            return value
+        # Scraped text is never a formula
+        cell = WriteOnlyCell(sheet, value)
+        cell.data_type = "s"
+        return cell
+
+    sheets = 1
+    sheet = new_sheet(sheets)
+    written = 0
+    sheet_rows = 0
+    for row in source.rows:
+        if sheet_rows == MAX_SHEET_ROWS:
+            sheets += 1
+            sheet = new_sheet(sheets)
+            sheet_rows = 0
+        values = []
+        for value in row:
+            value = _cell_value(value)
+            values.append(text_cell(sheet, value) if type(value) is str else value)
+        sheet.append(values)
+        written += 1
+        sheet_rows += 1
+        if progress and written % PROGRESS_EVERY == 0:
+            progress(written, source.total)
+
+    workbook.save(target)
+    if progress:
+        progress(written, written)
+    return written
+
+
+def export_xlsx_file(
+    source: ExportSource,
+    path: str,
+    sheet_name: str = "Veriler",
+    progress: Optional[Callable[[int, Optional[int]], None]] = None
+) -> int:
+    """Like export_xlsx(), but write to a temporary file first so a failed export leaves no partial file."""
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            rows = export_xlsx(source, f, sheet_name, progress)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return rows